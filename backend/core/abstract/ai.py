@@ -1,5 +1,8 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from backend.core.utils.constants import RateLimitConfig
 
 class AIConfig:
     """Configuration for AI Provider."""
@@ -9,6 +12,56 @@ class AIConfig:
         self.base_url = base_url
         self.extra_params = kwargs
 
+class StreamEvent:
+    """One event of stream_text: a text chunk, or the final event (done) with usage and latency metadata."""
+    def __init__(self, text: str = "", done: bool = False, metadata: Optional[Dict[str, Any]] = None):
+        self.text = text
+        self.done = done
+        self.metadata = metadata or {}
+
+class CallMetadata:
+    """Metadata of one provider call (rate-limit headers, tokens used), filled by the provider that served it.
+
+    One object per call: provider instances are shared across requests, so
+    per-call state cannot live on them.
+    """
+    def __init__(self):
+        self.response_headers: Optional[Dict[str, str]] = None
+        self.usage_tokens: Optional[int] = None
+
+class StreamMetrics:
+    """Time to first token and tokens per second of one streamed response."""
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.chunks = 0
+        self.chars = 0
+
+    def token(self, text: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.chunks += 1
+        self.chars += len(text)
+
+    def final_event(self, usage: Optional[Dict[str, int]] = None) -> StreamEvent:
+        """Final event; without provider usage the output tokens are estimated from the text."""
+        now = time.perf_counter()
+        first = self.first_token_at or now
+        output_tokens = (usage or {}).get('completion_tokens')
+        estimated = output_tokens is None
+        if estimated:
+            output_tokens = self.chars // RateLimitConfig.CHARS_PER_TOKEN
+        generation_seconds = now - first
+        return StreamEvent(done=True, metadata={
+            'usage': usage,
+            'ttft_ms': round((first - self.started) * 1000, 1),
+            'total_ms': round((now - self.started) * 1000, 1),
+            'output_tokens': output_tokens,
+            'output_tokens_estimated': estimated,
+            'tokens_per_second': round(output_tokens / generation_seconds, 1) if generation_seconds > 0 else None,
+            'chunks': self.chunks
+        })
+
 class AIProvider(ABC):
     """Abstract base class for AI providers."""
 
@@ -18,11 +71,39 @@ class AIProvider(ABC):
         pass
 
     @abstractmethod
-    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None) -> str:
-        """Generate text response from the model."""
+    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None) -> str:
+        """Generate text response from the model (headers and usage go to call, when given)."""
         pass
 
+    async def stream_text(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        call: Optional[CallMetadata] = None
+    ) -> AsyncIterator[StreamEvent]:
+        """Stream the response; closing the iterator stops generation.
+
+        Yields one StreamEvent per text chunk (also passed to on_token) and a
+        final event (done=True) whose metadata holds usage, time to first
+        token and tokens per second.
+
+        Default: the whole response from generate_text as a single chunk.
+        """
+        metrics = StreamMetrics()
+        yield self._token_event(metrics, await self.generate_text(prompt, system_instruction, call), on_token)
+        yield metrics.final_event()
+
+    def _token_event(self, metrics: StreamMetrics, text: str, on_token: Optional[Callable[[str], None]]) -> StreamEvent:
+        """Chunk event for stream_text implementations (updates metrics, calls on_token)."""
+        metrics.token(text)
+        if on_token:
+            on_token(text)
+        return StreamEvent(text)
+
     @abstractmethod
-    async def generate_json(self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None) -> Dict[str, Any]:
+    async def generate_json(
+        self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None
+    ) -> Dict[str, Any]:
         """Generate structured JSON response from the model."""
         pass
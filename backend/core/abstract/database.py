@@ -11,6 +11,21 @@ class DBConfig:
         self.password = password
         self.charset = charset
 
+class QueryCursor(ABC):
+    """Open cursor over a SELECT query, fetched page by page."""
+
+    columns: List[str] = []
+
+    @abstractmethod
+    def fetch(self, size: int) -> List[Dict[str, Any]]:
+        """Fetch up to `size` more rows (empty list when exhausted)."""
+        pass
+
+    @abstractmethod
+    def close(self):
+        """Release the cursor."""
+        pass
+
 class DatabaseDriver(ABC):
     """Abstract base class for database drivers."""
 
@@ -24,6 +39,10 @@ class DatabaseDriver(ABC):
         """Close the database connection."""
         pass
 
+    def reset_session(self):
+        """End any open transaction so a pooled connection starts clean (no-op by default)."""
+        pass
+
     @abstractmethod
     def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results as a list of dictionaries."""
@@ -34,7 +53,17 @@ class DatabaseDriver(ABC):
         """Execute an INSERT/UPDATE/DELETE command and return affected rows."""
         pass
 
+    @abstractmethod
+    def open_cursor(self, query: str, params: Optional[tuple] = None) -> "QueryCursor":
+        """Execute a SELECT query and keep its cursor open for incremental fetching."""
+        pass
+
     @abstractmethod
     def get_table_metadata(self, table_name: str) -> List[Dict[str, Any]]:
         """Get metadata for a specific table."""
         pass
+
+    @abstractmethod
+    def get_query_plan(self, query: str) -> Optional[str]:
+        """Prepare a query without executing it and return its execution plan."""
+        pass
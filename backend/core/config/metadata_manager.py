@@ -16,6 +16,7 @@ class DatabaseMetadataManager:
         self.metadata: Dict = {}
         self.table_index: Dict[str, Set[str]] = {}  # keyword -> set of table names
         self.column_index: Dict[str, Dict[str, Set[str]]] = {}  # table -> column -> keywords
+        self._schema_cache: Dict[tuple, str] = {}  # (max_tables, categories) -> esquema para IA
         
         if os.path.exists(self.metadata_file):
             self.load_metadata()
@@ -30,6 +31,7 @@ class DatabaseMetadataManager:
         """Cargar metadatos desde archivo JSON"""
         with open(self.metadata_file, 'r', encoding='utf-8') as f:
             self.metadata = json.load(f)
+        self._schema_cache = {}
     
     def save_metadata(self, metadata: Dict):
         """Guardar metadatos en archivo JSON"""
@@ -42,6 +44,7 @@ class DatabaseMetadataManager:
         """Construir índices para búsqueda rápida"""
         self.table_index = {}
         self.column_index = {}
+        self._schema_cache = {}
         
         for table_name, table_info in self.metadata.get('tables', {}).items():
             # Indexar por nombre de tabla
@@ -143,8 +146,14 @@ class DatabaseMetadataManager:
             categories: Categorías específicas a incluir (None = todas)
         
         Returns:
-            String con el esquema en formato legible
+            String con el esquema en formato legible (se memoriza hasta
+            que cambian los metadatos)
         """
+        cache_key = (max_tables, tuple(sorted(categories)) if categories else None)
+        cached = self._schema_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         tables = self.metadata.get('tables', {})
         
         # Filtrar por categorías si se especifican
@@ -185,7 +194,9 @@ class DatabaseMetadataManager:
                 if len(columns) > 15:
                     schema_lines.append(f"     ... y {len(columns) - 15} más")
         
-        return "\n".join(schema_lines)
+        schema = "\n".join(schema_lines)
+        self._schema_cache[cache_key] = schema
+        return schema
     
     def get_focused_schema(self, user_query: str) -> str:
         """
@@ -1,12 +1,15 @@
 import json
 import os
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from pathlib import Path
 from backend.core.config.settings import settings
 
 class ModelManager:
     """Manages AI model configurations from JSON file."""
     
+    # Called after any instance reloads (e.g. to drop cached provider clients)
+    _reload_listeners: List[Callable[[], None]] = []
+    
     def __init__(self):
         self.config_path = Path(__file__).parent / "ai_models_config.json"
         self.providers_path = Path(__file__).parent / "ai_providers_config.json"
@@ -36,7 +39,8 @@ class ModelManager:
             'DEEPSEEK_API_KEY': settings.DEEPSEEK_API_KEY,
             'ALIBABA_API_KEY': settings.ALIBABA_API_KEY,
             'QWEN_API_KEY': settings.QWEN_API_KEY,
-            'MISTRAL_API_KEY': settings.MISTRAL_API_KEY
+            'MISTRAL_API_KEY': settings.MISTRAL_API_KEY,
+            'MOCK_LLM_API_KEY': settings.MOCK_LLM_API_KEY
         }
         return key_mapping.get(env_var_name)
     
@@ -71,6 +75,10 @@ class ModelManager:
                     if provider_config.get('headers'):
                         enriched_model['headers'] = provider_config['headers']
                     
+                    # Quotas per API key (requests/tokens per minute)
+                    if provider_config.get('rate_limits'):
+                        enriched_model['rate_limits'] = provider_config['rate_limits']
+                    
                     enriched_models.append(enriched_model)
                 else:
                     # Model without provider config, keep as is
@@ -172,6 +180,13 @@ class ModelManager:
         """Reload models and providers from files."""
         self.providers = self._load_providers()
         self.models = self._load_models()
+        for listener in ModelManager._reload_listeners:
+            listener()
+    
+    @classmethod
+    def add_reload_listener(cls, listener: Callable[[], None]):
+        """Register a callback to run after every reload()."""
+        cls._reload_listeners.append(listener)
 
 # Global instance
 model_manager = ModelManager()
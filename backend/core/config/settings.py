@@ -27,6 +27,7 @@ class Settings(BaseSettings):
     DEEPSEEK_API_KEY: Optional[str] = None
     ALIBABA_API_KEY: Optional[str] = None
     QWEN_API_KEY: Optional[str] = None
+    MOCK_LLM_API_KEY: Optional[str] = None  # Any value enables the local mock provider (load testing)
 
     # Outlook
     OUTLOOK_EMAIL: Optional[str] = None
@@ -1,6 +1,7 @@
 from backend.core.abstract.ai import AIProvider
 from backend.drivers.ai.gemini_provider import GeminiProvider
 from backend.drivers.ai.openai_compatible_provider import OpenAICompatibleProvider
+from backend.drivers.ai.mock_provider import MockProvider
 
 class AIFactory:
     """Factory for creating AI provider instances."""
@@ -13,5 +14,8 @@ class AIFactory:
         elif provider_name in ["openai_compatible", "openrouter", "groq", "openai", "deepseek", "qwen", "mistral"]:
             # All these providers use OpenAI-compatible API
             return OpenAICompatibleProvider()
+        elif provider_name == "mock":
+            # Simulated LLM for load tests and cassette replay
+            return MockProvider()
         else:
             raise ValueError(f"Unsupported AI provider: {provider_name}")
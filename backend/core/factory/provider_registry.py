@@ -0,0 +1,156 @@
+"""
+Provider Registry - Clientes de IA configurados y reutilizados
+
+Crear un provider y un cliente OpenAI(...) en cada llamada supone un nuevo
+handshake TLS y ninguna conexión keep-alive. El registro guarda un provider
+ya configurado por (proveedor, api_key, base_url, modelo, cabeceras); los
+clientes OpenAI-compatibles comparten además un único pool HTTP. Al
+recargar la configuración de modelos (ModelManager.reload) se descartan
+todos, de modo que una clave o URL cambiada se aplica en la siguiente
+llamada.
+
+Con MockLLMConfig.RECORD los providers reales se envuelven en un
+RecordingProvider que graba cada respuesta en el cassette del mock. Con
+un caso de uso cacheable (LLMCacheConfig.TTL_SECONDS) se devuelve el
+provider envuelto en un CachedProvider (caché persistente de respuestas).
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from backend.core.abstract.ai import AIConfig, AIProvider
+from backend.core.config.model_manager import ModelManager
+from backend.core.factory.ai_factory import AIFactory
+from backend.core.utils.constants import AIClientConfig, MockLLMConfig, LogPrefixes
+from backend.core.utils.llm_cache import CachedProvider, cache_ttl
+from backend.core.utils.token_budget import response_tokens
+from backend.drivers.ai.mock_provider import RecordingProvider
+from backend.drivers.ai.openai_compatible_provider import close_shared_http_client
+
+logger = logging.getLogger(__name__)
+
+
+def model_ai_config(model_config: Dict[str, Any]) -> AIConfig:
+    """AIConfig de un modelo de ai_models_config.json (con los datos de su proveedor)."""
+    params = {
+        'api_key': model_config.get('api_key'),
+        'model': model_config['model_id'],
+        'max_tokens': response_tokens(model_config)
+    }
+    if model_config.get('base_url'):
+        params['base_url'] = model_config['base_url']
+    if model_config.get('headers'):
+        params['headers'] = model_config['headers']
+    if model_config.get('structured_output'):
+        params['structured_output'] = model_config['structured_output']
+    return AIConfig(**params)
+
+
+def _create(provider_name: str, config: AIConfig) -> AIProvider:
+    provider = AIFactory.get_provider(provider_name)
+    provider.configure(config)
+    if MockLLMConfig.RECORD and provider_name != "mock":
+        provider = RecordingProvider(provider, config.model)
+    return provider
+
+
+class ProviderRegistry:
+    """Providers configurados por (proveedor, clave, URL, modelo)."""
+
+    def __init__(self):
+        self._providers: Dict[Tuple, AIProvider] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        ModelManager.add_reload_listener(self.invalidate)
+
+    @staticmethod
+    def _key(provider_name: str, config: AIConfig) -> Tuple:
+        api_key = hashlib.sha256((config.api_key or '').encode('utf-8')).hexdigest()
+        params = json.dumps(config.extra_params, sort_keys=True, default=str)
+        return (provider_name, api_key, config.base_url, config.model, params)
+
+    def get(self, provider_name: str, config: AIConfig, use_case: Optional[str] = None) -> AIProvider:
+        """
+        Provider configurado, reutilizado si ya existe uno con la misma configuración.
+
+        Args:
+            provider_name: Nombre o esquema aceptado por AIFactory
+            config: Configuración (clave, modelo, URL, cabeceras)
+            use_case: Caso de uso para la caché de respuestas (None: sin caché)
+
+        Raises:
+            ValueError / ImportError: Igual que AIFactory.get_provider y configure
+        """
+        provider = self._get(provider_name, config)
+        ttl = cache_ttl(use_case)
+        if ttl:
+            return CachedProvider(provider, provider_name, config, use_case, ttl)
+        return provider
+
+    def _get(self, provider_name: str, config: AIConfig) -> AIProvider:
+        if not AIClientConfig.ENABLED:
+            return _create(provider_name, config)
+
+        key = self._key(provider_name, config)
+        with self._lock:
+            provider = self._providers.get(key)
+            if provider is not None:
+                self.hits += 1
+                return provider
+        provider = _create(provider_name, config)
+        with self._lock:
+            # Otra petición pudo crearlo mientras tanto: se conserva el primero
+            provider = self._providers.setdefault(key, provider)
+            self.misses += 1
+        return provider
+
+    def for_model(self, model_config: Dict[str, Any], use_case: Optional[str] = None) -> AIProvider:
+        """Provider configurado para un modelo de la configuración."""
+        provider_name = model_config.get('schema', model_config.get('provider'))
+        return self.get(provider_name, model_ai_config(model_config), use_case)
+
+    def invalidate(self):
+        """Descarta los providers guardados (configuración recargada)."""
+        with self._lock:
+            dropped = len(self._providers)
+            self._providers.clear()
+            self.invalidations += 1
+        if dropped:
+            logger.info(f"{LogPrefixes.AI_PROVIDER} ♻️ {dropped} clientes de IA descartados tras recargar la configuración")
+
+    async def close(self):
+        """Descarta los providers y cierra el pool HTTP compartido."""
+        self.invalidate()
+        await close_shared_http_client()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': AIClientConfig.ENABLED,
+                'clients': len(self._providers),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'models': sorted(f"{key[0]}:{key[3]}" for key in self._providers),
+                'http_pool': {
+                    'max_connections': AIClientConfig.MAX_CONNECTIONS,
+                    'max_keepalive_connections': AIClientConfig.MAX_KEEPALIVE_CONNECTIONS,
+                    'keepalive_expiry_seconds': AIClientConfig.KEEPALIVE_EXPIRY_SECONDS
+                }
+            }
+
+
+# Instancia global del registro de providers
+_provider_registry = None
+
+def get_provider_registry() -> ProviderRegistry:
+    """Obtener instancia global del registro de providers"""
+    global _provider_registry
+    if _provider_registry is None:
+        _provider_registry = ProviderRegistry()
+    return _provider_registry
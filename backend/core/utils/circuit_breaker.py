@@ -0,0 +1,240 @@
+"""
+Circuit breakers por modelo de IA
+
+Cada modelo tiene un circuito con tres estados:
+
+- closed: las llamadas pasan; se registran éxitos, errores, 429 y timeouts.
+- open: el modelo se salta al instante durante un tiempo de enfriamiento
+  (que se duplica en cada reapertura, hasta MAX_OPEN_SECONDS).
+- half_open: pasado el enfriamiento se admite una única llamada de prueba;
+  si va bien el circuito se cierra, si falla se vuelve a abrir.
+
+El registro es global del proceso: lo comparten el chat, el análisis de
+correos y el de adjuntos, y se expone en /api/models/health/breakers.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from backend.core.utils.constants import CircuitBreakerConfig
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_ERROR = "error"
+FAILURE_RATE_LIMIT = "rate_limit"
+FAILURE_TIMEOUT = "timeout"
+
+
+def classify_failure(error: Any) -> str:
+    """Tipo de fallo de una llamada a partir de la excepción o el mensaje."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return FAILURE_TIMEOUT
+    text = str(error).lower()
+    if '429' in text or 'rate limit' in text or 'rate_limit' in text or 'quota' in text or 'too many requests' in text:
+        return FAILURE_RATE_LIMIT
+    if 'timeout' in text or 'timed out' in text:
+        return FAILURE_TIMEOUT
+    return FAILURE_ERROR
+
+
+class CircuitBreaker:
+    """Circuito de un modelo."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[float, Optional[str]]] = deque()  # (instante, tipo de fallo o None)
+        self._consecutive_failures = 0
+        self._consecutive_rate_limits = 0
+        self._open_count = 0
+        self._opened_at = 0.0
+        self._open_seconds = CircuitBreakerConfig.OPEN_SECONDS
+        self._probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+        self.last_failure: Optional[str] = None
+        self.totals = {'success': 0, FAILURE_ERROR: 0, FAILURE_RATE_LIMIT: 0, FAILURE_TIMEOUT: 0, 'rejected': 0}
+
+    def _trim(self, now: float):
+        cutoff = now - CircuitBreakerConfig.WINDOW_SECONDS
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def _cooldown_elapsed(self, now: float) -> bool:
+        return now - self._opened_at >= self._open_seconds
+
+    def _probe_busy(self, now: float) -> bool:
+        return self._probe_started is not None and now - self._probe_started < CircuitBreakerConfig.HALF_OPEN_PROBE_TIMEOUT
+
+    def is_available(self) -> bool:
+        """Si una llamada sería admitida ahora (sin reservar la prueba semiabierta)."""
+        if not CircuitBreakerConfig.ENABLED:
+            return True
+        now = time.time()
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return self._cooldown_elapsed(now)
+            return not self._probe_busy(now)
+
+    def allow_request(self) -> bool:
+        """Admite una llamada; en semiabierto reserva la única prueba."""
+        if not CircuitBreakerConfig.ENABLED:
+            return True
+        now = time.time()
+        with self._lock:
+            if self.state == OPEN and self._cooldown_elapsed(now):
+                self.state = HALF_OPEN
+                self._probe_started = None
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probe_busy(now):
+                self._probe_started = now
+                return True
+            self.totals['rejected'] += 1
+            return False
+
+    def record_success(self):
+        now = time.time()
+        with self._lock:
+            self.totals['success'] += 1
+            self._outcomes.append((now, None))
+            self._trim(now)
+            self._consecutive_failures = 0
+            self._consecutive_rate_limits = 0
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self._probe_started = None
+                self._open_seconds = CircuitBreakerConfig.OPEN_SECONDS
+
+    def record_failure(self, error: Any) -> str:
+        """
+        Registra un fallo y abre el circuito si se supera algún umbral.
+
+        Returns:
+            Tipo de fallo (error, rate_limit, timeout)
+        """
+        kind = classify_failure(error)
+        now = time.time()
+        with self._lock:
+            self.totals[kind] += 1
+            self.last_failure = f"{kind}: {str(error)[:200]}"
+            self._outcomes.append((now, kind))
+            self._trim(now)
+            self._consecutive_failures += 1
+            self._consecutive_rate_limits = self._consecutive_rate_limits + 1 if kind == FAILURE_RATE_LIMIT else 0
+
+            if self.state == HALF_OPEN:
+                self._open(now, reopen=True)
+            elif self.state == CLOSED and self._should_trip():
+                self._open(now)
+        return kind
+
+    def _should_trip(self) -> bool:
+        if self._consecutive_failures >= CircuitBreakerConfig.CONSECUTIVE_FAILURES:
+            return True
+        if self._consecutive_rate_limits >= CircuitBreakerConfig.RATE_LIMIT_TRIP:
+            return True
+        total = len(self._outcomes)
+        failures = sum(1 for _, kind in self._outcomes if kind)
+        return total >= CircuitBreakerConfig.MIN_REQUESTS and failures / total >= CircuitBreakerConfig.ERROR_RATE_THRESHOLD
+
+    def _open(self, now: float, reopen: bool = False):
+        if reopen:
+            self._open_seconds = min(self._open_seconds * 2, CircuitBreakerConfig.MAX_OPEN_SECONDS)
+        self.state = OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self._open_count += 1
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self._outcomes.clear()
+            self._consecutive_failures = 0
+            self._consecutive_rate_limits = 0
+            self._probe_started = None
+            self._open_seconds = CircuitBreakerConfig.OPEN_SECONDS
+
+    def health_score(self) -> float:
+        """0..1: tasa de éxito reciente, anulada mientras el circuito está abierto."""
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            if self.state == OPEN:
+                return 0.0
+            if not self._outcomes:
+                return 1.0
+            successes = sum(1 for _, kind in self._outcomes if kind is None)
+            score = successes / len(self._outcomes)
+            return round(score / 2 if self.state == HALF_OPEN else score, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        score = self.health_score()
+        with self._lock:
+            retry_in = max(0.0, self._open_seconds - (now - self._opened_at)) if self.state == OPEN else 0.0
+            return {
+                'model_id': self.name,
+                'state': self.state,
+                'health_score': score,
+                'recent_calls': len(self._outcomes),
+                'recent_failures': sum(1 for _, kind in self._outcomes if kind),
+                'consecutive_failures': self._consecutive_failures,
+                'times_opened': self._open_count,
+                'retry_in_seconds': round(retry_in, 1),
+                'last_failure': self.last_failure,
+                'totals': dict(self.totals)
+            }
+
+
+class CircuitBreakerRegistry:
+    """Circuitos por modelo, creados bajo demanda."""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, model_id: str) -> CircuitBreaker:
+        with self._lock:
+            if model_id not in self._breakers:
+                self._breakers[model_id] = CircuitBreaker(model_id)
+            return self._breakers[model_id]
+
+    def probe_candidates(self) -> list:
+        """Modelos abiertos cuyo enfriamiento ha terminado (listos para una prueba)."""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return [b.name for b in breakers if b.state != CLOSED and b.is_available()]
+
+    def reset(self, model_id: Optional[str] = None) -> bool:
+        with self._lock:
+            breakers = list(self._breakers.values()) if model_id is None else [self._breakers.get(model_id)]
+        breakers = [b for b in breakers if b]
+        for breaker in breakers:
+            breaker.reset()
+        return bool(breakers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {
+            'enabled': CircuitBreakerConfig.ENABLED,
+            'breakers': sorted((b.to_dict() for b in breakers), key=lambda b: b['model_id'])
+        }
+
+
+# Instancia global de circuit breakers
+_circuit_breakers = None
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Obtener instancia global de circuit breakers"""
+    global _circuit_breakers
+    if _circuit_breakers is None:
+        _circuit_breakers = CircuitBreakerRegistry()
+    return _circuit_breakers
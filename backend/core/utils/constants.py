@@ -18,6 +18,14 @@ class AppConstants:
     DEFAULT_HOST = "0.0.0.0"
 
 
+class WarmupConfig:
+    """Precalentamiento al arrancar (conexiones, esquema, clientes de IA, cachés)"""
+    ENABLED = True
+    BLOCKING = False  # True: el servidor no acepta peticiones hasta terminar
+    DB_CONNECTIONS = 2  # Conexiones abiertas de antemano en el pool
+    PRIME_TEXT_INDEXES = True  # Construir los índices de texto de TextSearchConfig
+
+
 # ============================================================================
 # CONSTANTES DE IA
 # ============================================================================
@@ -44,6 +52,52 @@ class AILimits:
     MAX_API_RETRIES = 2
 
 
+class TokenBudgetConfig:
+    """Estimación de tokens por familia de modelo y recorte de prompts al presupuesto"""
+    ENABLED = True
+    # Caracteres por token en texto español; se recalibran con el uso real que informa el proveedor
+    CHARS_PER_TOKEN = {"gpt": 3.8, "llama": 3.5, "gemini": 3.8, "mistral": 3.3, "qwen": 3.2, "deepseek": 3.5}
+    DEFAULT_CHARS_PER_TOKEN = 3.2  # Familia desconocida: estimación conservadora
+    CONTEXT_WINDOW = {"gpt": 128000, "llama": 128000, "gemini": 1000000, "mistral": 32000, "qwen": 32000, "deepseek": 64000}
+    DEFAULT_CONTEXT_WINDOW = 8192
+    SAFETY_MARGIN = 0.1  # Holgura sobre la ventana de contexto por error de estimación
+    CALIBRATION_ALPHA = 0.1  # Peso de cada llamada en la media de caracteres por token
+    CALIBRATION_MIN_SAMPLES = 5  # Llamadas con uso informado antes de usar la calibración
+    TRIM_ORDER = ("history", "examples", "schema", "rows")  # Lo primero se recorta antes
+    MIN_ROWS = 5  # Filas de resultados que se conservan siempre
+
+
+class LLMPriority:
+    """Prioridades del gateway de IA (de mayor a menor)"""
+    INTERACTIVE = "interactive"  # Preguntas del chat y acciones del usuario
+    EMAIL = "email"  # Triaje de correo y adjuntos
+    BULK = "bulk"  # Lotes y análisis masivo (tablas)
+    ORDER = (INTERACTIVE, EMAIL, BULK)
+
+
+class BatchConfig:
+    """Procesamiento de preguntas en lote (/api/chat/batch)"""
+    MAX_QUESTIONS = 100
+    MAX_CONCURRENCY = 8  # Preguntas en curso simultáneamente
+    PROVIDER_CONCURRENCY = 4  # Llamadas simultáneas por proveedor de IA
+    DB_CONCURRENCY = 4  # Consultas simultáneas por base de datos
+
+
+class LLMGatewayConfig:
+    """Planificador único de llamadas a modelos: cupos de concurrencia y plazos por prioridad"""
+    ENABLED = True
+    MAX_CONCURRENCY = 12  # Llamadas a modelos en curso en todo el proceso
+    # Cupo por prioridad: lo que no usa el segundo plano queda libre para el chat
+    # El cupo de lotes coincide con el de BatchConfig para que el valor por defecto del lote sea alcanzable
+    PRIORITY_CONCURRENCY = {
+        LLMPriority.INTERACTIVE: 12,
+        LLMPriority.EMAIL: 4,
+        LLMPriority.BULK: BatchConfig.PROVIDER_CONCURRENCY,
+    }
+    # Plazo total de una petición (cola, reintentos y fallback incluidos)
+    DEADLINE_SECONDS = {LLMPriority.INTERACTIVE: 150, LLMPriority.EMAIL: 300, LLMPriority.BULK: 900}
+
+
 class ModelFallbackConfig:
     """Configuración de fallback entre modelos IA"""
     RETRY_DELAY_SECONDS = 5  # Espera entre reintentos del mismo modelo
@@ -62,10 +116,137 @@ class ModelFallbackConfig:
         "gpt-4": 60,
         "groq-llama-8b": 50,
         "groq-mixtral": 40,
-        "qwen3-72b-openrouter": 30
+        "qwen3-72b-openrouter": 30,
+        "mock-llm": 1000,  # Solo si se habilita (pruebas de carga): desplaza a los reales
+        "mock-replay": 1000
+    }
+
+
+class AIClientConfig:
+    """Clientes de IA reutilizados (uno por proveedor, clave, URL y modelo) sobre un pool HTTP compartido"""
+    ENABLED = True
+    MAX_CONNECTIONS = 50  # Conexiones HTTP simultáneas entre todos los proveedores
+    MAX_KEEPALIVE_CONNECTIONS = 20  # Conexiones inactivas mantenidas abiertas (sin nuevo handshake TLS)
+    KEEPALIVE_EXPIRY_SECONDS = 60
+    CONNECT_TIMEOUT_SECONDS = 10  # La lectura usa AILimits.API_TIMEOUT
+    STREAM_USAGE = True  # Pedir el uso de tokens al final del stream (stream_options.include_usage)
+
+
+class MockLLMConfig:
+    """Proveedor simulado para pruebas de carga (modelos mock-llm / mock-replay) y grabación de cassettes"""
+    LATENCY_DISTRIBUTION = "lognormal"  # fixed | uniform | lognormal
+    LATENCY_MEDIAN_SECONDS = 0.8  # fixed: valor exacto; lognormal: mediana
+    LATENCY_SIGMA = 0.5  # lognormal: dispersión
+    LATENCY_MIN_SECONDS = 0.05  # uniform: mínimo; acota también las demás
+    LATENCY_MAX_SECONDS = 10.0  # uniform: máximo; acota también las demás
+    TOKENS_PER_SECOND = 80  # Ritmo de salida simulado tras el primer token
+    STREAM_CHUNK_CHARS = 16
+    ERROR_RATE = 0.0  # Fracción de llamadas con error 500 simulado
+    RATE_LIMIT_RATE = 0.0  # Fracción de llamadas con 429 simulado
+    RETRY_AFTER_SECONDS = 5  # Retraso indicado en los 429 simulados
+    SEED = None  # Semilla para secuencias reproducibles (None: aleatorio)
+    SCRIPT_FILE = "mock_llm_script.json"  # [{"match": regex, "response": texto}], el primero que coincide
+    DEFAULT_RESPONSE = "OK (respuesta simulada)"
+    CASSETTE_FILE = "llm_cassette.jsonl"  # Pares prompt→respuesta grabados
+    RECORD = False  # Graba en el cassette las respuestas de los modelos reales
+
+
+class LLMCacheConfig:
+    """Caché persistente de respuestas de IA (clave: modelo, hash del prompt de sistema y del prompt, parámetros)"""
+    ENABLED = True
+    FILE = "llm_response_cache.sqlite3"
+    MAX_SIZE_MB = 50  # Por encima se desalojan las entradas usadas hace más tiempo (LRU)
+    EVICT_TO_RATIO = 0.9  # El desalojo deja la caché en esta fracción del máximo
+    # TTL por caso de uso; los no listados (generación del chat, sondas) no se cachean
+    TTL_SECONDS = {
+        "table_analysis": 30 * 86400,
+        "email_analysis": 7 * 86400,
+        "attachment_analysis": 7 * 86400,
+        "sql_correction": 86400,
+    }
+
+
+class StructuredOutputConfig:
+    """Respuestas JSON: salida estructurada nativa del proveedor, reparación y validación locales"""
+    # Modos nativos que se prueban en orden; el que un modelo rechaza (400) no se vuelve a pedir.
+    # Un modelo puede fijar el suyo con "structured_output" en ai_models_config.json.
+    NATIVE_MODES = ("json_schema", "json_object", "none")
+    SCHEMA_NAME = "response"  # Nombre del esquema en response_format (OpenAI-compatibles)
+    REPAIR = True  # Reparar localmente (vallas markdown, comas finales, respuesta truncada)
+    VALIDATE = True  # Validar y ajustar tipos según el esquema pedido
+    MAX_TRUNCATION_CUTS = 50  # Puntos de corte probados al cerrar una respuesta truncada
+    TRUE_WORDS = ("true", "sí", "si", "yes")
+    FALSE_WORDS = ("false", "no")
+
+
+class CircuitBreakerConfig:
+    """Circuit breaker por modelo (cerrado / abierto / semiabierto), compartido por chat y correo"""
+    ENABLED = True
+    WINDOW_SECONDS = 300  # Resultados recientes considerados
+    MIN_REQUESTS = 4  # Mínimo de llamadas en la ventana para evaluar la tasa de error
+    ERROR_RATE_THRESHOLD = 0.5  # Se abre con esta tasa de fallos en la ventana
+    CONSECUTIVE_FAILURES = 3  # ...o con estos fallos seguidos
+    RATE_LIMIT_TRIP = 2  # ...o con estos 429 seguidos
+    OPEN_SECONDS = 30  # Primera apertura; se duplica en cada reapertura
+    MAX_OPEN_SECONDS = 900
+    HALF_OPEN_PROBE_TIMEOUT = 60  # Una prueba sin resultado libera el hueco pasado este tiempo
+    CALL_TIMEOUT_SECONDS = 90  # Llamada al modelo contada como timeout
+    PROBE_ENABLED = True  # Pruebas en segundo plano de circuitos abiertos
+    PROBE_INTERVAL_SECONDS = 15
+    PROBE_PROMPT = "Responde solo: OK"
+
+
+class RateLimitConfig:
+    """Limitador por clave de API (token bucket de peticiones y tokens); límites en ai_providers_config.json"""
+    ENABLED = True
+    MAX_WAIT_SECONDS = 8  # Esperas más largas desvían la petición al siguiente modelo
+    DEFAULT_RETRY_AFTER_SECONDS = 20  # Bloqueo tras un 429 sin Retry-After
+    MAX_RETRY_AFTER_SECONDS = 300
+    CHARS_PER_TOKEN = 4  # Estimación de tokens del prompt
+    EXPECTED_OUTPUT_TOKENS = 512  # Reserva de tokens de salida por llamada
+
+
+class ModelRouterConfig:
+    """Orden adaptativo de modelos según latencia, éxito y validez SQL observadas"""
+    ENABLED = True
+    OBJECTIVE = "latency"  # latency | cost | quality
+    OBJECTIVES = ["latency", "cost", "quality"]
+    EWMA_ALPHA = 0.2  # Peso de la última observación
+    MIN_SAMPLES = 3  # Con menos llamadas el modelo conserva su prioridad estática
+    EXPLORATION_RATE = 0.05  # Probabilidad de adelantar un modelo al azar (preferentemente poco medido)
+    MIN_SUCCESS_RATE = 0.05  # Evita divisiones por cero en coste/latencia esperados
+    FILE = "model_router_stats.json"
+    SAVE_INTERVAL_SECONDS = 30
+    DEFAULT_COST_PER_MTOK = 1.0
+    # Coste orientativo (USD por millón de tokens, entrada+salida); 'cost_per_mtok' en el modelo lo sustituye
+    COST_PER_MTOK = {
+        "groq-llama-8b": 0.1,
+        "llama-3.1-8b-groq": 0.1,
+        "gemma2-9b-groq": 0.2,
+        "groq-llama-70b": 0.8,
+        "groq-mixtral": 0.5,
+        "gemini-1.5-flash": 0.4,
+        "gemini-2.0-flash": 0.4,
+        "gemini-1.5-pro": 6.0,
+        "gpt-4o-mini": 0.8,
+        "deepseek-chat": 1.4,
+        "claude-3.5-sonnet-openrouter": 18.0,
+        "gpt4-turbo-openrouter": 40.0
     }
 
 
+class HedgingConfig:
+    """Peticiones de cobertura (hedging): si el modelo tarda más de su p90, se lanza el siguiente"""
+    ENABLED = True
+    PERCENTILE = 0.9  # Umbral: percentil de la latencia observada del modelo en espera
+    MIN_SAMPLES = 5  # Por debajo se usa DEFAULT_THRESHOLD_SECONDS
+    DEFAULT_THRESHOLD_SECONDS = 4.0
+    MIN_THRESHOLD_SECONDS = 1.0
+    MAX_THRESHOLD_SECONDS = 15.0
+    MAX_IN_FLIGHT = 2  # Modelos compitiendo a la vez (principal + coberturas)
+    LATENCY_WINDOW = 50  # Latencias recientes retenidas por modelo
+
+
 # ============================================================================
 # CONSTANTES DE BASE DE DATOS
 # ============================================================================
@@ -101,6 +282,13 @@ class DBDefaults:
     MAX_SQL_EXECUTION_RETRIES = 3  # Intentos de ejecución por consulta
 
 
+class ConnectionPoolConfig:
+    """Pool de conexiones reutilizadas entre consultas"""
+    ENABLED = True
+    MAX_IDLE_PER_DB = 4  # Conexiones ociosas retenidas por base de datos
+    MAX_IDLE_SECONDS = 300  # Se cierra la conexión ociosa tras este tiempo
+
+
 # ============================================================================
 # CONSTANTES DE METADATOS
 # ============================================================================
@@ -163,6 +351,7 @@ class HTTPStatus:
     UNAUTHORIZED = 401
     NOT_FOUND = 404
     INTERNAL_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
 
 
 class CORSConfig:
@@ -246,6 +435,7 @@ class LogPrefixes:
     CONTEXTO = "[CONTEXTO]"
     ERROR_SQL = "[ERROR SQL]"
     RESPUESTA_FINAL = "[RESPUESTA FINAL]"
+    SYSTEM = "[SYSTEM]"
 
 
 class LogEmojis:
@@ -260,6 +450,11 @@ class LogEmojis:
     EXECUTE = "🔄"
 
 
+class LatencyConfig:
+    """Medición de latencia por etapas"""
+    HISTOGRAM_BUCKETS_MS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 20000, 60000]
+
+
 # ============================================================================
 # CONSTANTES DE SQL
 # ============================================================================
@@ -288,6 +483,106 @@ class SQLLimits:
     MAX_RESULTS = 1000
 
 
+class ResultSessionConfig:
+    """Resultados paginados en servidor (/api/chat/result/{id}?page=)"""
+    ENABLED = True
+    PAGE_SIZE = 100
+    MAX_ROWS = 10000  # Filas máximas retenidas por sesión
+    IDLE_TIMEOUT_SECONDS = 300  # Se cierra el cursor tras este tiempo sin uso
+    MAX_SESSIONS = 20  # Conexiones retenidas simultáneamente (se desaloja la más antigua)
+
+
+class MultiQueryConfig:
+    """Planes de varias consultas SQL independientes ejecutadas en paralelo"""
+    ENABLED = True
+    MAX_SUBQUERIES = 4  # Conexiones simultáneas por pregunta
+
+
+class SQLPipelineConfig:
+    """Ejecución de la SQL en cuanto se cierra su bloque durante el streaming del modelo"""
+    ENABLED = True
+
+
+class FollowUpConfig:
+    """Seguimientos resueltos en memoria sobre el último resultado de la conversación"""
+    ENABLED = True
+    MAX_ROWS = 10000  # Resultados mayores no se guardan
+    MAX_CONVERSATIONS = 200
+    TTL_SECONDS = 1800
+    DEFAULT_TOP_N = 10
+    RENDER_ROWS = 50  # Filas mostradas en la respuesta
+
+
+class ChatSessionConfig:
+    """Sesiones de conversación en el servidor (el cliente solo envía conversation_id)"""
+    ENABLED = True
+    FILE = "chat_sessions.sqlite3"
+    TTL_SECONDS = 86400  # Sesión descartada tras este tiempo sin mensajes
+    MAX_MESSAGES = UILimits.CONVERSATION_MEMORY_MESSAGES  # Mensajes retenidos para el contexto
+    MAX_MESSAGE_CHARS = 2000  # Cada mensaje se recorta a este tamaño en el historial
+    PURGE_INTERVAL_SECONDS = 600  # Frecuencia mínima de limpieza de sesiones caducadas
+
+
+class CorrectionMemoConfig:
+    """Memoria de correcciones SQL (fallo recurrente -> consulta corregida)"""
+    FILE = "sql_correction_memo.json"
+    MAX_ENTRIES = 500  # Entradas máximas antes de desalojar (LRU)
+    LITERAL_PLACEHOLDER = "?"  # Sustituto de literales en la huella
+
+
+class QueryCostConfig:
+    """Guarda de coste basada en el PLAN de Firebird para SQL generado por IA"""
+    ENABLED = True
+    REWRITE_THRESHOLD_ROWS = 20000  # Por encima se intentan reescrituras indexables
+    MAX_ESTIMATED_ROWS = 250000  # Por encima la consulta se rechaza
+    INDEX_SELECTIVITY = 0.05  # Fracción estimada de filas leídas por acceso INDEX
+    DEFAULT_TABLE_CARDINALITY = 10000  # Tablas sin record_count en metadatos
+    ERROR_MARKER = "QUERY COST EXCEEDED"  # Reconocido por SQLCorrector.detect_error_type
+
+
+class DateRangeConfig:
+    """Resolución de expresiones temporales a rangos de fecha indexables"""
+    DEFAULT_COLUMN = "FECHA"
+    ENFORCE_REWRITE = True  # Reescribir filtros EXTRACT(...) al rango resuelto
+
+
+class TextSearchConfig:
+    """Índice local de trigramas para búsquedas LIKE sin distinguir mayúsculas"""
+    ENABLED = True
+    # Tabla -> columnas de texto más buscadas (la PK se toma de los metadatos)
+    INDEXED_COLUMNS = {
+        "ARTICULO": ["NOMBRE"],
+        "CLIENTE": ["NOMBRE"],
+        "PROVEEDOR": ["NOMBRE"]
+    }
+    NGRAM_SIZE = 3
+    REFRESH_SECONDS = 600  # Reconstrucción del índice (altas y bajas se cubren antes; ver text_search_index)
+    MAX_IN_LIST = 1500  # Máximo de elementos en IN (...) admitido por Firebird
+
+
+class DocumentTypes:
+    """Tipos de documento de DOCCAB (columna TIPO), por nombre en plural sin tildes"""
+    TIPO_BY_NAME = {
+        "presupuestos": 0,
+        "ordenes de trabajo": 2,
+        "abonos": 3,
+        "contratos": 10,
+        "albaranes": 11,
+        "pedidos": 12,
+        "facturas": 13,
+        "certificaciones": 51,
+        "recibos": 61
+    }
+
+
+class IntentMatcherConfig:
+    """Atajo de plantillas SQL para intenciones frecuentes (sin llamar al LLM)"""
+    ENABLED = True
+    MIN_CONFIDENCE = 0.75  # Fracción de palabras significativas explicadas por la plantilla
+    DEFAULT_TOP_N = 10
+    MAX_TOP_N = 100
+
+
 class SQLDangerousCommands:
     """Comandos SQL peligrosos (no permitidos)"""
     COMMANDS = ["DROP", "TRUNCATE", "ALTER", "CREATE", "EXECUTE"]
@@ -318,6 +613,7 @@ class FilePaths:
     DRIVERS = "backend/drivers"
     FRONTEND = "frontend"
     ASSETS = "frontend/assets"
+    DATA = "backend/data"  # Datos generados en tiempo de ejecución (cachés, memorias)
 
 
 class FileLimits:
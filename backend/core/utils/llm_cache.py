@@ -0,0 +1,243 @@
+"""
+Caché persistente de respuestas de IA
+
+Los mismos prompts se repiten: volver a analizar una tabla, el mismo adjunto,
+el mismo correo en cada actualización. Las respuestas se guardan en un
+SQLite local con una clave de contenido: modelo (proveedor, URL y model_id),
+hash del prompt de sistema, hash del prompt y parámetros de la llamada
+(temperatura, esquema JSON...).
+
+- Cada caso de uso tiene su TTL (LLMCacheConfig.TTL_SECONDS); los que no
+  aparecen ahí no se cachean (respuestas no deterministas o que deben ir
+  siempre al modelo, como el chat o las sondas del circuit breaker).
+- Tamaño acotado: al superar MAX_SIZE_MB se desalojan las entradas usadas
+  hace más tiempo (LRU).
+- Se aplica en la capa de providers: ProviderRegistry.get(..., use_case=...)
+  devuelve el provider envuelto en un CachedProvider. El gateway
+  (ModelFallbackOrchestrator) consulta antes la caché de los modelos
+  candidatos: un acierto no ocupa cuota, circuito ni hueco del planificador
+  ni cuenta en las estadísticas de latencia y uso de los modelos.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from backend.core.abstract.ai import AIConfig, AIProvider, CallMetadata, StreamEvent
+from backend.core.utils.constants import LLMCacheConfig, LogPrefixes
+from backend.core.utils.storage import get_data_path
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    use_case TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used_at)"
+
+
+def _sha(text: Optional[str]) -> str:
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def cache_ttl(use_case: Optional[str]) -> Optional[float]:
+    """TTL del caso de uso, o None si no se cachea."""
+    if not LLMCacheConfig.ENABLED or not use_case:
+        return None
+    return LLMCacheConfig.TTL_SECONDS.get(use_case) or None
+
+
+def cache_key(model: str, system_instruction: Optional[str], prompt: str, params: Dict[str, Any]) -> str:
+    """Clave de contenido de una llamada."""
+    parts = [model, _sha(system_instruction), _sha(prompt), json.dumps(params, sort_keys=True, default=str)]
+    return _sha("\x00".join(parts))
+
+
+class LLMResponseCache:
+    """Respuestas de IA en SQLite con TTL por entrada y desalojo LRU por tamaño."""
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: int = LLMCacheConfig.MAX_SIZE_MB * 1024 * 1024):
+        self.db_path = str(db_path or get_data_path(LLMCacheConfig.FILE))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_INDEX)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str, record_miss: bool = True) -> Optional[str]:
+        """Respuesta vigente de la clave (marca la entrada como usada)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                if record_miss:
+                    self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str, use_case: str, model: str, ttl_seconds: float):
+        """Guarda una respuesta y desaloja si se supera el tamaño máximo."""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, use_case, model, response, size, created_at, expires_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, use_case, model, response, size, now, now + ttl_seconds, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Elimina las caducadas y, si sigue sobrando tamaño, las menos usadas recientemente."""
+        self._conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * LLMCacheConfig.EVICT_TO_RATIO
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_used_at"):
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+        logger.info(f"{LogPrefixes.AI_PROVIDER} 🧹 Caché de IA: {len(evicted)} respuestas desalojadas (LRU)")
+
+    def clear(self, use_case: Optional[str] = None) -> int:
+        """Vacía la caché (o solo un caso de uso). Devuelve las entradas eliminadas."""
+        with self._lock:
+            if use_case:
+                cursor = self._conn.execute("DELETE FROM llm_cache WHERE use_case = ?", (use_case,))
+            else:
+                cursor = self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT use_case, COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM llm_cache GROUP BY use_case"
+            ).fetchall()
+            lookups = self.hits + self.misses
+            return {
+                'enabled': LLMCacheConfig.ENABLED,
+                'max_size_mb': self.max_bytes / (1024 * 1024),
+                'size_mb': round(sum(row[2] for row in rows) / (1024 * 1024), 3),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'file': self.db_path,
+                'use_cases': {
+                    row[0]: {'entries': row[1], 'bytes': row[2], 'hits': row[3], 'ttl_seconds': LLMCacheConfig.TTL_SECONDS.get(row[0])}
+                    for row in rows
+                }
+            }
+
+
+class CachedProvider(AIProvider):
+    """Provider con caché de respuestas para un caso de uso (el streaming no se cachea)."""
+
+    def __init__(self, inner: AIProvider, provider_name: str, config: AIConfig, use_case: str, ttl_seconds: float):
+        self.inner = inner
+        self.use_case = use_case
+        self.ttl_seconds = ttl_seconds
+        self.model = f"{provider_name}|{config.base_url or ''}|{config.model}"
+        self.params = {k: v for k, v in config.extra_params.items() if k != 'headers'}
+        self.cache = get_llm_cache()
+
+    def configure(self, config: AIConfig):
+        self.inner.configure(config)
+
+    def _key(self, kind: str, prompt: str, system_instruction: Optional[str], extra: Optional[Dict[str, Any]] = None) -> str:
+        return cache_key(self.model, system_instruction, prompt, {'kind': kind, **self.params, **(extra or {})})
+
+    def cached(self, prompt: str, system_instruction: Optional[str] = None, schema: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """
+        Respuesta guardada para la llamada, sin llamar al modelo.
+
+        La usa el gateway antes de ocupar cuota, circuito y hueco; un fallo aquí
+        no cuenta como miss (lo cuenta la llamada real que le sigue).
+        """
+        if schema:
+            cached = self.cache.get(self._key('json', prompt, system_instruction, {'schema': schema}), record_miss=False)
+            return json.loads(cached) if cached is not None else None
+        return self.cache.get(self._key('text', prompt, system_instruction), record_miss=False)
+
+    @staticmethod
+    def _hit(call: Optional[CallMetadata]):
+        # Sin llamada: no hay cabeceras de cuota ni tokens consumidos
+        if call:
+            call.response_headers = None
+            call.usage_tokens = 0
+
+    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None) -> str:
+        key = self._key('text', prompt, system_instruction)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._hit(call)
+            return cached
+        text = await self.inner.generate_text(prompt, system_instruction, call)
+        if text:
+            self.cache.put(key, text, self.use_case, self.model, self.ttl_seconds)
+        return text
+
+    def stream_text(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        call: Optional[CallMetadata] = None
+    ) -> AsyncIterator[StreamEvent]:
+        return self.inner.stream_text(prompt, system_instruction, on_token, call)
+
+    async def generate_json(
+        self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None
+    ) -> Dict[str, Any]:
+        key = self._key('json', prompt, system_instruction, {'schema': schema})
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._hit(call)
+            return json.loads(cached)
+        result = await self.inner.generate_json(prompt, schema, system_instruction, call)
+        if result:
+            self.cache.put(key, json.dumps(result, ensure_ascii=False), self.use_case, self.model, self.ttl_seconds)
+        return result
+
+
+# Instancia global de la caché de respuestas de IA
+_llm_cache = None
+
+def get_llm_cache() -> LLMResponseCache:
+    """Obtener instancia global de la caché de respuestas de IA"""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
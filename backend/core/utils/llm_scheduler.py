@@ -0,0 +1,138 @@
+"""
+Planificador de llamadas a modelos por prioridad
+
+Todas las llamadas a modelos (chat, triaje de correo, adjuntos, análisis de
+tablas y lotes) comparten cuotas y conexiones. Cada intento contra un modelo
+ocupa un hueco del planificador:
+
+- Como mucho MAX_CONCURRENCY llamadas en curso en el proceso, y cada
+  prioridad tiene su propio cupo (PRIORITY_CONCURRENCY). Los cupos del
+  segundo plano son menores, así que siempre quedan huecos para el chat.
+- Cuando se libera un hueco entra primero la petición en espera de mayor
+  prioridad (FIFO dentro de cada prioridad); una de menor prioridad solo
+  adelanta si las de mayor prioridad tienen su cupo lleno.
+
+El plazo de cada petición lo aplica quien llama (ModelFallbackOrchestrator):
+la espera en cola se cancela con ella.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict
+
+from backend.core.utils.constants import LLMGatewayConfig, LLMPriority
+
+
+class PriorityScheduler:
+    """Huecos de llamada por prioridad con un máximo global."""
+
+    def __init__(
+        self,
+        max_concurrency: int = LLMGatewayConfig.MAX_CONCURRENCY,
+        priority_concurrency: Dict[str, int] = LLMGatewayConfig.PRIORITY_CONCURRENCY
+    ):
+        self.max_concurrency = max_concurrency
+        self.priority_concurrency = dict(priority_concurrency)
+        self._active = {priority: 0 for priority in LLMPriority.ORDER}
+        self._waiters: Dict[str, Deque[asyncio.Future]] = {priority: deque() for priority in LLMPriority.ORDER}
+        self.totals = {
+            priority: {'admitted': 0, 'queued': 0, 'waited_seconds': 0.0, 'max_wait_seconds': 0.0, 'deadline_misses': 0}
+            for priority in LLMPriority.ORDER
+        }
+
+    def _has_room(self, priority: str) -> bool:
+        return (
+            sum(self._active.values()) < self.max_concurrency
+            and self._active[priority] < self.priority_concurrency.get(priority, self.max_concurrency)
+        )
+
+    def _queued_ahead(self, priority: str) -> bool:
+        """Hay peticiones esperando de igual o mayor prioridad."""
+        for level in LLMPriority.ORDER:
+            if any(not waiter.done() for waiter in self._waiters[level]):
+                return True
+            if level == priority:
+                return False
+        return False
+
+    def _take(self, priority: str):
+        self._active[priority] += 1
+        self.totals[priority]['admitted'] += 1
+
+    def _wake(self):
+        """Concede los huecos libres en orden de prioridad."""
+        for priority in LLMPriority.ORDER:
+            waiters = self._waiters[priority]
+            while waiters and self._has_room(priority):
+                waiter = waiters.popleft()
+                if waiter.done():
+                    continue  # Cancelada mientras esperaba
+                self._take(priority)
+                waiter.set_result(None)
+
+    async def acquire(self, priority: str):
+        if priority not in self._active:
+            raise ValueError(f"Prioridad no válida: {priority} (opciones: {', '.join(LLMPriority.ORDER)})")
+        if not LLMGatewayConfig.ENABLED or (not self._queued_ahead(priority) and self._has_room(priority)):
+            self._take(priority)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        self.totals[priority]['queued'] += 1
+        started = time.perf_counter()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)  # Concedido justo al cancelarse: se devuelve
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.totals[priority]['waited_seconds'] += waited
+            self.totals[priority]['max_wait_seconds'] = max(self.totals[priority]['max_wait_seconds'], waited)
+
+    def release(self, priority: str):
+        self._active[priority] -= 1
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = LLMPriority.INTERACTIVE):
+        """Ocupa un hueco de la prioridad durante una llamada al modelo."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def record_deadline_miss(self, priority: str):
+        self.totals[priority]['deadline_misses'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': LLMGatewayConfig.ENABLED,
+            'max_concurrency': self.max_concurrency,
+            'active': sum(self._active.values()),
+            'priorities': {
+                priority: {
+                    'limit': self.priority_concurrency.get(priority),
+                    'deadline_seconds': LLMGatewayConfig.DEADLINE_SECONDS.get(priority),
+                    'active': self._active[priority],
+                    'waiting': sum(1 for waiter in self._waiters[priority] if not waiter.done()),
+                    **{k: (round(v, 3) if isinstance(v, float) else v) for k, v in self.totals[priority].items()}
+                }
+                for priority in LLMPriority.ORDER
+            }
+        }
+
+
+# Instancia global del planificador de llamadas a modelos
+_llm_scheduler = None
+
+def get_llm_scheduler() -> PriorityScheduler:
+    """Obtener instancia global del planificador de llamadas a modelos"""
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        _llm_scheduler = PriorityScheduler()
+    return _llm_scheduler
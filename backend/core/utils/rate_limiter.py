@@ -0,0 +1,295 @@
+"""
+Limitador de tasa por proveedor y clave de API
+
+Groq, OpenRouter y Gemini imponen cuotas de peticiones (RPM) y de tokens
+(TPM) por clave. Cada clave tiene dos token buckets, configurados en
+ai_providers_config.json ("rate_limits": {"rpm": ..., "tpm": ...}), y un
+bloqueo temporal que fijan las respuestas del proveedor:
+
+- Retry-After de un 429 (o el retraso que indique el mensaje de error).
+- Cabeceras x-ratelimit-remaining-* / x-ratelimit-reset-* de las respuestas
+  correctas: con la cuota agotada se bloquea hasta el reinicio.
+
+Antes de llamar se reserva una petición y los tokens estimados; si la espera
+es corta la llamada se encola (duerme lo justo), si supera MAX_WAIT_SECONDS
+se desvía al siguiente modelo sin llegar a ser rechazada. El registro es
+global del proceso: lo comparten el chat y el análisis de correos.
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+from backend.core.utils.constants import RateLimitConfig
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_ERROR_RETRY_PATTERNS = [
+    re.compile(r'retry (?:in|after) (\d+(?:\.\d+)?)\s*s', re.IGNORECASE),
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)', re.IGNORECASE)
+]
+
+
+def estimate_tokens(*texts: Optional[str]) -> int:
+    """Tokens aproximados de los textos (caracteres / CHARS_PER_TOKEN)."""
+    return sum(len(text or '') for text in texts) // RateLimitConfig.CHARS_PER_TOKEN
+
+
+def parse_reset(value: Any) -> Optional[float]:
+    """
+    Segundos hasta el reinicio a partir de una cabecera de límite.
+
+    Acepta segundos ("7.66"), duraciones ("2m59.56s", "120ms"), instantes
+    epoch en segundos o milisegundos (OpenRouter) y fechas HTTP (Retry-After).
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        number = float(text)
+        if number > 1e12:
+            return max(0.0, number / 1000 - time.time())
+        if number > 1e9:
+            return max(0.0, number - time.time())
+        return max(0.0, number)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if parts:
+        factors = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+        return sum(float(amount) * factors[unit] for amount, unit in parts)
+    try:
+        return max(0.0, parsedate_to_datetime(text).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_from_error(error: Any) -> Optional[float]:
+    """Retraso indicado por el proveedor en un error 429 (cabeceras o mensaje)."""
+    response = getattr(error, 'response', None)
+    headers = {k.lower(): v for k, v in dict(getattr(response, 'headers', None) or {}).items()}
+    if 'retry-after-ms' in headers:
+        seconds = parse_reset(headers['retry-after-ms'])
+        if seconds is not None:
+            return seconds / 1000
+    for name in ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens', 'x-ratelimit-reset'):
+        seconds = parse_reset(headers.get(name))
+        if seconds is not None:
+            return seconds
+    for pattern in _ERROR_RETRY_PATTERNS:
+        match = pattern.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class TokenBucket:
+    """Cubo de capacidad `capacity` que se rellena a `rate` unidades por segundo."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        """Segundos hasta poder consumir `amount` (acotado a la capacidad)."""
+        self._refill(now)
+        deficit = min(amount, self.capacity) - self.level
+        return max(0.0, deficit / self.rate)
+
+    def consume(self, amount: float, now: float):
+        """Consume `amount` (negativo devuelve); el nivel puede quedar negativo (reservas encoladas)."""
+        self._refill(now)
+        self.level = min(self.capacity, self.level - min(amount, self.capacity))
+
+    def cap(self, remaining: float, now: float):
+        """Ajusta el nivel a lo que el proveedor dice que queda."""
+        self._refill(now)
+        self.level = min(self.level, remaining)
+
+
+class ProviderRateLimiter:
+    """Límites de una clave de API de un proveedor."""
+
+    def __init__(self, key: str, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.key = key
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0  # time.monotonic()
+        self.totals = {'calls': 0, 'queued': 0, 'rerouted': 0, 'rate_limited': 0, 'waited_seconds': 0.0}
+        self.configure(rpm, tpm)
+
+    def configure(self, rpm: Optional[float], tpm: Optional[float]):
+        with self._lock:
+            self.limits = (rpm, tpm)
+            self._requests = TokenBucket(rpm, rpm / 60) if rpm else None
+            self._tokens = TokenBucket(tpm, tpm / 60) if tpm else None
+
+    def _wait(self, tokens: int, now: float) -> float:
+        wait = max(0.0, self._blocked_until - now)
+        if self._requests:
+            wait = max(wait, self._requests.time_until(1, now))
+        if self._tokens and tokens:
+            wait = max(wait, self._tokens.time_until(tokens, now))
+        return wait
+
+    def wait_time(self, tokens: int = 0) -> float:
+        """Segundos de espera si se llamase ahora (sin reservar)."""
+        if not RateLimitConfig.ENABLED:
+            return 0.0
+        with self._lock:
+            return self._wait(tokens, time.monotonic())
+
+    def reserve(self, tokens: int) -> Optional[float]:
+        """
+        Reserva una petición y `tokens` tokens.
+
+        Returns:
+            Segundos que hay que esperar antes de llamar, o None si la espera
+            supera MAX_WAIT_SECONDS (no se reserva nada: conviene desviar)
+        """
+        if not RateLimitConfig.ENABLED:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            wait = self._wait(tokens, now)
+            if wait > RateLimitConfig.MAX_WAIT_SECONDS:
+                self.totals['rerouted'] += 1
+                return None
+            if self._requests:
+                self._requests.consume(1, now)
+            if self._tokens:
+                self._tokens.consume(tokens, now)
+            self.totals['calls'] += 1
+            if wait > 0:
+                self.totals['queued'] += 1
+                self.totals['waited_seconds'] += wait
+            return wait
+
+    async def acquire(self, tokens: int) -> bool:
+        """Reserva y espera el turno; False si la petición debe ir a otro modelo."""
+        wait = self.reserve(tokens)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def _block(self, seconds: float):
+        seconds = min(seconds, RateLimitConfig.MAX_RETRY_AFTER_SECONDS)
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def observe_response(self, headers: Optional[Mapping[str, str]], estimated_tokens: int = 0, used_tokens: Optional[int] = None):
+        """
+        Ajusta los cubos con lo que informa una respuesta correcta.
+
+        Args:
+            headers: Cabeceras HTTP de la respuesta (None si el SDK no las da)
+            estimated_tokens: Tokens reservados para la llamada
+            used_tokens: Tokens realmente consumidos, si el proveedor los informa
+        """
+        now = time.monotonic()
+        headers = {k.lower(): v for k, v in dict(headers or {}).items()}
+        with self._lock:
+            if self._tokens and used_tokens is not None:
+                # Devolver (o cobrar) la diferencia con la estimación
+                self._tokens.consume(used_tokens - estimated_tokens, now)
+            for kind, bucket in (('requests', self._requests), ('tokens', self._tokens)):
+                remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+                if remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                if bucket:
+                    bucket.cap(remaining, now)
+                if remaining <= 0:
+                    self._block(parse_reset(headers.get(f'x-ratelimit-reset-{kind}')) or RateLimitConfig.DEFAULT_RETRY_AFTER_SECONDS)
+            # OpenRouter: x-ratelimit-remaining / x-ratelimit-reset (epoch ms)
+            remaining = headers.get('x-ratelimit-remaining')
+            if remaining is not None and remaining.strip() in ('0', '0.0'):
+                self._block(parse_reset(headers.get('x-ratelimit-reset')) or RateLimitConfig.DEFAULT_RETRY_AFTER_SECONDS)
+
+    def record_rate_limited(self, error: Any) -> float:
+        """
+        Registra un 429 y bloquea la clave el tiempo indicado por el proveedor.
+
+        Returns:
+            Segundos de bloqueo aplicados
+        """
+        seconds = retry_after_from_error(error)
+        if seconds is None:
+            seconds = RateLimitConfig.DEFAULT_RETRY_AFTER_SECONDS
+        with self._lock:
+            self.totals['rate_limited'] += 1
+            self._block(seconds)
+        return min(seconds, RateLimitConfig.MAX_RETRY_AFTER_SECONDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'key': self.key,
+                'rpm': self.limits[0],
+                'tpm': self.limits[1],
+                'requests_available': round(self._requests.level, 2) if self._requests else None,
+                'tokens_available': round(self._tokens.level) if self._tokens else None,
+                'blocked_for_seconds': round(max(0.0, self._blocked_until - now), 1),
+                'wait_seconds': round(self._wait(0, now), 2),
+                'totals': {k: (round(v, 2) if isinstance(v, float) else v) for k, v in self.totals.items()}
+            }
+
+
+class RateLimiterRegistry:
+    """Limitadores por proveedor y clave de API, creados bajo demanda."""
+
+    def __init__(self):
+        self._limiters: Dict[str, ProviderRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_config: Dict[str, Any]) -> str:
+        """Proveedor y huella de la clave (la clave nunca se expone)."""
+        api_key = model_config.get('api_key') or ''
+        fingerprint = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:8] if api_key else 'sin-clave'
+        return f"{model_config.get('provider', 'unknown')}:{fingerprint}"
+
+    def get(self, model_config: Dict[str, Any]) -> ProviderRateLimiter:
+        """Limitador de la clave del modelo (con los límites de su proveedor)."""
+        limits = model_config.get('rate_limits') or {}
+        rpm, tpm = limits.get('rpm'), limits.get('tpm')
+        key = self.key(model_config)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = ProviderRateLimiter(key, rpm, tpm)
+        if limiter.limits != (rpm, tpm):
+            limiter.configure(rpm, tpm)  # Límites cambiados al recargar la configuración
+        return limiter
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {
+            'enabled': RateLimitConfig.ENABLED,
+            'limiters': sorted((l.to_dict() for l in limiters), key=lambda l: l['key'])
+        }
+
+
+# Instancia global de limitadores de tasa
+_rate_limiters = None
+
+def get_rate_limiters() -> RateLimiterRegistry:
+    """Obtener instancia global de limitadores de tasa"""
+    global _rate_limiters
+    if _rate_limiters is None:
+        _rate_limiters = RateLimiterRegistry()
+    return _rate_limiters
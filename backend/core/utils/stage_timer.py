@@ -0,0 +1,108 @@
+"""
+Medición de latencia por etapas
+Cronómetros monotónicos por etapa de una petición e histogramas agregados
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from backend.core.utils.constants import LatencyConfig
+
+
+class LatencyHistograms:
+    """Histogramas de latencia por etapa (buckets fijos en milisegundos)."""
+
+    def __init__(self, buckets_ms: List[float] = None):
+        self.buckets_ms = buckets_ms or LatencyConfig.HISTOGRAM_BUCKETS_MS
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, duration_ms: float):
+        """Registra una duración para una etapa."""
+        with self._lock:
+            data = self._stages.get(stage)
+            if data is None:
+                data = {'count': 0, 'sum_ms': 0.0, 'max_ms': 0.0, 'buckets': [0] * (len(self.buckets_ms) + 1)}
+                self._stages[stage] = data
+            data['count'] += 1
+            data['sum_ms'] += duration_ms
+            data['max_ms'] = max(data['max_ms'], duration_ms)
+            data['buckets'][bisect.bisect_left(self.buckets_ms, duration_ms)] += 1
+
+    def _percentile(self, buckets: List[int], count: int, fraction: float) -> float:
+        """Percentil aproximado: límite superior del bucket que lo contiene."""
+        target = fraction * count
+        cumulative = 0
+        for index, bucket_count in enumerate(buckets):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return self.buckets_ms[index] if index < len(self.buckets_ms) else float('inf')
+        return float('inf')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resumen por etapa: recuento, media, máximo, p50/p90/p99 y buckets."""
+        with self._lock:
+            stats = {}
+            for stage, data in self._stages.items():
+                labels = [f"<={b:g}" for b in self.buckets_ms] + [f">{self.buckets_ms[-1]:g}"]
+                stats[stage] = {
+                    'count': data['count'],
+                    'avg_ms': round(data['sum_ms'] / data['count'], 1),
+                    'max_ms': round(data['max_ms'], 1),
+                    'p50_ms': self._percentile(data['buckets'], data['count'], 0.5),
+                    'p90_ms': self._percentile(data['buckets'], data['count'], 0.9),
+                    'p99_ms': self._percentile(data['buckets'], data['count'], 0.99),
+                    'buckets': dict(zip(labels, data['buckets']))
+                }
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+# Histogramas globales del proceso
+latency_histograms = LatencyHistograms()
+
+
+class StageTimer:
+    """Cronómetro de etapas de una petición (time.perf_counter, monotónico)."""
+
+    def __init__(self, histograms: LatencyHistograms = None):
+        self.histograms = histograms or latency_histograms
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mide el bloque y lo acumula en la etapa indicada."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float):
+        """Acumula una duración (segundos) en una etapa."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Desglose en milisegundos."""
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 1),
+            'stages': {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()},
+            'counts': dict(self.counts)
+        }
+
+    def finish(self) -> Dict[str, Any]:
+        """Cierra la medición, la agrega a los histogramas y devuelve el desglose."""
+        timings = self.to_dict()
+        for name, duration_ms in timings['stages'].items():
+            self.histograms.observe(name, duration_ms)
+        self.histograms.observe('total', timings['total_ms'])
+        return timings
@@ -0,0 +1,26 @@
+"""
+Utilidades de almacenamiento local
+Centraliza la ubicación de los ficheros de datos generados en tiempo de ejecución
+"""
+
+from pathlib import Path
+
+from backend.core.utils.constants import FilePaths
+
+# Raíz del proyecto (backend/core/utils/storage.py -> raíz)
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+
+def get_data_path(filename: str) -> Path:
+    """
+    Obtiene la ruta absoluta de un fichero de datos, creando el directorio si no existe
+
+    Args:
+        filename: Nombre del fichero dentro del directorio de datos
+
+    Returns:
+        Ruta absoluta del fichero
+    """
+    data_dir = PROJECT_ROOT / FilePaths.DATA
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir / filename
@@ -0,0 +1,341 @@
+"""
+Respuestas JSON de los modelos: reparación y validación locales
+
+Un JSON mal formado (vallas markdown, texto alrededor, comas finales,
+respuesta cortada por max_tokens) o con tipos ligeramente distintos a los
+pedidos ("true" en vez de true, "alta" en vez de "Alta") no debe costar otra
+llamada a otro modelo. parse_structured() lo resuelve en local:
+
+1. Extrae el JSON del texto (sin vallas ni texto alrededor).
+2. Si no es válido, lo repara: comas finales, saltos de línea sin escapar
+   dentro de cadenas y cierre de una respuesta truncada (se descarta el
+   último elemento si no terminó: una cadena o un número cortados podrían
+   haber sido más largos).
+3. Lo valida contra el esquema pedido (type, properties, required, enum,
+   items) ajustando los tipos convertibles. Solo si sigue sin cumplirlo se
+   lanza StructuredOutputError y el orquestador pasa al siguiente modelo.
+
+Además se recuerda qué modos de salida estructurada nativa rechaza cada
+modelo (StructuredOutputConfig.NATIVE_MODES) para no volver a pedirlos.
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.utils.constants import StructuredOutputConfig, LogPrefixes, LogEmojis
+
+logger = logging.getLogger(__name__)
+
+_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)(?:```|$)", re.DOTALL)
+_CLOSERS = {'{': '}', '[': ']'}
+_STRING_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t'}
+_SCHEMA_KEYWORDS = ("type", "properties", "items", "enum", "anyOf", "oneOf")
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+_INVALID = object()
+_LAST_TOKEN = re.compile(r"[\s,:\[{]")
+_COMPLETE_LITERALS = ("true", "false", "null")
+
+
+class StructuredOutputError(ValueError):
+    """La respuesta no es JSON o no cumple el esquema, ni siquiera reparada."""
+
+
+def normalize_schema(schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Esquema JSON Schema equivalente.
+
+    Acepta también la forma abreviada {"campo": "string", ...} que usan
+    algunos módulos.
+    """
+    if not isinstance(schema, dict):
+        return {}
+    if any(keyword in schema for keyword in _SCHEMA_KEYWORDS):
+        return schema
+    properties = {}
+    for name, spec in schema.items():
+        if isinstance(spec, str):
+            properties[name] = {"type": spec} if spec in _TYPES else {}
+        elif isinstance(spec, dict):
+            properties[name] = normalize_schema(spec)
+        elif isinstance(spec, list):
+            properties[name] = {"type": "array"}
+        else:
+            properties[name] = {}
+    return {"type": "object", "properties": properties}
+
+
+def extract_json(text: Optional[str]) -> str:
+    """JSON del texto: sin vallas markdown ni texto antes del primer { o [."""
+    text = (text or '').strip()
+    fence = _FENCE.search(text)
+    if fence:
+        text = fence.group(1).strip()
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    return text[min(starts):] if starts else text
+
+
+def _drop_trailing_comma(out: List[str]):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ',':
+        out.pop()
+
+
+def _close(out: List[str], stack: List[str]) -> str:
+    closed = list(out)
+    _drop_trailing_comma(closed)
+    return "".join(closed) + "".join(reversed(stack))
+
+
+def _ends_with_complete_value(out: List[str]) -> bool:
+    """El texto acaba en una cadena cerrada, un objeto o lista cerrados, o true/false/null."""
+    text = "".join(out).rstrip()
+    if text.endswith(('"', '}', ']')):
+        return True
+    return _LAST_TOKEN.split(text)[-1] in _COMPLETE_LITERALS
+
+
+def repair_json(text: str) -> str:
+    """
+    Repara la sintaxis de un JSON generado por un modelo.
+
+    Quita comas finales, escapa saltos de línea dentro de cadenas, ignora el
+    texto tras el JSON y cierra los objetos y listas de una respuesta
+    truncada, descartando el último elemento si quedó incompleto.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []  # (longitud de out, pila) en cada punto de corte seguro
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            out.append(_STRING_ESCAPES.get(ch, ch))
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            out.append(ch)
+            cuts.append((len(out), list(stack)))
+            continue
+        elif ch in '}]':
+            if not stack or stack[-1] != ch:
+                continue  # Cierre sobrante
+            _drop_trailing_comma(out)
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return "".join(out)  # Completo: se ignora lo que siga
+            continue
+        elif ch == ',':
+            cuts.append((len(out), list(stack)))
+        out.append(ch)
+
+    # Truncado: el último valor solo se conserva si terminó completo (una cadena o
+    # un número cortados podrían ser más largos); si no, se retrocede al último corte seguro
+    candidates = [_close(out, stack)] if not in_string and _ends_with_complete_value(out) else []
+    candidates += [_close(out[:length], cut_stack) for length, cut_stack in reversed(cuts)]
+    for candidate in candidates[:StructuredOutputConfig.MAX_TRUNCATION_CUTS]:
+        try:
+            json.loads(candidate)
+            return candidate
+        except ValueError:
+            continue
+    return "".join(out)
+
+
+def _convert(value: Any, expected: str) -> Any:
+    """Valor convertido al tipo esperado, o _INVALID si no es convertible."""
+    if expected == "string" and isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if expected in ("number", "integer") and isinstance(value, str):
+        try:
+            number = float(value.strip())
+        except ValueError:
+            return _INVALID
+        if expected == "number":
+            return number
+        return int(number) if number.is_integer() else _INVALID
+    if expected == "integer" and isinstance(value, float) and value.is_integer():
+        return int(value)
+    if expected == "boolean" and isinstance(value, str):
+        word = value.strip().lower()
+        if word in StructuredOutputConfig.TRUE_WORDS:
+            return True
+        if word in StructuredOutputConfig.FALSE_WORDS:
+            return False
+    if expected == "array" and value is not None and not isinstance(value, list):
+        return [value]
+    return _INVALID
+
+
+def _is_type(value: Any, expected: str) -> bool:
+    if isinstance(value, bool) and expected in ("integer", "number"):
+        return False
+    return isinstance(value, _TYPES.get(expected, object))
+
+
+def _conform(value: Any, schema: Dict[str, Any], path: str, errors: List[str], fixes: List[str]) -> Any:
+    """Valor ajustado al esquema; anota en errors lo que no se puede ajustar."""
+    expected = schema.get("type")
+    types = expected if isinstance(expected, list) else [expected] if expected else []
+    if types and not any(_is_type(value, t) for t in types):
+        for t in types:
+            converted = _convert(value, t)
+            if converted is not _INVALID:
+                fixes.append(f"{path}: {type(value).__name__} → {t}")
+                value = converted
+                break
+        else:
+            errors.append(f"{path}: se esperaba {'|'.join(types)} y llega {type(value).__name__}")
+            return value
+
+    options = schema.get("enum")
+    if options and value not in options:
+        match = next(
+            (o for o in options if isinstance(o, str) and isinstance(value, str) and o.casefold() == value.strip().casefold()),
+            _INVALID
+        )
+        if match is _INVALID:
+            errors.append(f"{path}: {value!r} no está entre {options}")
+        else:
+            fixes.append(f"{path}: {value!r} → {match!r}")
+            value = match
+
+    if isinstance(value, dict):
+        properties = schema.get("properties") or {}
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}.{name}: obligatorio")
+        value = {
+            name: _conform(item, properties[name], f"{path}.{name}", errors, fixes) if name in properties else item
+            for name, item in value.items()
+        }
+    elif isinstance(value, list) and isinstance(schema.get("items"), dict):
+        value = [_conform(item, schema["items"], f"{path}[{i}]", errors, fixes) for i, item in enumerate(value)]
+    return value
+
+
+def conform(value: Any, schema: Optional[Dict[str, Any]]) -> Tuple[Any, List[str], List[str]]:
+    """
+    Valida un valor contra un esquema JSON, ajustando los tipos convertibles.
+
+    Returns:
+        (valor ajustado, errores que no se pudieron ajustar, ajustes hechos)
+    """
+    errors: List[str] = []
+    fixes: List[str] = []
+    value = _conform(value, normalize_schema(schema), "$", errors, fixes)
+    return value, errors, fixes
+
+
+def parse_structured(text: Optional[str], schema: Optional[Dict[str, Any]] = None, model: str = "") -> Any:
+    """
+    JSON de la respuesta de un modelo, reparado y validado en local.
+
+    Args:
+        text: Respuesta del modelo
+        schema: Esquema pedido (None: solo se parsea y repara)
+        model: Modelo que respondió (para registro y estadísticas)
+
+    Raises:
+        StructuredOutputError: Si no hay JSON recuperable o no cumple el esquema
+    """
+    tracker = get_structured_output()
+    candidate = extract_json(text)
+    repaired = False
+    try:
+        value, _ = json.JSONDecoder().raw_decode(candidate)
+    except ValueError as e:
+        if not StructuredOutputConfig.REPAIR:
+            tracker.record(model, 'invalid')
+            raise StructuredOutputError(f"JSON no válido: {e}") from e
+        try:
+            value = json.loads(repair_json(candidate))
+        except ValueError as repair_error:
+            tracker.record(model, 'invalid')
+            raise StructuredOutputError(f"JSON no válido ni reparable: {e}") from repair_error
+        repaired = True
+
+    fixes: List[str] = []
+    if schema and StructuredOutputConfig.VALIDATE:
+        value, errors, fixes = conform(value, schema)
+        if errors:
+            tracker.record(model, 'invalid')
+            raise StructuredOutputError(f"La respuesta no cumple el esquema: {'; '.join(errors)}")
+
+    if repaired or fixes:
+        logger.info(
+            f"{LogPrefixes.AI_PROVIDER} 🔧 JSON de {model or 'modelo'} corregido en local"
+            f"{' (sintaxis reparada)' if repaired else ''}{': ' + ', '.join(fixes) if fixes else ''}"
+        )
+    tracker.record(model, 'repaired' if repaired else 'coerced' if fixes else 'valid')
+    return value
+
+
+class StructuredOutputTracker:
+    """Resultados de las respuestas JSON y modos nativos rechazados, por modelo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+        self._rejected: Dict[str, List[str]] = {}
+
+    def record(self, model: str, outcome: str):
+        with self._lock:
+            counts = self._outcomes.setdefault(model or '', {'valid': 0, 'repaired': 0, 'coerced': 0, 'invalid': 0})
+            counts[outcome] += 1
+
+    def native_modes(self, model: str, preferred: Optional[str] = None) -> List[str]:
+        """Modos nativos a probar con el modelo, en orden (el último siempre es "none")."""
+        modes = [preferred] if preferred else list(StructuredOutputConfig.NATIVE_MODES)
+        with self._lock:
+            rejected = self._rejected.get(model, [])
+            return [mode for mode in modes if mode not in rejected] or ["none"]
+
+    def reject_mode(self, model: str, mode: str, reason: Any = None):
+        """El modelo no admite el modo: no se le vuelve a pedir en este proceso."""
+        with self._lock:
+            self._rejected.setdefault(model, []).append(mode)
+        logger.info(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} {model} no admite salida estructurada '{mode}': {reason}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'repair': StructuredOutputConfig.REPAIR,
+                'validate': StructuredOutputConfig.VALIDATE,
+                'native_modes': list(StructuredOutputConfig.NATIVE_MODES),
+                'models': {
+                    model: {**counts, 'rejected_native_modes': self._rejected.get(model, [])}
+                    for model, counts in self._outcomes.items()
+                },
+                'rejected_native_modes': {model: list(modes) for model, modes in self._rejected.items()}
+            }
+
+
+# Instancia global del registro de salida estructurada
+_structured_output = None
+
+def get_structured_output() -> StructuredOutputTracker:
+    """Obtener instancia global del registro de salida estructurada"""
+    global _structured_output
+    if _structured_output is None:
+        _structured_output = StructuredOutputTracker()
+    return _structured_output
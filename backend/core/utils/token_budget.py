@@ -0,0 +1,269 @@
+"""
+Presupuesto de tokens de los prompts
+
+Los prompts sobredimensionados (esquema, historial y cien filas de
+resultados) fallan en el proveedor y consumen intentos de fallback. Antes de
+enviar se estima su tamaño en tokens según la familia del modelo (tiktoken
+para GPT si está instalado; si no, caracteres por token de la familia,
+recalibrados con el uso real que informa el proveedor) y se recortan sus
+componentes en orden de prioridad (TokenBudgetConfig.TRIM_ORDER) hasta caber
+en el presupuesto:
+
+    min(AILimits.MAX_PROMPT_TOKENS, ventana de contexto - max_tokens - margen)
+
+El max_tokens de cada modelo (parameters.max_tokens, acotado por
+AILimits.MAX_RESPONSE_TOKENS) se pasa al proveedor.
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from backend.core.utils.constants import AILimits, TokenBudgetConfig, LogPrefixes
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+_FAMILY_MARKERS = (
+    ("gpt", ("gpt", "openai/", "o1", "o3")),
+    ("gemini", ("gemini",)),
+    ("llama", ("llama",)),
+    ("mistral", ("mistral", "mixtral")),
+    ("qwen", ("qwen",)),
+    ("deepseek", ("deepseek",)),
+)
+_HISTORY_OMITTED = "[... historial anterior omitido]\n"
+_SCHEMA_TRIMMED = "\n[... esquema recortado por límite de contexto]"
+
+_encoder = None
+
+
+def _tiktoken_encoder():
+    global _encoder
+    if _encoder is None and tiktoken is not None:
+        _encoder = tiktoken.get_encoding("o200k_base")
+    return _encoder
+
+
+def model_family(model_config: Optional[Dict[str, Any]]) -> str:
+    """Familia del modelo ("gpt", "llama", ...) o "" si no se reconoce."""
+    if (model_config or {}).get('provider') == "mock":
+        return "mock"  # Calibración propia: no altera la de familias desconocidas
+    model_id = ((model_config or {}).get('model_id') or '').lower()
+    for family, markers in _FAMILY_MARKERS:
+        if any(marker in model_id for marker in markers):
+            return family
+    return ""
+
+
+def chars_per_token(family: str) -> float:
+    calibrated = get_token_usage().calibrated_ratio(family)
+    return calibrated or TokenBudgetConfig.CHARS_PER_TOKEN.get(family, TokenBudgetConfig.DEFAULT_CHARS_PER_TOKEN)
+
+
+def count_tokens(*texts: Optional[str], family: str = "") -> int:
+    """Tokens estimados de los textos para una familia de modelo."""
+    if family == "gpt" and _tiktoken_encoder() is not None:
+        return sum(len(_encoder.encode(text or '')) for text in texts)
+    return int(sum(len(text or '') for text in texts) / chars_per_token(family)) + 1
+
+
+def context_window(model_config: Dict[str, Any]) -> int:
+    return model_config.get('context_window') or TokenBudgetConfig.CONTEXT_WINDOW.get(
+        model_family(model_config), TokenBudgetConfig.DEFAULT_CONTEXT_WINDOW
+    )
+
+
+def response_tokens(model_config: Dict[str, Any]) -> int:
+    """max_tokens del modelo, acotado por AILimits.MAX_RESPONSE_TOKENS."""
+    configured = (model_config.get('parameters') or {}).get('max_tokens') or AILimits.MAX_RESPONSE_TOKENS
+    return min(configured, AILimits.MAX_RESPONSE_TOKENS)
+
+
+def prompt_limit(model_config: Dict[str, Any]) -> int:
+    """Tokens de prompt que caben en la ventana de contexto del modelo (límite duro)."""
+    usable = context_window(model_config) * (1 - TokenBudgetConfig.SAFETY_MARGIN)
+    return int(usable - response_tokens(model_config))
+
+
+def prompt_budget(model_config: Dict[str, Any]) -> int:
+    """Presupuesto de prompt del modelo: ventana de contexto y presupuesto configurado."""
+    return min(prompt_limit(model_config), AILimits.MAX_PROMPT_TOKENS)
+
+
+class PromptBudget:
+    """Presupuesto común a los modelos candidatos (el del más restrictivo)."""
+
+    def __init__(self, models: List[Dict[str, Any]]):
+        self.tokens = min((prompt_budget(m) for m in models), default=AILimits.MAX_PROMPT_TOKENS)
+        families = {model_family(m) for m in models} or {""}
+        # La familia con menos caracteres por token da la estimación más alta
+        self.family = min(families, key=chars_per_token)
+        self.trimmed: Dict[str, int] = {}
+
+    def count(self, *texts: Optional[str]) -> int:
+        return count_tokens(*texts, family=self.family)
+
+    def _size(self, value: Any) -> int:
+        return self.count(value if isinstance(value, str) else str(value))
+
+    def fit(self, components: Dict[str, Any], prompt_tokens: int) -> Dict[str, Any]:
+        """
+        Recorta componentes hasta que el prompt quepa en el presupuesto.
+
+        Args:
+            components: Partes recortables por nombre ("history", "examples",
+                "schema": texto; "rows": lista de filas)
+            prompt_tokens: Tokens del prompt completo, componentes incluidos
+
+        Returns:
+            Componentes (recortados si hacía falta); los tokens eliminados por
+            componente quedan en self.trimmed
+        """
+        fitted = dict(components)
+        excess = prompt_tokens - self.tokens
+        if not TokenBudgetConfig.ENABLED or excess <= 0:
+            return fitted
+        for name in TokenBudgetConfig.TRIM_ORDER:
+            if excess <= 0:
+                break
+            value = fitted.get(name)
+            if not value:
+                continue
+            before = self._size(value)
+            if name == "history":
+                fitted[name] = self._trim_head(value, excess)
+            elif name == "schema":
+                fitted[name] = self._trim_tail(value, excess)
+            elif name == "rows":
+                fitted[name] = self._trim_rows(value, excess)
+            else:
+                fitted[name] = ""
+            removed = before - self._size(fitted[name]) if fitted[name] else before
+            if removed > 0:
+                self.trimmed[name] = removed
+                excess -= removed
+        if self.trimmed:
+            get_token_usage().record_trim(self.trimmed)
+            logger.info(
+                f"{LogPrefixes.AI_PROVIDER} ✂️ Prompt recortado al presupuesto de {self.tokens} tokens: "
+                f"{', '.join(f'{name} -{tokens}' for name, tokens in self.trimmed.items())}"
+            )
+        return fitted
+
+    def _trim_head(self, text: str, excess: int) -> str:
+        """Quita líneas del principio (lo más antiguo del historial)."""
+        lines = text.splitlines(keepends=True)
+        target = self._size(text) - excess
+        while lines and self.count(_HISTORY_OMITTED, *lines) > target:
+            lines.pop(0)
+        return _HISTORY_OMITTED + "".join(lines) if lines else ""
+
+    def _trim_tail(self, text: str, excess: int) -> str:
+        """Quita líneas del final (las últimas tablas del esquema)."""
+        lines = text.splitlines(keepends=True)
+        target = self._size(text) - excess
+        while lines and self.count(*lines, _SCHEMA_TRIMMED) > target:
+            lines.pop()
+        return "".join(lines) + _SCHEMA_TRIMMED if lines else ""
+
+    def _trim_rows(self, rows: List[Any], excess: int) -> List[Any]:
+        """Conserva las primeras filas que quepan (al menos MIN_ROWS)."""
+        target = self._size(rows) - excess
+        kept, used = [], 0
+        for row in rows:
+            used += self.count(f"{row!r}, ")
+            if used > target and len(kept) >= TokenBudgetConfig.MIN_ROWS:
+                break
+            kept.append(row)
+        return kept
+
+
+class TokenUsageTracker:
+    """Tokens estimados frente a los informados por el proveedor, por modelo y familia."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models: Dict[str, Dict[str, Any]] = {}
+        self._ratios: Dict[str, Dict[str, Any]] = {}
+        self.trims: Dict[str, int] = {}
+
+    def record(self, model_config: Dict[str, Any], chars: int, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Registra una llamada correcta.
+
+        Args:
+            model_config: Modelo usado
+            chars: Caracteres enviados y recibidos
+            estimated_tokens: Tokens estimados para esos caracteres
+            actual_tokens: Tokens totales informados por el proveedor (None si no los da)
+        """
+        family = model_family(model_config)
+        with self._lock:
+            entry = self._models.setdefault(model_config.get('id', ''), {
+                'calls': 0, 'reported_calls': 0, 'estimated_tokens': 0, 'actual_tokens': 0
+            })
+            entry['calls'] += 1
+            if not actual_tokens:
+                return
+            entry['reported_calls'] += 1
+            entry['estimated_tokens'] += estimated_tokens
+            entry['actual_tokens'] += actual_tokens
+            ratio = self._ratios.setdefault(family, {'chars_per_token': None, 'samples': 0})
+            observed = chars / actual_tokens
+            alpha = TokenBudgetConfig.CALIBRATION_ALPHA
+            previous = ratio['chars_per_token']
+            ratio['chars_per_token'] = observed if previous is None else alpha * observed + (1 - alpha) * previous
+            ratio['samples'] += 1
+
+    def calibrated_ratio(self, family: str) -> Optional[float]:
+        with self._lock:
+            ratio = self._ratios.get(family)
+            if ratio and ratio['samples'] >= TokenBudgetConfig.CALIBRATION_MIN_SAMPLES:
+                return ratio['chars_per_token']
+        return None
+
+    def record_trim(self, trimmed: Dict[str, int]):
+        with self._lock:
+            for name, tokens in trimmed.items():
+                self.trims[name] = self.trims.get(name, 0) + tokens
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': TokenBudgetConfig.ENABLED,
+                'tokenizer': 'tiktoken' if tiktoken is not None else 'chars_per_token',
+                'max_prompt_tokens': AILimits.MAX_PROMPT_TOKENS,
+                'max_response_tokens': AILimits.MAX_RESPONSE_TOKENS,
+                'trimmed_tokens': dict(self.trims),
+                'families': {
+                    family: {
+                        'chars_per_token': round(ratio['chars_per_token'], 3),
+                        'default_chars_per_token': TokenBudgetConfig.CHARS_PER_TOKEN.get(family, TokenBudgetConfig.DEFAULT_CHARS_PER_TOKEN),
+                        'samples': ratio['samples']
+                    }
+                    for family, ratio in self._ratios.items()
+                },
+                'models': {
+                    model_id: {
+                        **entry,
+                        'estimate_ratio': round(entry['actual_tokens'] / entry['estimated_tokens'], 3) if entry['estimated_tokens'] else None
+                    }
+                    for model_id, entry in self._models.items()
+                }
+            }
+
+
+# Instancia global del registro de uso de tokens
+_token_usage = None
+
+def get_token_usage() -> TokenUsageTracker:
+    """Obtener instancia global del registro de uso de tokens"""
+    global _token_usage
+    if _token_usage is None:
+        _token_usage = TokenUsageTracker()
+    return _token_usage
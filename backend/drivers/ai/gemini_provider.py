@@ -1,21 +1,78 @@
 import google.generativeai as genai
-from typing import Any, Dict, Optional
+import google.ai.generativelanguage as glm
+from google.api_core.exceptions import InvalidArgument
+from typing import Any, AsyncIterator, Callable, Dict, Optional
 import json
-from backend.core.abstract.ai import AIProvider, AIConfig
+from backend.core.abstract.ai import AIProvider, AIConfig, CallMetadata, StreamEvent, StreamMetrics
+from backend.core.utils.constants import AILimits
+from backend.core.utils.structured_output import get_structured_output, normalize_schema, parse_structured
+
+# Schema keys accepted by Gemini's response_schema (OpenAPI subset)
+_GEMINI_SCHEMA_KEYS = ("type", "format", "description", "nullable", "enum", "properties", "required", "items")
+
+
+def _gemini_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """response_schema for Gemini: supported keys only, upper-case types."""
+    result = {key: value for key, value in schema.items() if key in _GEMINI_SCHEMA_KEYS}
+    if isinstance(result.get('type'), list):
+        types = [t for t in result['type'] if t != "null"]
+        result['nullable'] = len(types) < len(result['type'])
+        result['type'] = types[0] if types else "string"
+    if 'type' in result:
+        result['type'] = result['type'].upper()
+    if 'properties' in result:
+        result['properties'] = {name: _gemini_schema(spec) for name, spec in result['properties'].items()}
+    if isinstance(result.get('items'), dict):
+        result['items'] = _gemini_schema(result['items'])
+    return result
 
 class GeminiProvider(AIProvider):
     """Concrete implementation for Google Gemini AI."""
     
     def __init__(self):
-        self.model = None
+        self.model_name = None
+        self.api_key = None
+        self.max_tokens = None
+        self.structured_output = None
+        self.async_client = None
 
     def configure(self, config: AIConfig):
-        genai.configure(api_key=config.api_key)
-        self.model = genai.GenerativeModel(config.model)
+        # Per-instance key: genai.configure() would change it for every model in the process
+        self.api_key = config.api_key
+        self.structured_output = config.extra_params.get('structured_output')
+        self.max_tokens = config.extra_params.get('max_tokens')
+        self.model_name = config.model if config.model.startswith("models/") else f"models/{config.model}"
+        self.async_client = None
+
+    def _client(self) -> glm.GenerativeServiceAsyncClient:
+        """Async client with this model's key (created inside the running event loop)."""
+        if self.async_client is None:
+            self.async_client = glm.GenerativeServiceAsyncClient(client_options={"api_key": self.api_key})
+        return self.async_client
 
-    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None) -> str:
-        if not self.model:
+    def _request(self, prompt: str, **generation_config: Any) -> glm.GenerateContentRequest:
+        """Single-turn request with max_tokens and the given generation options."""
+        if self.max_tokens:
+            generation_config.setdefault("max_output_tokens", self.max_tokens)
+        return glm.GenerateContentRequest(
+            model=self.model_name,
+            contents=[glm.Content(role="user", parts=[glm.Part(text=prompt)])],
+            generation_config=glm.GenerationConfig(**generation_config)
+        )
+
+    async def _generate(self, request: glm.GenerateContentRequest) -> genai.types.AsyncGenerateContentResponse:
+        # Native async call: cancelling the task cancels the RPC
+        response = await self._client().generate_content(request, **self._request_options())
+        return genai.types.AsyncGenerateContentResponse.from_response(response)
+
+    @staticmethod
+    def _request_options() -> Dict[str, Any]:
+        return {"timeout": AILimits.API_TIMEOUT}
+
+    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None) -> str:
+        if not self.model_name:
             raise Exception("Gemini provider not configured")
+        call = call or CallMetadata()
         
         # Note: Gemini python SDK handles system instructions differently depending on version/model,
         # but for simplicity we'll prepend it to the prompt if needed or use the system_instruction arg if supported.
@@ -25,12 +82,56 @@ class GeminiProvider(AIProvider):
         if system_instruction:
             full_prompt = f"System Instruction: {system_instruction}\n\nUser Prompt: {prompt}"
             
-        response = self.model.generate_content(full_prompt)
+        response = await self._generate(self._request(full_prompt))
+        usage = getattr(response, 'usage_metadata', None)
+        if usage:
+            call.usage_tokens = usage.total_token_count
         return response.text
 
-    async def generate_json(self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None) -> Dict[str, Any]:
-        if not self.model:
+    async def stream_text(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        call: Optional[CallMetadata] = None
+    ) -> AsyncIterator[StreamEvent]:
+        if not self.model_name:
             raise Exception("Gemini provider not configured")
+        call = call or CallMetadata()
+        
+        full_prompt = prompt
+        if system_instruction:
+            full_prompt = f"System Instruction: {system_instruction}\n\nUser Prompt: {prompt}"
+        
+        # Stopping the iteration (or cancelling the task) abandons the rest of the stream
+        metrics = StreamMetrics()
+        iterator = await self._client().stream_generate_content(self._request(full_prompt), **self._request_options())
+        response = await genai.types.AsyncGenerateContentResponse.from_aiterator(iterator)
+        usage = None
+        async for chunk in response:
+            metadata = getattr(chunk, 'usage_metadata', None)
+            if metadata and metadata.total_token_count:
+                # Cumulative: the last chunk carries the totals
+                usage = {
+                    'prompt_tokens': metadata.prompt_token_count,
+                    'completion_tokens': metadata.candidates_token_count,
+                    'total_tokens': metadata.total_token_count
+                }
+                call.usage_tokens = metadata.total_token_count
+            try:
+                text = chunk.text
+            except ValueError:
+                continue  # Chunk without text parts (e.g. safety metadata)
+            if text:
+                yield self._token_event(metrics, text, on_token)
+        yield metrics.final_event(usage)
+
+    async def generate_json(
+        self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None
+    ) -> Dict[str, Any]:
+        if not self.model_name:
+            raise Exception("Gemini provider not configured")
+        call = call or CallMetadata()
             
         json_prompt = f"""
         {prompt}
@@ -47,22 +148,26 @@ class GeminiProvider(AIProvider):
             # (Alternatively, we could re-init the model per request if we wanted true system prompt support)
             json_prompt = f"System Instruction: {system_instruction}\n\n{json_prompt}"
             
-        # Try-catch for model versions that might not support generation_config
-        try:
-             generation_config = {"response_mime_type": "application/json"}
-             response = self.model.generate_content(json_prompt, generation_config=generation_config)
-        except:
-             # Fallback to standard text generation
-             response = self.model.generate_content(json_prompt)
-             
-        text = response.text.strip()
+        # Native structured output first (schema, then JSON mime type); a mode the model rejects is remembered
+        tracker = get_structured_output()
+        model_key = f"gemini|{self.model_name}"
+        modes = tracker.native_modes(model_key, self.structured_output)
+        for mode in modes:
+            generation_config = {}
+            if mode == "json_schema":
+                generation_config = {"response_mime_type": "application/json", "response_schema": glm.Schema(_gemini_schema(normalize_schema(schema)))}
+            elif mode == "json_object":
+                generation_config = {"response_mime_type": "application/json"}
+            try:
+                response = await self._generate(self._request(json_prompt, **generation_config))
+                break
+            except (InvalidArgument, ValueError, TypeError) as e:
+                if mode == modes[-1]:
+                    raise
+                tracker.reject_mode(model_key, mode, e)
+        usage = getattr(response, 'usage_metadata', None)
+        if usage:
+            call.usage_tokens = usage.total_token_count
         
-        # Clean up markdown code blocks if present
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
-            
-        return json.loads(text.strip())
+        # Fences, trailing commas, truncation and types are fixed locally (no new round trip)
+        return parse_structured(response.text, schema, self.model_name)
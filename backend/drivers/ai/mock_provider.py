@@ -0,0 +1,262 @@
+"""
+Mock LLM - Proveedor simulado y cassettes de grabación/reproducción
+
+Permite pruebas de carga del chat y del análisis de correos sin gastar cuota
+ni depender de la red:
+
+- MockProvider (model_id "mock"): latencia según una distribución
+  configurable, errores 500 y 429 inyectados y respuestas guionizadas
+  (primer patrón de SCRIPT_FILE que coincide con el prompt).
+- MockProvider (model_id "replay"): devuelve de forma determinista las
+  respuestas grabadas en el cassette; un prompt no grabado es un error.
+- RecordingProvider: envuelve un provider real y graba cada par
+  prompt→respuesta en el cassette (MockLLMConfig.RECORD).
+
+El cassette es un JSONL en el directorio de datos; la clave es el hash del
+prompt de sistema y del prompt, independiente del modelo que lo grabó.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from backend.core.abstract.ai import AIProvider, AIConfig, CallMetadata, StreamEvent, StreamMetrics
+from backend.core.utils.constants import MockLLMConfig, RateLimitConfig, LogPrefixes, LogEmojis
+from backend.core.utils.storage import get_data_path
+from backend.core.utils.structured_output import parse_structured
+
+logger = logging.getLogger(__name__)
+
+MODE_MOCK = "mock"
+MODE_REPLAY = "replay"
+
+
+def cassette_key(prompt: str, system_instruction: Optional[str] = None) -> str:
+    return hashlib.sha256(f"{system_instruction or ''}\n\x00\n{prompt}".encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """Pares prompt→respuesta grabados (JSONL, se añade una línea por grabación)."""
+
+    def __init__(self, file_path: Optional[str] = None):
+        self.file_path = str(file_path or get_data_path(MockLLMConfig.CASSETTE_FILE))
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry['key']] = entry
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} No se pudo cargar el cassette: {e}")
+
+    def lookup(self, prompt: str, system_instruction: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(cassette_key(prompt, system_instruction))
+
+    def record(self, prompt: str, system_instruction: Optional[str], response: str, model: str, latency_seconds: float):
+        entry = {
+            'key': cassette_key(prompt, system_instruction),
+            'model': model,
+            'system_instruction': system_instruction,
+            'prompt': prompt,
+            'response': response,
+            'latency_seconds': round(latency_seconds, 3),
+            'recorded_at': time.time()
+        }
+        with self._lock:
+            self._entries[entry['key']] = entry
+            try:
+                with open(self.file_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            except Exception as e:
+                logger.warning(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} No se pudo grabar en el cassette: {e}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _load_script() -> List[Dict[str, Any]]:
+    try:
+        with open(get_data_path(MockLLMConfig.SCRIPT_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        logger.warning(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} Guion del mock no válido: {e}")
+        return []
+
+
+class MockProvider(AIProvider):
+    """Proveedor simulado (model_id "mock") o de reproducción de cassette ("replay")."""
+
+    def __init__(self):
+        self.mode = MODE_MOCK
+        self.model_name = None
+        self._random = random.Random(MockLLMConfig.SEED)
+        self._script: List[Dict[str, Any]] = []
+
+    def configure(self, config: AIConfig):
+        self.model_name = config.model
+        self.mode = MODE_REPLAY if config.model == MODE_REPLAY else MODE_MOCK
+        self._script = _load_script()
+
+    def _latency(self) -> float:
+        """Segundos hasta el primer token según la distribución configurada."""
+        distribution = MockLLMConfig.LATENCY_DISTRIBUTION
+        if distribution == "fixed":
+            seconds = MockLLMConfig.LATENCY_MEDIAN_SECONDS
+        elif distribution == "uniform":
+            seconds = self._random.uniform(MockLLMConfig.LATENCY_MIN_SECONDS, MockLLMConfig.LATENCY_MAX_SECONDS)
+        else:
+            seconds = self._random.lognormvariate(math.log(MockLLMConfig.LATENCY_MEDIAN_SECONDS), MockLLMConfig.LATENCY_SIGMA)
+        return min(max(seconds, MockLLMConfig.LATENCY_MIN_SECONDS), MockLLMConfig.LATENCY_MAX_SECONDS)
+
+    def _inject_failure(self):
+        """Lanza el error simulado que toque (los mensajes imitan a los proveedores reales)."""
+        roll = self._random.random()
+        if roll < MockLLMConfig.RATE_LIMIT_RATE:
+            raise Exception(
+                f"Error code: 429 - Rate limit reached (mock). Please retry in {MockLLMConfig.RETRY_AFTER_SECONDS}s"
+            )
+        if roll < MockLLMConfig.RATE_LIMIT_RATE + MockLLMConfig.ERROR_RATE:
+            raise Exception("Error code: 500 - Internal server error (mock)")
+
+    def _respond(self, prompt: str, system_instruction: Optional[str]) -> Dict[str, Any]:
+        """Texto de la respuesta y latencia hasta el primer token."""
+        if self.mode == MODE_REPLAY:
+            entry = get_llm_cassette().lookup(prompt, system_instruction)
+            if entry is None:
+                raise Exception(f"Mock replay: prompt no grabado en el cassette ({cassette_key(prompt, system_instruction)[:12]})")
+            # Determinista: misma respuesta y misma latencia que en la grabación
+            return {'text': entry['response'], 'latency': entry.get('latency_seconds') or 0.0}
+
+        self._inject_failure()
+        text = MockLLMConfig.DEFAULT_RESPONSE
+        for rule in self._script:
+            if re.search(rule.get('match', ''), prompt, re.IGNORECASE | re.DOTALL):
+                text = rule.get('response', text)
+                break
+        return {'text': text, 'latency': self._latency()}
+
+    @staticmethod
+    def _generation_seconds(text: str) -> float:
+        return (len(text) / RateLimitConfig.CHARS_PER_TOKEN) / MockLLMConfig.TOKENS_PER_SECOND
+
+    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None) -> str:
+        response = self._respond(prompt, system_instruction)
+        if self.mode == MODE_REPLAY:
+            await asyncio.sleep(response['latency'])
+        else:
+            await asyncio.sleep(response['latency'] + self._generation_seconds(response['text']))
+        if call:
+            call.usage_tokens = (len(prompt) + len(system_instruction or '') + len(response['text'])) // RateLimitConfig.CHARS_PER_TOKEN
+        return response['text']
+
+    async def stream_text(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        call: Optional[CallMetadata] = None
+    ) -> AsyncIterator[StreamEvent]:
+        metrics = StreamMetrics()
+        response = self._respond(prompt, system_instruction)
+        text = response['text']
+        await asyncio.sleep(response['latency'])
+        size = MockLLMConfig.STREAM_CHUNK_CHARS
+        for start in range(0, len(text), size):
+            chunk = text[start:start + size]
+            if start and self.mode == MODE_MOCK:
+                await asyncio.sleep(self._generation_seconds(chunk))
+            yield self._token_event(metrics, chunk, on_token)
+        completion_tokens = len(text) // RateLimitConfig.CHARS_PER_TOKEN
+        prompt_tokens = (len(prompt) + len(system_instruction or '')) // RateLimitConfig.CHARS_PER_TOKEN
+        if call:
+            call.usage_tokens = prompt_tokens + completion_tokens
+        yield metrics.final_event({
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        })
+
+    async def generate_json(
+        self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None
+    ) -> Dict[str, Any]:
+        text = await self.generate_text(prompt, system_instruction, call)
+        if '{' not in text and '[' not in text:
+            # Sin respuesta JSON guionizada: objeto con los campos del esquema vacíos
+            return {name: "" for name in schema.get('properties', schema)}
+        # Respuestas guionizadas mal formadas: misma reparación y validación que los proveedores reales
+        return parse_structured(text, schema, self.model_name)
+
+
+class RecordingProvider(AIProvider):
+    """Provider real que graba en el cassette cada respuesta obtenida."""
+
+    def __init__(self, inner: AIProvider, model: str):
+        self.inner = inner
+        self.model = model
+        self.cassette = get_llm_cassette()
+
+    def configure(self, config: AIConfig):
+        self.inner.configure(config)
+        self.model = config.model
+
+    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None) -> str:
+        started = time.perf_counter()
+        text = await self.inner.generate_text(prompt, system_instruction, call)
+        self.cassette.record(prompt, system_instruction, text, self.model, time.perf_counter() - started)
+        return text
+
+    async def stream_text(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        call: Optional[CallMetadata] = None
+    ) -> AsyncIterator[StreamEvent]:
+        started = time.perf_counter()
+        text = ""
+        stream = self.inner.stream_text(prompt, system_instruction, on_token, call)
+        try:
+            async for event in stream:
+                text += event.text
+                if event.done:
+                    # Solo respuestas completas: un stream cortado no se graba
+                    self.cassette.record(prompt, system_instruction, text, self.model, time.perf_counter() - started)
+                yield event
+        finally:
+            await stream.aclose()
+
+    async def generate_json(
+        self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = await self.inner.generate_json(prompt, schema, system_instruction, call)
+        self.cassette.record(prompt, system_instruction, json.dumps(result, ensure_ascii=False), self.model, time.perf_counter() - started)
+        return result
+
+
+# Instancia global del cassette
+_llm_cassette = None
+
+def get_llm_cassette() -> Cassette:
+    """Obtener instancia global del cassette de respuestas de IA"""
+    global _llm_cassette
+    if _llm_cassette is None:
+        _llm_cassette = Cassette()
+    return _llm_cassette
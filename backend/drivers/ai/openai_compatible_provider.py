@@ -1,11 +1,43 @@
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Optional
 import json
-from backend.core.abstract.ai import AIProvider, AIConfig
+from backend.core.abstract.ai import AIProvider, AIConfig, CallMetadata, StreamEvent, StreamMetrics
+
+from backend.core.utils.constants import AIClientConfig, AILimits, HTTPStatus, StructuredOutputConfig
+from backend.core.utils.structured_output import get_structured_output, normalize_schema, parse_structured
+
+try:
+    from openai import AsyncOpenAI
+except ImportError:
+    AsyncOpenAI = None
 
 try:
-    from openai import OpenAI
+    import httpx
 except ImportError:
-    OpenAI = None
+    httpx = None
+
+# Pool HTTP compartido por todos los clientes OpenAI-compatibles (keep-alive entre llamadas)
+_shared_http_client = None
+
+def get_shared_http_client():
+    """Obtener instancia global del cliente HTTP asíncrono compartido (None sin httpx)"""
+    global _shared_http_client
+    if _shared_http_client is None and httpx is not None:
+        _shared_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=AIClientConfig.MAX_CONNECTIONS,
+                max_keepalive_connections=AIClientConfig.MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=AIClientConfig.KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(AILimits.API_TIMEOUT, connect=AIClientConfig.CONNECT_TIMEOUT_SECONDS)
+        )
+    return _shared_http_client
+
+async def close_shared_http_client():
+    """Cierra las conexiones del pool compartido (al apagar la aplicación)."""
+    global _shared_http_client
+    if _shared_http_client is not None:
+        await _shared_http_client.aclose()
+        _shared_http_client = None
 
 class OpenAICompatibleProvider(AIProvider):
     """Provider for OpenAI-compatible APIs (Groq, DeepSeek, Qwen, etc.)."""
@@ -13,38 +45,126 @@ class OpenAICompatibleProvider(AIProvider):
     def __init__(self):
         self.client = None
         self.model_name = None
+        self.max_tokens = None
+        self.structured_output = None
+        self.model_key = None
     
     def configure(self, config: AIConfig):
-        if OpenAI is None:
+        if AsyncOpenAI is None:
             raise ImportError("openai package not installed. Run: pip install openai")
         
         # Create client with custom base_url if provided
-        kwargs = {"api_key": config.api_key}
+        kwargs = {"api_key": config.api_key, "timeout": AILimits.API_TIMEOUT}
         if hasattr(config, 'base_url') and config.base_url:
             kwargs["base_url"] = config.base_url
+        if config.extra_params.get('headers'):
+            kwargs["default_headers"] = config.extra_params['headers']
+        if AIClientConfig.ENABLED and get_shared_http_client() is not None:
+            kwargs["http_client"] = get_shared_http_client()
         
-        self.client = OpenAI(**kwargs)
+        # Native async client: waiting for the model never blocks the event loop
+        self.client = AsyncOpenAI(**kwargs)
         self.model_name = config.model
+        self.max_tokens = config.extra_params.get('max_tokens')
+        self.structured_output = config.extra_params.get('structured_output')
+        self.model_key = f"{config.base_url or 'openai'}|{config.model}"
     
-    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None) -> str:
+    def _limits(self) -> Dict[str, Any]:
+        return {"max_tokens": self.max_tokens} if self.max_tokens else {}
+    
+    async def generate_text(self, prompt: str, system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None) -> str:
         if not self.client:
             raise Exception("Provider not configured")
+        call = call or CallMetadata()
         
         messages = []
         if system_instruction:
             messages.append({"role": "system", "content": system_instruction})
         messages.append({"role": "user", "content": prompt})
         
-        response = self.client.chat.completions.create(
+        # The raw response exposes the rate-limit headers
+        raw = await self.client.chat.completions.with_raw_response.create(
             model=self.model_name,
-            messages=messages
+            messages=messages,
+            **self._limits()
         )
+        call.response_headers = dict(raw.headers)
+        response = raw.parse()
+        if getattr(response, 'usage', None):
+            call.usage_tokens = response.usage.total_tokens
         
         return response.choices[0].message.content
     
-    async def generate_json(self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None) -> Dict[str, Any]:
+    async def stream_text(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        on_token: Optional[Callable[[str], None]] = None,
+        call: Optional[CallMetadata] = None
+    ) -> AsyncIterator[StreamEvent]:
+        if not self.client:
+            raise Exception("Provider not configured")
+        call = call or CallMetadata()
+        
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+        
+        metrics = StreamMetrics()
+        extra = {"stream_options": {"include_usage": True}} if AIClientConfig.STREAM_USAGE else {}
+        raw = await self.client.chat.completions.with_raw_response.create(
+            model=self.model_name,
+            messages=messages,
+            stream=True,
+            **extra,
+            **self._limits()
+        )
+        call.response_headers = dict(raw.headers)
+        stream = raw.parse()
+        usage = None
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield self._token_event(metrics, chunk.choices[0].delta.content, on_token)
+                if getattr(chunk, 'usage', None):
+                    # Last chunk (empty choices) when include_usage is requested
+                    usage = {
+                        'prompt_tokens': chunk.usage.prompt_tokens,
+                        'completion_tokens': chunk.usage.completion_tokens,
+                        'total_tokens': chunk.usage.total_tokens
+                    }
+                    call.usage_tokens = chunk.usage.total_tokens
+            yield metrics.final_event(usage)
+        finally:
+            # Closing the HTTP response (also on cancellation) makes the server stop generating
+            await stream.close()
+    
+    @staticmethod
+    def _response_format(mode: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        if mode == "json_schema":
+            return {"response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": StructuredOutputConfig.SCHEMA_NAME, "schema": normalize_schema(schema), "strict": False}
+            }}
+        if mode == "json_object":
+            return {"response_format": {"type": "json_object"}}
+        return {}
+    
+    @staticmethod
+    def _rejects_response_format(error: Exception) -> bool:
+        """400 caused by response_format (the server does not support that mode)."""
+        message = str(error).lower()
+        return getattr(error, 'status_code', None) == HTTPStatus.BAD_REQUEST and (
+            'response_format' in message or 'json_schema' in message or 'json mode' in message
+        )
+    
+    async def generate_json(
+        self, prompt: str, schema: Dict[str, Any], system_instruction: Optional[str] = None, call: Optional[CallMetadata] = None
+    ) -> Dict[str, Any]:
         if not self.client:
             raise Exception("Provider not configured")
+        call = call or CallMetadata()
         
         # Build prompt with schema
         json_prompt = f"""{prompt}
@@ -59,20 +179,26 @@ Response must be ONLY the JSON object, no markdown formatting."""
             messages.append({"role": "system", "content": system_instruction})
         messages.append({"role": "user", "content": json_prompt})
         
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=messages,
-            response_format={"type": "json_object"} if "gpt" in self.model_name.lower() else None
-        )
-        
-        text = response.choices[0].message.content.strip()
-        
-        # Clean up markdown code blocks if present
-        if text.startswith("```json"):
-            text = text[7:]
-        if text.startswith("```"):
-            text = text[3:]
-        if text.endswith("```"):
-            text = text[:-3]
+        # Native structured output first; a mode the server rejects is remembered and not requested again
+        tracker = get_structured_output()
+        modes = tracker.native_modes(self.model_key, self.structured_output)
+        for mode in modes:
+            try:
+                raw = await self.client.chat.completions.with_raw_response.create(
+                    model=self.model_name,
+                    messages=messages,
+                    **self._response_format(mode, schema),
+                    **self._limits()
+                )
+                break
+            except Exception as e:
+                if mode == modes[-1] or not self._rejects_response_format(e):
+                    raise
+                tracker.reject_mode(self.model_key, mode, e)
+        call.response_headers = dict(raw.headers)
+        response = raw.parse()
+        if getattr(response, 'usage', None):
+            call.usage_tokens = response.usage.total_tokens
         
-        return json.loads(text.strip())
+        # Fences, trailing commas, truncation and types are fixed locally (no new round trip)
+        return parse_structured(response.choices[0].message.content, schema, self.model_name)
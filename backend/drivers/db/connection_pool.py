@@ -0,0 +1,154 @@
+"""
+Connection Pool - Conexiones de base de datos reutilizadas entre consultas
+
+Abrir una conexión Firebird (autenticación y attach) cuesta más que muchas
+de las consultas del chat. Las conexiones se devuelven al pool tras cada
+consulta con su transacción terminada (reset_session) y se reutilizan por
+base de datos (host:puerto/fichero/usuario). Las que llevan más de
+MAX_IDLE_SECONDS ociosas se cierran al pedir una nueva.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+from backend.core.abstract.database import DatabaseDriver, DBConfig
+from backend.core.factory.db_factory import DBFactory
+from backend.core.utils.constants import ConnectionPoolConfig, DBConstants, LogPrefixes, LogEmojis
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Conexiones ociosas por base de datos, con reutilización LIFO."""
+
+    def __init__(
+        self,
+        max_idle_per_db: int = ConnectionPoolConfig.MAX_IDLE_PER_DB,
+        max_idle_seconds: float = ConnectionPoolConfig.MAX_IDLE_SECONDS
+    ):
+        self.max_idle_per_db = max_idle_per_db
+        self.max_idle_seconds = max_idle_seconds
+        self._idle: Dict[str, List[Tuple[DatabaseDriver, float]]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    @staticmethod
+    def key(config: DBConfig) -> str:
+        """Identificador de la base de datos de una configuración."""
+        return f"{config.host}:{config.port}/{config.database}/{config.user}"
+
+    def _connect(self, config: DBConfig) -> DatabaseDriver:
+        driver = DBFactory.get_driver(DBConstants.TYPE_FIREBIRD)
+        driver.connect(config)
+        with self._lock:
+            self.created += 1
+        return driver
+
+    def acquire(self, config: DBConfig) -> DatabaseDriver:
+        """
+        Obtiene una conexión abierta (ociosa del pool o nueva).
+
+        Args:
+            config: Configuración de la base de datos
+
+        Returns:
+            Driver conectado; debe devolverse con release() o discard()
+        """
+        if not ConnectionPoolConfig.ENABLED:
+            return self._connect(config)
+
+        key = self.key(config)
+        stale = []
+        driver = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            cutoff = time.time() - self.max_idle_seconds
+            while idle:
+                candidate, released_at = idle.pop()
+                if released_at < cutoff:
+                    stale.append(candidate)
+                    continue
+                driver = candidate
+                self.reused += 1
+                break
+        for old in stale:
+            self.discard(old)
+        return driver or self._connect(config)
+
+    def release(self, driver: DatabaseDriver):
+        """Devuelve una conexión sana al pool (o la cierra si sobra)."""
+        config = getattr(driver, 'last_config', None)
+        if not ConnectionPoolConfig.ENABLED or config is None:
+            self.discard(driver)
+            return
+        try:
+            driver.reset_session()
+        except Exception as e:
+            logger.warning(f"{LogPrefixes.DATABASE} {LogEmojis.WARNING} Conexión descartada al reiniciarla: {str(e)}")
+            self.discard(driver)
+            return
+
+        key = self.key(config)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_db:
+                idle.append((driver, time.time()))
+                return
+        self.discard(driver)
+
+    def discard(self, driver: DatabaseDriver):
+        """Cierra una conexión sin devolverla al pool (p. ej. tras un error)."""
+        with self._lock:
+            self.discarded += 1
+        try:
+            driver.disconnect()
+        except Exception:
+            pass
+
+    def warm(self, config: DBConfig, size: int) -> int:
+        """
+        Abre conexiones hasta tener `size` ociosas para la base de datos.
+
+        Returns:
+            Número de conexiones abiertas
+        """
+        key = self.key(config)
+        with self._lock:
+            missing = max(0, min(size, self.max_idle_per_db) - len(self._idle.get(key, [])))
+        drivers = [self._connect(config) for _ in range(missing)]
+        for driver in drivers:
+            self.release(driver)
+        return len(drivers)
+
+    def close_all(self):
+        """Cierra todas las conexiones ociosas."""
+        with self._lock:
+            drivers = [driver for idle in self._idle.values() for driver, _ in idle]
+            self._idle = {}
+        for driver in drivers:
+            self.discard(driver)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': ConnectionPoolConfig.ENABLED,
+                'idle': {key: len(idle) for key, idle in self._idle.items()},
+                'created': self.created,
+                'reused': self.reused,
+                'discarded': self.discarded
+            }
+
+
+# Instancia global del pool de conexiones
+_connection_pool = None
+
+def get_connection_pool() -> ConnectionPool:
+    """Obtener instancia global del pool de conexiones"""
+    global _connection_pool
+    if _connection_pool is None:
+        _connection_pool = ConnectionPool()
+    return _connection_pool
@@ -1,8 +1,21 @@
 import firebirdsql
 from typing import Any, List, Dict, Optional
-from backend.core.abstract.database import DatabaseDriver, DBConfig
+from backend.core.abstract.database import DatabaseDriver, DBConfig, QueryCursor
 from backend.core.utils.encoding_utils import safe_decode, row_to_dict_safe
 
+class FirebirdCursor(QueryCursor):
+    """Open Firebird cursor fetched incrementally with safe encoding handling."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.columns = [desc[0] for desc in cursor.description]
+
+    def fetch(self, size: int) -> List[Dict[str, Any]]:
+        return [row_to_dict_safe(self.columns, row, verbose=False) for row in self.cursor.fetchmany(size)]
+
+    def close(self):
+        self.cursor.close()
+
 class FirebirdDriver(DatabaseDriver):
     """Concrete implementation for Firebird database with robust encoding handling."""
 
@@ -35,6 +48,11 @@ class FirebirdDriver(DatabaseDriver):
             self.conn.close()
             self.conn = None
 
+    def reset_session(self):
+        """Roll back the open transaction so the next query sees a fresh snapshot."""
+        if self.conn:
+            self.conn.rollback()
+
     def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results with safe encoding handling and auto-reconnect."""
         max_retries = 3
@@ -101,6 +119,38 @@ class FirebirdDriver(DatabaseDriver):
         finally:
             cursor.close()
 
+    def open_cursor(self, query: str, params: Optional[tuple] = None) -> FirebirdCursor:
+        """Execute a SELECT query and return its open cursor for incremental fetching."""
+        if not self.conn:
+            raise Exception("No hay conexión activa a la base de datos.")
+
+        cursor = self.conn.cursor()
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            return FirebirdCursor(cursor)
+        except Exception:
+            cursor.close()
+            raise
+
+    def get_query_plan(self, query: str) -> Optional[str]:
+        """Prepare a query without executing it and return its Firebird PLAN."""
+        if not self.conn:
+            raise Exception("No hay conexión activa a la base de datos.")
+
+        cursor = self.conn.cursor()
+        try:
+            prepared = cursor.prep(query, explain_plan=True)
+            try:
+                plan = prepared.stmt.plan
+            finally:
+                prepared.close()
+            return plan.strip() if plan else None
+        finally:
+            cursor.close()
+
     def get_table_metadata(self, table_name: str) -> List[Dict[str, Any]]:
         """Get metadata for a specific table."""
         query = """
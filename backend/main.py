@@ -1,12 +1,42 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.core.config.settings import settings
-from backend.core.utils.constants import AppConstants
+from backend.core.utils.constants import AppConstants, WarmupConfig, CircuitBreakerConfig
+from backend.drivers.db.connection_pool import get_connection_pool
+from backend.modules.system.warmup import get_warmup_state, run_warmup, WarmupState
+from backend.modules.models.breaker_probe import run_breaker_probes
+from backend.modules.chat.model_router import get_model_router
+from backend.core.factory.provider_registry import get_provider_registry
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Precalentamiento: bloqueante o en segundo plano (ver /api/system/ready)
+    state = get_warmup_state()
+    warmup_task = None
+    if not WarmupConfig.ENABLED:
+        state.status = WarmupState.READY
+    elif WarmupConfig.BLOCKING:
+        await run_warmup(state)
+    else:
+        warmup_task = asyncio.create_task(run_warmup(state))
+    probe_task = None
+    if CircuitBreakerConfig.ENABLED and CircuitBreakerConfig.PROBE_ENABLED:
+        probe_task = asyncio.create_task(run_breaker_probes())
+    yield
+    for task in (warmup_task, probe_task):
+        if task and not task.done():
+            task.cancel()
+    get_connection_pool().close_all()
+    get_model_router().save()
+    await get_provider_registry().close()
 
 app = FastAPI(
     title=AppConstants.APP_NAME,
     version=AppConstants.VERSION,
-    description="Generic AI Database System API"
+    description="Generic AI Database System API",
+    lifespan=lifespan
 )
 
 # CORS
@@ -51,6 +81,9 @@ app.include_router(chat_router, prefix="/api/chat", tags=["Chat"])
 from backend.modules.database.router import router as database_router
 app.include_router(database_router, prefix="/api/database", tags=["Database Config"])
 
+from backend.modules.system.router import router as system_router
+app.include_router(system_router, prefix="/api/system", tags=["System"])
+
 from backend.modules.outlook.router import router as outlook_router
 app.include_router(outlook_router) # The prefix is already defined in the router itself
 
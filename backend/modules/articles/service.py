@@ -4,7 +4,8 @@ from backend.core.factory.ai_factory import AIFactory
 from backend.core.abstract.database import DBConfig
 from backend.core.abstract.ai import AIConfig
 from backend.core.config.settings import settings
-from backend.core.utils.constants import DBConstants
+from backend.core.utils.constants import DBConstants, LLMPriority
+from backend.core.utils.llm_scheduler import get_llm_scheduler
 
 class ArticleService:
     
@@ -37,7 +38,8 @@ class ArticleService:
         
         # 4. Generate Analysis
         prompt = f"Analiza el siguiente artículo de ferretería/construcción: '{article_name}'."
-        result = await provider.generate_json(prompt, schema)
+        async with get_llm_scheduler().slot(LLMPriority.INTERACTIVE):
+            result = await provider.generate_json(prompt, schema)
         
         return result
 
@@ -0,0 +1,139 @@
+"""
+Batch Processor - Procesamiento concurrente de preguntas en lote
+
+Los informes nocturnos envían decenas de preguntas; en lugar de serializarlas
+se procesan en paralelo por el mismo pipeline (generación, SQL e
+interpretación) con límites de concurrencia por proveedor de IA y por base
+de datos. El esquema semántico se calcula una vez y se comparte en el lote;
+la memoria de correcciones y los índices de texto ya son globales.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.core.config.database_metadata import get_semantic_schema
+from backend.core.utils.constants import BatchConfig, LLMPriority, LogPrefixes, LogEmojis
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLimits:
+    """Semáforos de concurrencia por proveedor de IA y por base de datos."""
+
+    def __init__(
+        self,
+        provider_concurrency: int = BatchConfig.PROVIDER_CONCURRENCY,
+        db_concurrency: int = BatchConfig.DB_CONCURRENCY
+    ):
+        self.provider_concurrency = provider_concurrency
+        self.db_concurrency = db_concurrency
+        self._providers: Dict[str, asyncio.Semaphore] = {}
+        self._databases: Dict[str, asyncio.Semaphore] = {}
+
+    def provider(self, name: str) -> asyncio.Semaphore:
+        """Semáforo del proveedor (schema) indicado."""
+        if name not in self._providers:
+            self._providers[name] = asyncio.Semaphore(self.provider_concurrency)
+        return self._providers[name]
+
+    def database(self, key: str) -> asyncio.Semaphore:
+        """Semáforo de la base de datos (host:puerto/fichero) indicada."""
+        if key not in self._databases:
+            self._databases[key] = asyncio.Semaphore(self.db_concurrency)
+        return self._databases[key]
+
+
+class BatchProcessor:
+    """Ejecuta un lote de preguntas a través de ChatService."""
+
+    def __init__(self, chat_service):
+        self.chat_service = chat_service
+
+    async def _process_item(
+        self,
+        index: int,
+        question: str,
+        base_context: Dict[str, Any],
+        slots: asyncio.Semaphore
+    ) -> Dict[str, Any]:
+        context = dict(base_context)
+        async with slots:
+            try:
+                response = await self.chat_service.process_message(question, context)
+                success = True
+            except Exception as e:
+                logger.error(f"{LogPrefixes.CHAT_SERVICE} {LogEmojis.ERROR} Lote, pregunta {index}: {str(e)}")
+                response = f"Error: {str(e)}"
+                success = False
+
+        return {
+            'index': index,
+            'question': question,
+            'success': success,
+            'response': response,
+            'query_plans': context.get('query_plans', []),
+            'result_session': context.get('result_session'),
+            'timings': context.get('timings')
+        }
+
+    async def process(
+        self,
+        questions: List[str],
+        context: Dict[str, Any],
+        provider_concurrency: Optional[int] = None,
+        db_concurrency: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Procesa las preguntas concurrentemente.
+
+        Args:
+            questions: Preguntas del lote
+            context: Contexto común (db_params, model_id, confirm_data_sending)
+            provider_concurrency: Llamadas simultáneas por proveedor (por defecto BatchConfig)
+            db_concurrency: Consultas simultáneas por base de datos (por defecto BatchConfig)
+
+        Returns:
+            Diccionario con resultados por pregunta y tiempos agregados
+        """
+        started = time.perf_counter()
+        limits = BatchLimits(
+            provider_concurrency or BatchConfig.PROVIDER_CONCURRENCY,
+            db_concurrency or BatchConfig.DB_CONCURRENCY
+        )
+        base_context = dict(context)
+        base_context['conversation_history'] = []
+        base_context['batch_limits'] = limits
+        base_context['llm_priority'] = LLMPriority.BULK  # Nunca por delante de las preguntas interactivas
+        base_context['db_context'] = get_semantic_schema()
+
+        logger.info(f"{LogPrefixes.CHAT_SERVICE} 📦 Lote de {len(questions)} preguntas")
+        slots = asyncio.Semaphore(BatchConfig.MAX_CONCURRENCY)
+        items = await asyncio.gather(*(
+            self._process_item(index, question, base_context, slots)
+            for index, question in enumerate(questions)
+        ))
+
+        return {'items': items, 'aggregate': self._aggregate(items, time.perf_counter() - started)}
+
+    def _aggregate(self, items: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        item_totals = [item['timings']['total_ms'] for item in items if item.get('timings')]
+        stages: Dict[str, float] = {}
+        for item in items:
+            for stage, ms in ((item.get('timings') or {}).get('stages') or {}).items():
+                stages[stage] = round(stages.get(stage, 0.0) + ms, 1)
+
+        wall_ms = round(elapsed * 1000, 1)
+        serial_ms = round(sum(item_totals), 1)
+        return {
+            'questions': len(items),
+            'succeeded': sum(1 for item in items if item['success']),
+            'failed': sum(1 for item in items if not item['success']),
+            'wall_ms': wall_ms,
+            'sum_item_ms': serial_ms,
+            'avg_item_ms': round(serial_ms / len(item_totals), 1) if item_totals else 0.0,
+            'max_item_ms': max(item_totals) if item_totals else 0.0,
+            'concurrency_gain': round(serial_ms / wall_ms, 2) if wall_ms else 0.0,
+            'stages_ms': stages
+        }
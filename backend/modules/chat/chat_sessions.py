@@ -0,0 +1,221 @@
+"""
+Chat Sessions - Conversaciones guardadas en el servidor
+
+El navegador ya no reenvía la transcripción completa en cada mensaje: envía
+conversation_id y el servidor recupera de un SQLite local el contexto de
+historial ya formateado, la última SQL ejecutada y el fragmento de esquema
+usado. Solo se retienen los últimos MAX_MESSAGES mensajes (recortados), así
+que el trabajo por petición no crece con la conversación. Las sesiones sin
+actividad durante TTL_SECONDS se eliminan.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.core.utils.constants import ChatSessionConfig, LogPrefixes, LogEmojis
+from backend.core.utils.storage import get_data_path
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id TEXT PRIMARY KEY,
+    messages TEXT NOT NULL,
+    history_context TEXT NOT NULL,
+    last_sql TEXT,
+    schema_context TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+def format_history(messages: List[Dict[str, str]]) -> str:
+    """
+    Formatea mensajes anteriores como bloque de contexto para el prompt.
+
+    Args:
+        messages: Mensajes {'role', 'content'} (ya limitados a los recientes)
+
+    Returns:
+        Bloque de texto, o cadena vacía si no hay mensajes
+    """
+    if not messages:
+        return ""
+    history_context = "\n\n=== CONTEXTO DE CONVERSACIÓN ANTERIOR ===\n"
+    for msg in messages:
+        role = msg.get('role', 'user')
+        content = msg.get('content', '')
+        if role == 'user':
+            history_context += f"Usuario: {content}\n"
+        elif role == 'assistant':
+            history_context += f"Asistente: {content}\n"
+    history_context += "=== FIN DEL CONTEXTO ===\n"
+    return history_context
+
+
+class ChatSession:
+    """Estado de una conversación recuperado del almacén."""
+
+    def __init__(
+        self,
+        session_id: str,
+        messages: List[Dict[str, str]],
+        history_context: str,
+        last_sql: Optional[str],
+        schema_context: Optional[str],
+        created_at: float,
+        updated_at: float
+    ):
+        self.session_id = session_id
+        self.messages = messages
+        self.history_context = history_context
+        self.last_sql = last_sql
+        self.schema_context = schema_context
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'conversation_id': self.session_id,
+            'messages': self.messages,
+            'last_sql': self.last_sql,
+            'schema_chars': len(self.schema_context or ''),
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+
+class ChatSessionStore:
+    """Sesiones de conversación persistidas en SQLite con caducidad."""
+
+    def __init__(self, db_path: Optional[str] = None, ttl_seconds: float = ChatSessionConfig.TTL_SECONDS):
+        self.db_path = str(db_path or get_data_path(ChatSessionConfig.FILE))
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._last_purge = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, session_id: Optional[str]) -> Optional[ChatSession]:
+        """Sesión vigente, o None si no existe o ha caducado."""
+        if not session_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT session_id, messages, history_context, last_sql, schema_context, created_at, updated_at "
+                "FROM chat_sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return ChatSession(row[0], json.loads(row[1]), row[2], row[3], row[4], row[5], row[6])
+
+    def append_turn(
+        self,
+        session_id: str,
+        user_message: str,
+        assistant_message: str,
+        last_sql: Optional[str] = None,
+        schema_context: Optional[str] = None
+    ) -> ChatSession:
+        """
+        Añade una pregunta y su respuesta y recalcula el contexto formateado.
+
+        Args:
+            session_id: Identificador de la conversación
+            user_message: Pregunta del usuario
+            assistant_message: Respuesta devuelta
+            last_sql: SQL ejecutada en este turno (None conserva la anterior)
+            schema_context: Esquema usado en este turno (None conserva el anterior)
+
+        Returns:
+            Sesión actualizada
+        """
+        self._purge_if_due()
+        session = self.get(session_id)
+        now = time.time()
+        messages = session.messages if session else []
+        messages = messages + [
+            {'role': 'user', 'content': user_message[:ChatSessionConfig.MAX_MESSAGE_CHARS]},
+            {'role': 'assistant', 'content': assistant_message[:ChatSessionConfig.MAX_MESSAGE_CHARS]}
+        ]
+        messages = messages[-ChatSessionConfig.MAX_MESSAGES:]
+        updated = ChatSession(
+            session_id,
+            messages,
+            format_history(messages),
+            last_sql or (session.last_sql if session else None),
+            schema_context or (session.schema_context if session else None),
+            session.created_at if session else now,
+            now
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chat_sessions "
+                "(session_id, messages, history_context, last_sql, schema_context, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    updated.session_id, json.dumps(updated.messages, ensure_ascii=False), updated.history_context,
+                    updated.last_sql, updated.schema_context, updated.created_at, updated.updated_at
+                )
+            )
+            self._conn.commit()
+        return updated
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def purge_expired(self) -> int:
+        """Elimina las sesiones caducadas y devuelve cuántas."""
+        with self._lock:
+            purged = self._conn.execute(
+                "DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+            self._conn.commit()
+            self._last_purge = time.time()
+        if purged:
+            logger.info(f"{LogPrefixes.CHAT_SERVICE} {LogEmojis.WARNING} {purged} sesiones de chat caducadas eliminadas")
+        return purged
+
+    def _purge_if_due(self):
+        if time.time() - self._last_purge >= ChatSessionConfig.PURGE_INTERVAL_SECONDS:
+            self.purge_expired()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            active = self._conn.execute(
+                "SELECT COUNT(*) FROM chat_sessions WHERE updated_at >= ?", (time.time() - self.ttl_seconds,)
+            ).fetchone()[0]
+            return {
+                'enabled': ChatSessionConfig.ENABLED,
+                'active_sessions': active,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'file': self.db_path
+            }
+
+
+# Instancia global de sesiones de chat
+_chat_session_store = None
+
+def get_chat_session_store() -> ChatSessionStore:
+    """Obtener instancia global de sesiones de chat"""
+    global _chat_session_store
+    if _chat_session_store is None:
+        _chat_session_store = ChatSessionStore()
+    return _chat_session_store
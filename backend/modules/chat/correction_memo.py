@@ -0,0 +1,260 @@
+"""
+SQL Correction Memo
+Remembers successful AI corrections keyed by (failed SQL fingerprint, error type)
+so that recurring mistakes are fixed locally without calling a model again.
+
+Only corrections whose literals all come from the failed query are memoized:
+the key ignores literal values, so a literal added or changed by the
+correction would be replayed into later queries with different values.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from backend.core.utils.constants import CorrectionMemoConfig
+from backend.core.utils.storage import get_data_path
+
+logger = logging.getLogger(__name__)
+
+# String literals ('' escapes included) or standalone numeric literals
+_LITERAL_PATTERN = re.compile(
+    r"'(?:[^']|'')*'|(?<![A-Za-z0-9_$.])\d+(?:\.\d+)?(?![A-Za-z0-9_$])"
+)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+TemplatePart = Union[str, int]
+
+
+class CorrectionMemo:
+    """Bounded, persistent LRU memo of SQL corrections."""
+
+    def __init__(self, max_entries: int = CorrectionMemoConfig.MAX_ENTRIES, file_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.file_path = file_path or str(get_data_path(CorrectionMemoConfig.FILE))
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.rejected = 0
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Fingerprinting
+    # ------------------------------------------------------------------
+
+    def fingerprint(self, sql: str) -> Tuple[str, List[str]]:
+        """
+        Normalize a query by stripping literals.
+
+        Args:
+            sql: SQL query
+
+        Returns:
+            Tuple (fingerprint, literals in order of appearance)
+        """
+        literals = [m.group(0) for m in _LITERAL_PATTERN.finditer(sql)]
+        normalized = _LITERAL_PATTERN.sub(CorrectionMemoConfig.LITERAL_PLACEHOLDER, sql)
+        normalized = _WHITESPACE_PATTERN.sub(" ", normalized).strip().rstrip(';').strip().upper()
+        return normalized, literals
+
+    def _make_key(self, fingerprint: str, error_type: str) -> str:
+        return hashlib.sha1(f"{error_type}|{fingerprint}".encode('utf-8')).hexdigest()
+
+    def _build_template(self, corrected_sql: str, failed_literals: List[str]) -> Tuple[List[TemplatePart], Dict[str, List[int]]]:
+        """Split the corrected query into SQL chunks and references to failed-query literals."""
+        parts: List[TemplatePart] = []
+        equal_groups: Dict[str, List[int]] = {}
+        last_end = 0
+
+        for match in _LITERAL_PATTERN.finditer(corrected_sql):
+            literal = match.group(0)
+            index = failed_literals.index(literal)
+            parts.append(corrected_sql[last_end:match.start()])
+            parts.append(index)
+            equal_groups[str(index)] = [i for i, value in enumerate(failed_literals) if value == literal]
+            last_end = match.end()
+
+        parts.append(corrected_sql[last_end:])
+        return [p for p in parts if p != ""], equal_groups
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def lookup(self, failed_sql: str, error_type: str) -> Optional[str]:
+        """
+        Get the memoized correction for a failed query.
+
+        Args:
+            failed_sql: Query that failed
+            error_type: Error type from SQLCorrector.detect_error_type
+
+        Returns:
+            Corrected SQL with the current literals, or None on miss
+        """
+        fingerprint, literals = self.fingerprint(failed_sql)
+        key = self._make_key(fingerprint, error_type)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not self._literals_compatible(entry, literals):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            entry['hits'] = entry.get('hits', 0) + 1
+            entry['last_used'] = time.time()
+            self.hits += 1
+
+        corrected = "".join(
+            literals[part] if isinstance(part, int) else part
+            for part in entry['template']
+        )
+        logger.info(f"[SQL AUTO-CORRECTION] 🧠 Corrección recuperada de memoria ({error_type})")
+        return corrected
+
+    def _literals_compatible(self, entry: Dict[str, Any], literals: List[str]) -> bool:
+        """Literal positions that were equal when learned must still be equal."""
+        if entry.get('literal_count') != len(literals):
+            return False
+        for index, group in entry.get('equal_groups', {}).items():
+            expected = literals[int(index)]
+            if any(literals[i] != expected for i in group):
+                return False
+        return True
+
+    def store(self, failed_sql: str, error_type: str, corrected_sql: str) -> None:
+        """
+        Memoize a correction that executed successfully.
+
+        Args:
+            failed_sql: Query that failed
+            error_type: Error type from SQLCorrector.detect_error_type
+            corrected_sql: Query that fixed the failure
+        """
+        fingerprint, literals = self.fingerprint(failed_sql)
+        corrected_fingerprint, corrected_literals = self.fingerprint(corrected_sql)
+        if fingerprint == corrected_fingerprint:
+            return  # Nothing structural was corrected
+        if not self._literals_reused(corrected_literals, literals):
+            with self._lock:
+                self.rejected += 1
+            logger.info(f"[SQL AUTO-CORRECTION] La corrección cambia literales: no se memoriza ({error_type})")
+            return
+
+        template, equal_groups = self._build_template(corrected_sql, literals)
+        key = self._make_key(fingerprint, error_type)
+
+        with self._lock:
+            self._entries[key] = {
+                'fingerprint': fingerprint,
+                'error_type': error_type,
+                'template': template,
+                'equal_groups': equal_groups,
+                'literal_count': len(literals),
+                'hits': 0,
+                'created': time.time(),
+                'last_used': time.time()
+            }
+            self._entries.move_to_end(key)
+            self.stores += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+            self._save()
+
+        logger.info(f"[SQL AUTO-CORRECTION] 💾 Corrección memorizada ({error_type})")
+
+    @staticmethod
+    def _literals_reused(corrected_literals: List[str], failed_literals: List[str]) -> bool:
+        """Every literal of the corrected query appears in the failed query."""
+        return all(literal in failed_literals for literal in corrected_literals)
+
+    def _template_literals_reused(self, entry: Dict[str, Any]) -> bool:
+        """No literal kept verbatim in the template (entries stored before the check)."""
+        return not any(
+            isinstance(part, str) and _LITERAL_PATTERN.search(part)
+            for part in entry.get('template', [])
+        )
+
+    def invalidate(self, failed_sql: str, error_type: str) -> None:
+        """Drop a memoized correction that no longer works."""
+        fingerprint, _ = self.fingerprint(failed_sql)
+        key = self._make_key(fingerprint, error_type)
+
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+                self._save()
+                logger.warning(f"[SQL AUTO-CORRECTION] ⚠️ Corrección memorizada descartada ({error_type})")
+
+    def clear(self) -> None:
+        """Remove all memoized corrections."""
+        with self._lock:
+            self._entries.clear()
+            self._save()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit-rate and size statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'rejected_literal_changes': self.rejected
+            }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"[SQL AUTO-CORRECTION] ⚠️ No se pudo cargar la memoria de correcciones: {e}")
+            return
+
+        entries = sorted(data.get('entries', {}).items(), key=lambda item: item[1].get('last_used', 0))
+        for key, entry in entries[-self.max_entries:]:
+            if self._template_literals_reused(entry):
+                self._entries[key] = entry
+
+    def _save(self):
+        """Persist entries (caller holds the lock)."""
+        try:
+            with open(self.file_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self._entries}, f, ensure_ascii=False)
+        except Exception as e:
+            logger.warning(f"[SQL AUTO-CORRECTION] ⚠️ No se pudo guardar la memoria de correcciones: {e}")
+
+
+# Instancia global de la memoria de correcciones
+_correction_memo = None
+
+def get_correction_memo() -> CorrectionMemo:
+    """Obtener instancia global de la memoria de correcciones"""
+    global _correction_memo
+    if _correction_memo is None:
+        _correction_memo = CorrectionMemo()
+    return _correction_memo
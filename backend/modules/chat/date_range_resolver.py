@@ -0,0 +1,284 @@
+"""
+Date Range Resolver - Expresiones temporales en español a rangos indexables
+
+Convierte expresiones como "este mes", "mes pasado", "octubre", "hace 2 meses"
+o "este año" en rangos semiabiertos concretos (FECHA >= inicio AND FECHA < fin)
+para que los filtros de fecha puedan usar índices, en lugar de EXTRACT(...)
+o aritmética año*12+mes sobre la columna.
+"""
+
+import logging
+import re
+import unicodedata
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.utils.constants import DateRangeConfig, LogPrefixes
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12
+}
+
+NUMBER_WORDS = {
+    'un': 1, 'uno': 1, 'una': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
+    'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10, 'once': 11, 'doce': 12
+}
+
+_NUMBER = r'(\d{1,3}|' + '|'.join(NUMBER_WORDS) + r')'
+# Tras conjunciones también, para detectar comparaciones ("de 2024 y 2025")
+_YEAR_RULE = r'\b(?:en|de|del|ano|durante|entre|y|e|o|u|vs|versus|contra|frente a)\s+((?:19|20)\d{2})\b'
+
+# Un número con aspecto de año que en realidad es una cantidad ("más de 2024 unidades")
+_QUANTITY_BEFORE = re.compile(
+    r'\b(?:mas|menos|mayor(?:es)?|menor(?:es)?|superior(?:es)?|inferior(?:es)?|encima|debajo|'
+    r'cerca|alrededor|minimo|maximo|aproximadamente|unos|unas)\s+(?:de|del|que|a)?\s*$'
+)
+_QUANTITY_AFTER = re.compile(
+    r'\s*(?:unidades|uds?|euros?|eur|€|kg|kilos?|gramos|litros|metros|piezas|cajas|palets|'
+    r'articulos|referencias|pedidos|facturas|clientes|lineas|%|por ciento)(?!\w)'
+)
+_MONTH_NAMES = '|'.join(MONTHS)
+# Mes con su año: explícito, relativo ("del año pasado") o por antigüedad ("de hace 2 años")
+_MONTH_RULE = (
+    r'\b(?P<month>' + _MONTH_NAMES + r')(?:'
+    r'\s+(?:de|del)?\s*(?:(?:el\s+)?ano\s+)?(?P<year>\d{4})'
+    r'|\s+(?:de|del)\s+(?:el\s+)?(?P<relative>ano\s+(?:pasado|anterior)|este\s+ano|ano\s+actual)'
+    r'|\s+(?:de\s+)?hace\s+(?P<ago>\d{1,3}|' + '|'.join(NUMBER_WORDS) + r')\s+anos?'
+    r')?\b'
+)
+
+# Comparación con EXTRACT sobre una columna y lado derecho relativo a CURRENT_DATE o literal
+_EXTRACT_ATOM = re.compile(
+    r'[\s(]*EXTRACT\s*\(\s*(?P<part>YEAR|MONTH|DAY)\s+FROM\s+(?P<col>[A-Z0-9_.$]+)\s*\)'
+    r'(?:[\s()*+\-\d]|EXTRACT\s*\(\s*(?:YEAR|MONTH|DAY)\s+FROM\s+(?P=col)\s*\))*'
+    r'=(?:[\s()*+\-\d]|EXTRACT\s*\(\s*(?:YEAR|MONTH|DAY)\s+FROM\s+CURRENT_DATE\s*\)|CURRENT_DATE)+',
+    re.IGNORECASE
+)
+
+
+class DateRange:
+    """Rango de fechas semiabierto [start, end)."""
+
+    def __init__(self, start: date, end: date, expression: str):
+        self.start = start
+        self.end = end
+        self.expression = expression
+
+    def to_sql(self, column: str = DateRangeConfig.DEFAULT_COLUMN) -> str:
+        """
+        Predicado SQL indexable para la columna.
+
+        Con literales y no con parámetros: la consulta viaja como texto por el
+        corrector, la memoria de correcciones, el control de coste y las
+        sesiones de resultados, y los literales salen de fechas ya resueltas
+        (no de texto del usuario), así que no hay riesgo de inyección. Firebird
+        usa igualmente el índice de la columna con un literal DATE.
+        """
+        return f"({column} >= '{self.start.isoformat()}' AND {column} < '{self.end.isoformat()}')"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'expression': self.expression, 'start': self.start.isoformat(), 'end': self.end.isoformat()}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _to_number(token: str) -> int:
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _add_months(day: date, months: int) -> date:
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month(year: int, month: int) -> Tuple[date, date]:
+    start = date(year, month, 1)
+    return start, _add_months(start, 1)
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _quarter_start(day: date) -> date:
+    return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+
+
+def resolve_date_range(question: str, today: Optional[date] = None) -> Optional[DateRange]:
+    """
+    Resuelve la expresión temporal de la pregunta.
+
+    Si una expresión contiene a otra ("octubre del año pasado" frente a
+    "año pasado") gana la más larga. Si quedan varios periodos distintos
+    (preguntas comparativas) no se resuelve ninguno y el modelo decide.
+
+    Args:
+        question: Pregunta del usuario
+        today: Fecha de referencia (por defecto, hoy)
+
+    Returns:
+        DateRange o None si no hay una única expresión temporal (o se pide el histórico)
+    """
+    today = today or date.today()
+    text = _normalize(question)
+
+    if re.search(r'\b(historico|todos los anos)\b', text):
+        return None
+
+    rules: List[Tuple[str, Any]] = [
+        (r'\banteayer\b', lambda m: (today - timedelta(days=2), today - timedelta(days=1))),
+        (r'\bayer\b', lambda m: (today - timedelta(days=1), today)),
+        (r'\bhoy\b', lambda m: (today, today + timedelta(days=1))),
+        (r'\b(?:ultim[oa]s|pasad[oa]s)\s+' + _NUMBER + r'\s+(dias|semanas|meses|anos)\b', lambda m: _last_n(today, _to_number(m.group(1)), m.group(2))),
+        (r'\bhace\s+' + _NUMBER + r'\s+(dias?|semanas?|mes(?:es)?|anos?)\b', lambda m: _ago(today, _to_number(m.group(1)), m.group(2))),
+        (r'\b(?:esta semana|semana actual)\b', lambda m: (_week_start(today), _week_start(today) + timedelta(days=7))),
+        (r'\b(?:(?:la )?semana (?:pasada|anterior)|ultima semana)\b', lambda m: (_week_start(today) - timedelta(days=7), _week_start(today))),
+        (r'\b(?:este mes|mes actual|lo que va de mes)\b', lambda m: _month(today.year, today.month)),
+        (r'\b(?:(?:el )?mes (?:pasado|anterior)|ultimo mes)\b', lambda m: (_add_months(today.replace(day=1), -1), today.replace(day=1))),
+        (r'\b(?:este trimestre|trimestre actual)\b', lambda m: (_quarter_start(today), _add_months(_quarter_start(today), 3))),
+        (r'\b(?:(?:el )?trimestre (?:pasado|anterior)|ultimo trimestre)\b', lambda m: (_add_months(_quarter_start(today), -3), _quarter_start(today))),
+        (_MONTH_RULE, lambda m: _named_month(today, m)),
+        (r'\b(?:este ano|ano actual|lo que va de ano)\b', lambda m: (date(today.year, 1, 1), date(today.year + 1, 1, 1))),
+        (r'\b(?:(?:el )?ano (?:pasado|anterior)|ultimo ano)\b', lambda m: (date(today.year - 1, 1, 1), date(today.year, 1, 1))),
+        (_YEAR_RULE, lambda m: None if _is_quantity(text, m) else (date(int(m.group(1)), 1, 1), date(int(m.group(1)) + 1, 1, 1))),
+    ]
+
+    candidates = []
+    for pattern, resolver in rules:
+        for match in re.finditer(pattern, text):
+            resolved = resolver(match)
+            if resolved is None:
+                continue  # No es una expresión temporal (p. ej. una cantidad)
+            candidates.append((match.start(), match.end(), resolved, match.group(0)))
+
+    # Las más largas primero; a igual longitud, el orden de las reglas
+    candidates.sort(key=lambda candidate: candidate[0] - candidate[1])
+    found = []
+    for candidate in candidates:
+        if all(candidate[1] <= other[0] or candidate[0] >= other[1] for other in found):
+            found.append(candidate)
+
+    if not found:
+        return None
+    if len({candidate[2] for candidate in found}) > 1:
+        expressions = ', '.join(f"'{candidate[3]}'" for candidate in sorted(found))
+        logger.info(f"{LogPrefixes.SQL} 📅 Varias expresiones temporales ({expressions}): sin rango único")
+        return None
+
+    _, _, (start, end), expression = found[0]
+    logger.info(f"{LogPrefixes.SQL} 📅 Expresión temporal '{expression}' -> [{start}, {end})")
+    return DateRange(start, end, expression)
+
+
+def _is_quantity(text: str, match: re.Match) -> bool:
+    """El "año" es una cantidad: va tras una comparación ("más de") o ante una unidad."""
+    return bool(_QUANTITY_BEFORE.search(text[:match.start(1)])) or bool(_QUANTITY_AFTER.match(text[match.end(1):]))
+
+
+def _named_month(today: date, match: re.Match) -> Tuple[date, date]:
+    # Regla de año actual: un mes sin año se refiere al año en curso
+    year = today.year
+    if match.group('year'):
+        year = int(match.group('year'))
+    elif match.group('relative') and re.search(r'pasado|anterior', match.group('relative')):
+        year = today.year - 1
+    elif match.group('ago'):
+        year = today.year - _to_number(match.group('ago'))
+    return _month(year, MONTHS[match.group('month')])
+
+
+def _last_n(today: date, amount: int, unit: str) -> Tuple[date, date]:
+    end = today + timedelta(days=1)
+    if unit == 'dias':
+        return end - timedelta(days=amount), end
+    if unit == 'semanas':
+        return end - timedelta(weeks=amount), end
+    if unit == 'meses':
+        return _add_months(today.replace(day=1), -amount), end
+    return date(today.year - amount, today.month, 1), end
+
+
+def _ago(today: date, amount: int, unit: str) -> Tuple[date, date]:
+    if unit.startswith('dia'):
+        day = today - timedelta(days=amount)
+        return day, day + timedelta(days=1)
+    if unit.startswith('semana'):
+        start = _week_start(today) - timedelta(weeks=amount)
+        return start, start + timedelta(days=7)
+    if unit.startswith('mes'):
+        start = _add_months(today.replace(day=1), -amount)
+        return start, _add_months(start, 1)
+    return date(today.year - amount, 1, 1), date(today.year - amount + 1, 1, 1)
+
+
+def _balanced_span(sql: str, start: int, end: int) -> Tuple[int, int]:
+    """Ajusta el tramo para que sus paréntesis queden equilibrados."""
+    while start < end:
+        fragment = sql[start:end]
+        opens, closes = fragment.count('('), fragment.count(')')
+        if closes > opens and sql[end - 1] in ') \t\n':
+            end -= 1
+        elif opens > closes and sql[start] in '( \t\n':
+            start += 1
+        else:
+            break
+    while start < end and sql[start].isspace():
+        start += 1
+    while end > start and sql[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def enforce_date_range(sql: str, date_range: Optional[DateRange]) -> str:
+    """
+    Sustituye los filtros EXTRACT(...) sobre una columna por el rango resuelto.
+
+    El primer filtro EXTRACT de la columna se reemplaza por el predicado
+    indexable y los siguientes unidos por AND se eliminan. Si aparecen
+    unidos por OR (u otra estructura), o la misma parte (YEAR, MONTH, DAY)
+    se filtra más de una vez (varios periodos, p. ej. una comparación con
+    UNION), la consulta se deja intacta.
+
+    Args:
+        sql: Consulta generada por el modelo
+        date_range: Rango resuelto de la pregunta
+
+    Returns:
+        Consulta reescrita o la original si no aplica
+    """
+    if not date_range or not DateRangeConfig.ENFORCE_REWRITE:
+        return sql
+
+    atoms = []
+    for match in _EXTRACT_ATOM.finditer(sql):
+        start, end = _balanced_span(sql, match.start(), match.end())
+        if sql[start:end].count('(') == sql[start:end].count(')'):
+            atoms.append((start, end, match.group('col'), match.group('part')))
+
+    if not atoms or len({col.upper() for _, _, col, _ in atoms}) != 1:
+        return sql
+    parts = [part.upper() for _, _, _, part in atoms]
+    if len(set(parts)) != len(parts):
+        logger.info(f"{LogPrefixes.SQL} 📅 Varios filtros de fecha en la consulta: no se reescribe")
+        return sql
+
+    column = atoms[0][2]
+    rewritten = sql
+    for index, (start, end, _, _) in reversed(list(enumerate(atoms))):
+        if index == 0:
+            rewritten = rewritten[:start] + date_range.to_sql(column) + rewritten[end:]
+            continue
+        connector = re.search(r'\s+AND\s*$', rewritten[:start], re.IGNORECASE)
+        if not connector:
+            return sql
+        rewritten = rewritten[:connector.start()] + rewritten[end:]
+
+    logger.info(f"{LogPrefixes.SQL} 📅 Filtro de fecha reescrito a rango indexable: {date_range.to_sql(column)}")
+    return rewritten
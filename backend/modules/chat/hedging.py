@@ -0,0 +1,128 @@
+"""
+Hedging - Latencias por modelo y estadísticas de peticiones de cobertura
+
+El orquestador lanza la misma petición al siguiente modelo cuando el que
+está en curso supera el percentil HedgingConfig.PERCENTILE de sus latencias
+recientes, y se queda con la primera respuesta válida. Aquí se guardan esas
+latencias (ventana deslizante por modelo, compartida por todos los
+orquestadores del proceso) y el balance de las coberturas.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from backend.core.utils.constants import HedgingConfig
+
+
+class ModelLatencyTracker:
+    """Latencias recientes de respuestas correctas por modelo."""
+
+    def __init__(self, window: int = HedgingConfig.LATENCY_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model_id: str, seconds: float):
+        with self._lock:
+            if model_id not in self._samples:
+                self._samples[model_id] = deque(maxlen=self.window)
+            self._samples[model_id].append(seconds)
+
+    def observe_cancelled(self, model_id: str, seconds: float):
+        """Intento cancelado: duró al menos `seconds`; cuenta como muestra si ya supera el umbral."""
+        if seconds > self.threshold(model_id):
+            self.observe(model_id, seconds)
+
+    def _sorted(self, model_id: str) -> list:
+        with self._lock:
+            return sorted(self._samples.get(model_id, ()))
+
+    def threshold(self, model_id: str) -> float:
+        """Segundos de espera antes de cubrir al modelo (su percentil, acotado)."""
+        samples = self._sorted(model_id)
+        if len(samples) < HedgingConfig.MIN_SAMPLES:
+            return HedgingConfig.DEFAULT_THRESHOLD_SECONDS
+        value = samples[min(len(samples) - 1, int(HedgingConfig.PERCENTILE * len(samples)))]
+        return min(max(value, HedgingConfig.MIN_THRESHOLD_SECONDS), HedgingConfig.MAX_THRESHOLD_SECONDS)
+
+    def tail_mean(self, model_id: str, above: float) -> Optional[float]:
+        """Latencia media de las respuestas que superaron `above` segundos (None sin datos)."""
+        tail = [s for s in self._sorted(model_id) if s > above]
+        return sum(tail) / len(tail) if tail else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            model_ids = list(self._samples)
+        return {
+            model_id: {
+                'samples': len(self._sorted(model_id)),
+                'threshold_s': round(self.threshold(model_id), 3)
+            }
+            for model_id in model_ids
+        }
+
+
+class HedgeStats:
+    """Balance de coberturas: cuántas se lanzan, cuántas ganan y el tiempo ahorrado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged_requests = 0
+        self.hedges_launched = 0
+        self.hedge_wins = 0
+        self.primary_wins = 0
+        self.saved_ms = 0.0
+
+    def record(self, hedges: int, hedge_won: bool, saved_ms: float = 0.0):
+        """
+        Registra una petición resuelta.
+
+        Args:
+            hedges: Coberturas lanzadas (por tiempo, no por fallo)
+            hedge_won: Si la respuesta vino de una cobertura
+            saved_ms: Estimación del tiempo ahorrado frente a esperar al principal
+        """
+        with self._lock:
+            self.requests += 1
+            if hedges:
+                self.hedged_requests += 1
+                self.hedges_launched += hedges
+                if hedge_won:
+                    self.hedge_wins += 1
+                    self.saved_ms += saved_ms
+                else:
+                    self.primary_wins += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': HedgingConfig.ENABLED,
+                'requests': self.requests,
+                'hedged_requests': self.hedged_requests,
+                'hedge_rate': round(self.hedged_requests / self.requests, 3) if self.requests else 0.0,
+                'hedges_launched': self.hedges_launched,
+                'hedge_wins': self.hedge_wins,
+                'primary_wins_after_hedge': self.primary_wins,
+                'estimated_saved_ms': round(self.saved_ms, 1)
+            }
+
+
+# Instancias globales (compartidas por todos los orquestadores)
+_latency_tracker = None
+_hedge_stats = None
+
+def get_model_latency_tracker() -> ModelLatencyTracker:
+    """Obtener instancia global de latencias por modelo"""
+    global _latency_tracker
+    if _latency_tracker is None:
+        _latency_tracker = ModelLatencyTracker()
+    return _latency_tracker
+
+def get_hedge_stats() -> HedgeStats:
+    """Obtener instancia global de estadísticas de hedging"""
+    global _hedge_stats
+    if _hedge_stats is None:
+        _hedge_stats = HedgeStats()
+    return _hedge_stats
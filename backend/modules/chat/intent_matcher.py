@@ -0,0 +1,329 @@
+"""
+Intent Matcher - Atajo de plantillas SQL para preguntas frecuentes
+
+Las formas de pregunta más habituales ("facturas de octubre", "top 5
+artículos más caros", "cuántos clientes") se resuelven localmente con
+plantillas SQL revisadas, derivadas de las `consultas_comunes` de los
+metadatos y de los códigos TIPO de DOCCAB, sin llamar al modelo.
+
+Cada plantilla reconoce su forma con una expresión regular con huecos
+(tipo de documento, N, entidad) y el rango temporal lo aporta
+date_range_resolver. La confianza es la fracción de palabras significativas
+de la pregunta explicadas por la plantilla: si queda texto sin explicar
+("facturas de octubre del cliente X") la pregunta va al LLM. Lo mismo si
+parte de la frase temporal queda fuera de la expresión resuelta ("facturas
+del primer trimestre de 2025"): el rango no sería el que se pregunta.
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+from numbers import Number
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.core.config.metadata_manager import get_metadata_manager
+from backend.core.utils.constants import (
+    DocumentTypes, IntentMatcherConfig, SQLLimits, LogPrefixes
+)
+from backend.modules.chat.date_range_resolver import DateRange, MONTHS, NUMBER_WORDS, resolve_date_range
+from backend.modules.chat.result_analytics import rows_to_markdown
+
+logger = logging.getLogger(__name__)
+
+# Palabras que no aportan intención (no cuentan para la confianza)
+STOPWORDS = {
+    'a', 'al', 'con', 'cual', 'cuales', 'dame', 'de', 'del', 'dime', 'el', 'en', 'es', 'esta', 'estan',
+    'hay', 'la', 'las', 'lista', 'listado', 'listar', 'lo', 'los', 'me', 'mi', 'mis', 'muestra', 'muestrame',
+    'nuestro', 'nuestros', 'para', 'por', 'favor', 'que', 'quiero', 'saber', 'se', 'son', 'tenemos',
+    'todas', 'todos', 'un', 'una', 'unos', 'ver', 'y'
+}
+
+_DOCS = '|'.join(sorted(DocumentTypes.TIPO_BY_NAME, key=len, reverse=True))
+_NUMBER = r'(?P<n>\d{1,3}|' + '|'.join(NUMBER_WORDS) + r')'
+_ENTITIES = {
+    'clientes': 'CLIENTE', 'articulos': 'ARTICULO', 'productos': 'ARTICULO',
+    'proveedores': 'PROVEEDOR', 'almacenes': 'ALMACEN'
+}
+_COUNT_WORDS = r'(?:cuant[oa]s|numero (?:de|total de)|total de|cantidad de)'
+# Palabras de una frase temporal: todas deben quedar dentro de la expresión resuelta
+_TEMPORAL_WORDS = re.compile(
+    r'\b(?:' + '|'.join(MONTHS) + r'|(?:19|20)\d{2}|hoy|ayer|anteayer|hace|pasad[oa]s?|anterior(?:es)?|'
+    r'ultim[oa]s?|actual|primer[oa]?|segund[oa]|tercer[oa]?|cuarto|semestres?|trimestres?|semanas?|'
+    r'mes(?:es)?|anos?|dias?)\b'
+)
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def _date_filter(date_range: Optional[DateRange]) -> str:
+    return f" AND {date_range.to_sql()}" if date_range else ""
+
+
+def _top_n(match: re.Match) -> int:
+    token = match.group('n')
+    if not token:
+        return IntentMatcherConfig.DEFAULT_TOP_N
+    value = int(token) if token.isdigit() else NUMBER_WORDS[token]
+    return max(1, min(value, IntentMatcherConfig.MAX_TOP_N))
+
+
+class IntentTemplate:
+    """Plantilla SQL revisada para una forma de pregunta."""
+
+    def __init__(
+        self,
+        template_id: str,
+        source: str,
+        table: str,
+        columns: List[str],
+        pattern: str,
+        build: Callable[[re.Match, Optional[DateRange]], str],
+        uses_date_range: bool = False,
+        requires_date_range: bool = False
+    ):
+        self.template_id = template_id
+        self.source = source  # Consulta común o regla del prompt de la que procede
+        self.table = table
+        self.columns = columns
+        self.pattern = re.compile(pattern)
+        self.build = build
+        self.uses_date_range = uses_date_range or requires_date_range
+        self.requires_date_range = requires_date_range
+
+
+TEMPLATES = [
+    IntentTemplate(
+        'document_count', 'DOCCAB: documentos por fecha + TIPO', 'DOCCAB', ['TIPO', 'FECHA'],
+        _COUNT_WORDS + r'\s+(?P<doc>' + _DOCS + r')\b',
+        lambda m, dr: f"SELECT COUNT(*) AS TOTAL FROM DOCCAB WHERE TIPO = {DocumentTypes.TIPO_BY_NAME[m.group('doc')]}{_date_filter(dr)}",
+        uses_date_range=True
+    ),
+    IntentTemplate(
+        'invoiced_total', 'DOCCAB: total facturado', 'DOCCAB', ['TIPO', 'FECHA', 'IMPORTETOTAL'],
+        r'\b(?:total|importe total|importe)\s+(?:facturado|de (?:las )?facturas|en facturas)\b|\bcuanto (?:hemos )?facturado\b',
+        lambda m, dr: (
+            f"SELECT COUNT(*) AS FACTURAS, SUM(IMPORTETOTAL) AS TOTAL FROM DOCCAB "
+            f"WHERE TIPO = {DocumentTypes.TIPO_BY_NAME['facturas']}{_date_filter(dr)}"
+        ),
+        uses_date_range=True
+    ),
+    IntentTemplate(
+        'entity_count', 'conteo de tablas maestras', '{entity}', [],
+        _COUNT_WORDS + r'\s+(?P<entity>' + '|'.join(_ENTITIES) + r')\b',
+        lambda m, dr: f"SELECT COUNT(*) AS TOTAL FROM {_ENTITIES[m.group('entity')]}"
+    ),
+    IntentTemplate(
+        'top_expensive_articles', 'ARTICULO: productos más caros', 'ARTICULO', ['CODIGO', 'NOMBRE', 'PRECIOCMPONDERADO'],
+        r'(?:\b(?:top|los|las)\s+)?(?:\b' + _NUMBER + r'\s+)?\b(?:articulos|productos)\s+mas\s+caros\b',
+        lambda m, dr: (
+            f"SELECT FIRST {_top_n(m)} CODIGO, NOMBRE, PRECIOCMPONDERADO FROM ARTICULO "
+            f"ORDER BY PRECIOCMPONDERADO DESC"
+        )
+    ),
+    IntentTemplate(
+        'articles_in_stock', 'ARTICULO: productos con stock', 'ARTICULO', ['CODIGO', 'NOMBRE', 'STOCK'],
+        r'\b(?:articulos|productos)\s+(?:con|en)\s+stock\b',
+        lambda m, dr: f"SELECT FIRST {SQLLimits.DEFAULT_FIRST} CODIGO, NOMBRE, STOCK FROM ARTICULO WHERE STOCK > 0 ORDER BY STOCK DESC"
+    ),
+    IntentTemplate(
+        'pending_orders', 'PEDIDO: pedidos pendientes', 'PEDIDO', ['NUMERO', 'FECHA', 'PROVEEDOR', 'TOTAL', 'RECIBIDO'],
+        r'\bpedidos\s+(?:pendientes|sin recibir|no recibidos)\b',
+        lambda m, dr: (
+            f"SELECT FIRST {SQLLimits.DEFAULT_FIRST} NUMERO, FECHA, PROVEEDOR, TOTAL FROM PEDIDO "
+            f"WHERE RECIBIDO = 'N'{_date_filter(dr)} ORDER BY FECHA DESC"
+        ),
+        uses_date_range=True
+    ),
+    IntentTemplate(
+        'clients_with_discount', 'CLIENTE: clientes con descuento', 'CLIENTE', ['CODIGO', 'NOMBRE', 'DESCUENTO'],
+        r'\bclientes\s+con\s+descuento\b',
+        lambda m, dr: f"SELECT FIRST {SQLLimits.DEFAULT_FIRST} CODIGO, NOMBRE, DESCUENTO FROM CLIENTE WHERE DESCUENTO > 0 ORDER BY DESCUENTO DESC"
+    ),
+    IntentTemplate(
+        'list_warehouses', 'ALMACEN: listar almacenes', 'ALMACEN', ['CODIGO', 'DESCRIPCION'],
+        r'\balmacenes\b',
+        lambda m, dr: "SELECT CODIGO, DESCRIPCION FROM ALMACEN ORDER BY CODIGO"
+    ),
+    IntentTemplate(
+        'documents_by_period', 'DOCCAB: documentos por fecha + TIPO', 'DOCCAB',
+        ['NUMERO', 'SERIE', 'TIPO', 'FECHA', 'CODCLIENTE', 'IMPORTETOTAL'],
+        r'\b(?P<doc>' + _DOCS + r')\b',
+        lambda m, dr: (
+            f"SELECT FIRST {SQLLimits.DEFAULT_FIRST} NUMERO, SERIE, FECHA, CODCLIENTE, IMPORTETOTAL FROM DOCCAB "
+            f"WHERE TIPO = {DocumentTypes.TIPO_BY_NAME[m.group('doc')]}{_date_filter(dr)} ORDER BY FECHA DESC"
+        ),
+        requires_date_range=True
+    ),
+]
+
+
+class IntentMatch:
+    """Resultado de casar una pregunta con una plantilla."""
+
+    def __init__(self, template: IntentTemplate, sql: str, confidence: float, date_range: Optional[DateRange]):
+        self.template = template
+        self.sql = sql
+        self.confidence = confidence
+        self.date_range = date_range
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'template': self.template.template_id,
+            'source': self.template.source,
+            'confidence': round(self.confidence, 2),
+            'sql': self.sql,
+            'date_range': self.date_range.to_dict() if self.date_range else None
+        }
+
+
+class IntentMatcher:
+    """Clasifica preguntas frecuentes y las resuelve con plantillas SQL."""
+
+    def __init__(self, templates: Optional[List[IntentTemplate]] = None):
+        self.metadata_manager = get_metadata_manager()
+        self.templates = [t for t in (templates if templates is not None else TEMPLATES) if self._is_vetted(t)]
+        self._lock = threading.Lock()
+        self.questions = 0
+        self.hits: Dict[str, int] = {}
+        self.fallbacks = 0  # Plantilla elegida pero su ejecución falló
+
+    def _is_vetted(self, template: IntentTemplate) -> bool:
+        """Una plantilla solo se activa si su tabla y columnas existen en los metadatos."""
+        tables = [_ENTITIES[e] for e in _ENTITIES] if template.table == '{entity}' else [template.table]
+        for table in tables:
+            table_info = self.metadata_manager.get_table_info(table)
+            if not table_info or any(c not in table_info.get('columns', {}) for c in template.columns):
+                logger.warning(f"{LogPrefixes.SQL} Plantilla '{template.template_id}' desactivada: {table} no encaja con los metadatos")
+                return False
+        return True
+
+    def _confidence(self, text: str, spans: List[Tuple[int, int]]) -> float:
+        """Fracción de palabras significativas cubiertas por los tramos explicados."""
+        significant = [m for m in re.finditer(r'[a-z0-9]+', text) if m.group(0) not in STOPWORDS]
+        if not significant:
+            return 0.0
+        explained = sum(1 for m in significant if any(start <= m.start() and m.end() <= end for start, end in spans))
+        return explained / len(significant)
+
+    def _dates_explained(self, text: str, date_span: Optional[Tuple[int, int]]) -> bool:
+        """Toda palabra temporal de la pregunta cae dentro de la expresión resuelta."""
+        for word in _TEMPORAL_WORDS.finditer(text):
+            if not date_span or not (date_span[0] <= word.start() and word.end() <= date_span[1]):
+                logger.info(f"{LogPrefixes.SQL} 🎯 '{word.group(0)}' queda fuera del rango resuelto: sin plantilla de fechas")
+                return False
+        return True
+
+    def classify(self, question: str) -> Optional[IntentMatch]:
+        """
+        Busca la plantilla que mejor explica la pregunta.
+
+        Args:
+            question: Pregunta del usuario
+
+        Returns:
+            IntentMatch con la mayor confianza, o None si ninguna forma encaja
+        """
+        text = _normalize(question)
+        date_range = resolve_date_range(question)
+        date_span = None
+        if date_range:
+            position = text.find(date_range.expression)
+            date_span = (position, position + len(date_range.expression)) if position >= 0 else None
+        dates_explained = self._dates_explained(text, date_span)
+
+        best = None
+        for template in self.templates:
+            match = template.pattern.search(text)
+            if not match or (template.requires_date_range and not date_range):
+                continue
+            if template.uses_date_range and not dates_explained:
+                continue
+            spans = [match.span()]
+            if template.uses_date_range and date_span:
+                spans.append(date_span)
+            template_range = date_range if template.uses_date_range else None
+            confidence = self._confidence(text, spans)
+            if not best or confidence > best.confidence:
+                best = IntentMatch(template, template.build(match, template_range), confidence, template_range)
+        return best
+
+    def match(self, question: str) -> Optional[IntentMatch]:
+        """
+        Devuelve la plantilla a usar si la confianza supera el umbral.
+
+        Args:
+            question: Pregunta del usuario
+
+        Returns:
+            IntentMatch o None si la pregunta debe ir al LLM
+        """
+        if not IntentMatcherConfig.ENABLED:
+            return None
+
+        candidate = self.classify(question)
+        with self._lock:
+            self.questions += 1
+            if candidate and candidate.confidence >= IntentMatcherConfig.MIN_CONFIDENCE:
+                template_id = candidate.template.template_id
+                self.hits[template_id] = self.hits.get(template_id, 0) + 1
+                logger.info(
+                    f"{LogPrefixes.SQL} 🎯 Plantilla '{template_id}' (confianza {candidate.confidence:.2f}): {candidate.sql}"
+                )
+                return candidate
+        return None
+
+    def record_fallback(self, template_id: str):
+        """La plantilla falló al ejecutarse y la pregunta pasó al LLM."""
+        with self._lock:
+            self.hits[template_id] = self.hits.get(template_id, 1) - 1
+            self.fallbacks += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Ratio de aciertos de plantillas sobre el total de preguntas."""
+        with self._lock:
+            total_hits = sum(self.hits.values())
+            return {
+                'questions': self.questions,
+                'template_hits': total_hits,
+                'hit_ratio': round(total_hits / self.questions, 3) if self.questions else 0.0,
+                'fallbacks': self.fallbacks,
+                'hits_by_template': dict(self.hits),
+                'templates': [t.template_id for t in self.templates]
+            }
+
+
+def format_template_results(match: IntentMatch, results: List[Dict[str, Any]]) -> str:
+    """
+    Respuesta en texto para una plantilla, sin interpretación del modelo.
+
+    Args:
+        match: Plantilla aplicada
+        results: Filas devueltas
+
+    Returns:
+        Texto con el valor único o una tabla markdown
+    """
+    period = f" ({match.date_range.expression}: {match.date_range.start} a {match.date_range.end})" if match.date_range else ""
+    if not results:
+        return f"No hay resultados{period}."
+
+    if len(results) == 1 and len(results[0]) <= 2 and all(v is None or isinstance(v, Number) for v in results[0].values()):
+        values = ", ".join(f"{key}: {value if value is not None else 0}" for key, value in results[0].items())
+        return f"{values}{period}"
+
+    return rows_to_markdown(results, f"{len(results)} resultados{period}:")
+
+
+# Instancia global del clasificador de intenciones
+_intent_matcher = None
+
+def get_intent_matcher() -> IntentMatcher:
+    """Obtener instancia global del clasificador de intenciones"""
+    global _intent_matcher
+    if _intent_matcher is None:
+        _intent_matcher = IntentMatcher()
+    return _intent_matcher
@@ -9,21 +9,40 @@ Características:
 - Fallback entre modelos ordenados por prioridad
 - Logging detallado de cada intento
 - Feedback claro al usuario durante el proceso
+- Gateway único de IA (get_llm_gateway): chat, correo, adjuntos y análisis de
+  tablas pasan por aquí con su prioridad; cada intento ocupa un hueco del
+  planificador (PriorityScheduler) y la petición completa tiene un plazo
 
 Autor: DEVIA System
 Versión: 1.0.0
 """
 
 import asyncio
+from contextlib import aclosing, nullcontext
+import json
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+import time
+from typing import Callable, Dict, Any, Optional, List, Tuple
 from datetime import datetime
 
+from backend.core.abstract.ai import CallMetadata
 from backend.core.config.model_manager import ModelManager
-from backend.core.factory.ai_factory import AIFactory
-from backend.core.abstract.ai import AIConfig
+from backend.core.factory.provider_registry import get_provider_registry
+from backend.core.utils.stage_timer import StageTimer, latency_histograms
+from backend.modules.chat.hedging import get_model_latency_tracker, get_hedge_stats
+from backend.core.utils.circuit_breaker import get_circuit_breakers, FAILURE_RATE_LIMIT
+from backend.core.utils.rate_limiter import get_rate_limiters
+from backend.core.utils.llm_scheduler import get_llm_scheduler
+from backend.core.utils.llm_cache import CachedProvider, cache_ttl
+from backend.core.utils.token_budget import PromptBudget, count_tokens, get_token_usage, model_family, prompt_limit
+from backend.modules.chat.model_router import get_model_router
 from backend.core.utils.constants import (
     ModelFallbackConfig,
+    HedgingConfig,
+    CircuitBreakerConfig,
+    RateLimitConfig,
+    LLMGatewayConfig,
+    LLMPriority,
     UserFeedbackMessages,
     LogPrefixes,
     LogEmojis
@@ -48,6 +67,13 @@ class ModelFallbackOrchestrator:
         self.model_manager = ModelManager()
         self.retry_delay = ModelFallbackConfig.RETRY_DELAY_SECONDS
         self.max_retries_per_model = ModelFallbackConfig.MAX_RETRIES_PER_MODEL
+        self.latency = get_model_latency_tracker()
+        self.hedge_stats = get_hedge_stats()
+        self.breakers = get_circuit_breakers()
+        self.router = get_model_router()
+        self.rate_limits = get_rate_limiters()
+        self.providers = get_provider_registry()
+        self.scheduler = get_llm_scheduler()
         
     def _get_prioritized_models(self) -> List[Dict[str, Any]]:
         """
@@ -66,20 +92,73 @@ class ModelFallbackOrchestrator:
         
         sorted_models = sorted(enabled_models, key=get_priority, reverse=True)
         
-        logger.info(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.SEARCH} Modelos disponibles ordenados por prioridad:")
+        # Circuitos abiertos: el modelo se salta sin intentarlo
+        skipped = [m for m in sorted_models if not self.breakers.get(m.get('id', '')).is_available()]
+        if skipped:
+            logger.info(
+                f"{LogPrefixes.AI_PROVIDER} ⛔ Circuito abierto, se omiten: "
+                f"{', '.join(m.get('name', m.get('id', '')) for m in skipped)}"
+            )
+            sorted_models = [m for m in sorted_models if m not in skipped]
+        
+        # Orden adaptativo según lo observado (la prioridad estática desempata)
+        sorted_models = self.router.order(sorted_models)
+        
+        # Claves sin cuota disponible a corto plazo: al final, para no esperar ni provocar un 429
+        deferred = [
+            m for m in sorted_models
+            if self.rate_limits.get(m).wait_time() > RateLimitConfig.MAX_WAIT_SECONDS
+        ]
+        if deferred:
+            logger.info(
+                f"{LogPrefixes.AI_PROVIDER} ⏳ Límite de tasa, se posponen: "
+                f"{', '.join(m.get('name', m.get('id', '')) for m in deferred)}"
+            )
+            sorted_models = [m for m in sorted_models if m not in deferred] + deferred
+        
+        logger.info(
+            f"{LogPrefixes.AI_PROVIDER} {LogEmojis.SEARCH} Modelos disponibles ordenados "
+            f"(objetivo: {self.router.objective}):"
+        )
         for idx, model in enumerate(sorted_models, 1):
             priority = get_priority(model)
             logger.info(f"  {idx}. {model.get('name')} (prioridad: {priority})")
         
         return sorted_models
     
+    def prompt_budget(self) -> PromptBudget:
+        """Presupuesto de prompt común a los modelos habilitados (el del más restrictivo)."""
+        return PromptBudget([m for m in self.model_manager.list_models() if m.get('enabled', False)])
+    
+    def _record_usage(
+        self,
+        model_config: Dict[str, Any],
+        system_prompt: str,
+        user_message: str,
+        response: Any,
+        actual_tokens: Optional[int]
+    ):
+        """Tokens estimados frente a los informados (calibra la estimación de la familia)."""
+        if not isinstance(response, str):
+            response = json.dumps(response, ensure_ascii=False)
+        family = model_family(model_config)
+        get_token_usage().record(
+            model_config,
+            len(system_prompt) + len(user_message) + len(response),
+            count_tokens(system_prompt, user_message, response, family=family),
+            actual_tokens
+        )
+    
     async def _try_model(
         self,
         model_config: Dict[str, Any],
         system_prompt: str,
         user_message: str,
-        attempt: int = 1
-    ) -> Optional[str]:
+        attempt: int = 1,
+        on_partial: Optional[Callable[[str], bool]] = None,
+        use_case: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> Optional[Any]:
         """
         Intenta generar respuesta con un modelo específico.
         
@@ -88,6 +167,10 @@ class ModelFallbackOrchestrator:
             system_prompt: Prompt del sistema
             user_message: Mensaje del usuario
             attempt: Número de intento actual
+            on_partial: Si se indica, la respuesta se recibe en streaming y se
+                llama con el texto acumulado; devolver True corta la generación
+            use_case: Caso de uso para la caché de respuestas (None: sin caché)
+            schema: Si se indica, se pide JSON con este esquema (respuesta dict)
             
         Returns:
             Respuesta del modelo o None si falla
@@ -101,60 +184,310 @@ class ModelFallbackOrchestrator:
                 f"Intentando con {model_name} (intento {attempt}/{self.max_retries_per_model + 1})"
             )
             
-            # Configurar provider
-            provider_schema = model_config.get('schema', model_config.get('provider'))
-            provider = AIFactory.get_provider(provider_schema)
-            
             api_key = model_config.get('api_key')
             if not api_key:
                 logger.error(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.ERROR} No API key para {model_name}")
                 return None
             
-            # Crear configuración
-            ai_config_params = {
-                'api_key': api_key,
-                'model': model_config['model_id']
-            }
-            if model_config.get('base_url'):
-                ai_config_params['base_url'] = model_config['base_url']
-            if model_config.get('headers'):
-                ai_config_params['headers'] = model_config['headers']
-            
-            ai_config = AIConfig(**ai_config_params)
-            provider.configure(ai_config)
-            
-            # Generar respuesta
-            response = await provider.generate_text(
-                prompt=user_message,
-                system_instruction=system_prompt
+            # Provider ya configurado (cliente y conexiones reutilizados entre llamadas)
+            provider = self.providers.for_model(model_config, use_case)
+        except Exception as e:
+            logger.error(
+                f"{LogPrefixes.AI_PROVIDER} {LogEmojis.ERROR} "
+                f"Error configurando {model_name}: {str(e)}"
+            )
+            return None
+        
+        # Un prompt que no cabe en la ventana de contexto fallaría: se pasa al siguiente modelo sin gastar intento
+        prompt_tokens = count_tokens(system_prompt, user_message, family=model_family(model_config))
+        if prompt_tokens > prompt_limit(model_config):
+            logger.warning(
+                f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} Prompt de ~{prompt_tokens} tokens excede "
+                f"el contexto de {model_name} ({prompt_limit(model_config)}), se omite"
             )
+            return None
+        
+        # Cuota de la clave: esperar el turno si es corto, si no desviar al siguiente modelo
+        limiter = self.rate_limits.get(model_config)
+        tokens = prompt_tokens + RateLimitConfig.EXPECTED_OUTPUT_TOKENS
+        if not await limiter.acquire(tokens):
+            logger.info(f"{LogPrefixes.AI_PROVIDER} ⏳ Cuota agotada para {model_name}, se desvía al siguiente modelo")
+            return None
+        
+        breaker = self.breakers.get(model_id)
+        if not breaker.allow_request():
+            logger.info(f"{LogPrefixes.AI_PROVIDER} ⛔ Circuito abierto para {model_name}, se omite")
+            return None
+        
+        started = time.perf_counter()
+        call = CallMetadata()  # Cabeceras y uso de esta llamada (el provider se comparte entre peticiones)
+        try:
+            # Generar respuesta
+            if schema:
+                generation = provider.generate_json(
+                    prompt=user_message,
+                    schema=schema,
+                    system_instruction=system_prompt,
+                    call=call
+                )
+            elif on_partial:
+                generation = self._stream_until(provider, system_prompt, user_message, on_partial, model_config, call)
+            else:
+                generation = provider.generate_text(
+                    prompt=user_message,
+                    system_instruction=system_prompt,
+                    call=call
+                )
+            response = await asyncio.wait_for(generation, timeout=CircuitBreakerConfig.CALL_TIMEOUT_SECONDS)
             
+            limiter.observe_response(call.response_headers, tokens, call.usage_tokens)
             if response:
+                breaker.record_success()
+                self.router.record_call(model_id, time.perf_counter() - started, True)
+                if not on_partial:
+                    self._record_usage(model_config, system_prompt, user_message, response, call.usage_tokens)
                 logger.info(
                     f"{LogPrefixes.AI_PROVIDER} {LogEmojis.SUCCESS} "
                     f"Respuesta exitosa de {model_name}"
                 )
                 return response
             else:
+                breaker.record_failure("empty response")
+                self.router.record_call(model_id, time.perf_counter() - started, False)
                 logger.warning(
                     f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} "
                     f"Respuesta vacía de {model_name}"
                 )
                 return None
                 
+        except asyncio.CancelledError:
+            # Cobertura perdida o plazo agotado: la llamada duró al menos esto
+            self.router.record_cancelled(model_id, time.perf_counter() - started)
+            raise
         except Exception as e:
+            kind = breaker.record_failure(e)
+            self.router.record_call(model_id, time.perf_counter() - started, False)
+            if kind == FAILURE_RATE_LIMIT:
+                blocked = limiter.record_rate_limited(e)
+                logger.warning(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} {model_name}: 429, clave bloqueada {blocked:.1f}s")
             logger.error(
                 f"{LogPrefixes.AI_PROVIDER} {LogEmojis.ERROR} "
-                f"Error con {model_name}: {str(e)}"
+                f"Error con {model_name} ({kind}): {str(e) or type(e).__name__}"
             )
             return None
     
+    def _cached_response(
+        self,
+        models: List[Dict[str, Any]],
+        system_prompt: str,
+        user_message: str,
+        use_case: str,
+        schema: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[Any], Optional[str]]:
+        """Primera respuesta en caché de los modelos, en orden de prioridad."""
+        for model_config in models:
+            if not model_config.get('api_key'):
+                continue
+            try:
+                provider = self.providers.for_model(model_config, use_case)
+            except Exception:
+                continue  # Se informará al intentarlo
+            if not isinstance(provider, CachedProvider):
+                return None, None
+            cached = provider.cached(user_message, system_prompt, schema)
+            if cached:
+                logger.info(f"{LogPrefixes.AI_PROVIDER} 💾 Respuesta de {model_config.get('name', 'Unknown')} servida desde la caché ({use_case})")
+                return cached, model_config.get('id', '')
+        return None, None
+    
+    async def _stream_until(
+        self,
+        provider: Any,
+        system_prompt: str,
+        user_message: str,
+        on_partial: Callable[[str], bool],
+        model_config: Optional[Dict[str, Any]] = None,
+        call: Optional[CallMetadata] = None
+    ) -> str:
+        """Consume el stream del modelo hasta el final o hasta que on_partial pida parar."""
+        text = ""
+        async with aclosing(provider.stream_text(prompt=user_message, system_instruction=system_prompt, call=call)) as stream:
+            async for event in stream:
+                if event.done:
+                    self._record_stream(event.metadata)
+                    if model_config:
+                        # Solo streams completos: uno cortado no informa del uso
+                        usage = event.metadata.get('usage') or {}
+                        self._record_usage(model_config, system_prompt, user_message, text, usage.get('total_tokens'))
+                    break
+                text += event.text
+                if on_partial(text):
+                    logger.info(f"{LogPrefixes.AI_PROVIDER} ✂️ Generación cortada: bloque SQL completo recibido")
+                    break
+        return text
+    
+    @staticmethod
+    def _record_stream(metadata: Dict[str, Any]):
+        """TTFT y tokens/s del stream completo (histograma llm_ttft en /api/chat/latency)."""
+        latency_histograms.observe('llm_ttft', metadata['ttft_ms'])
+        logger.info(
+            f"{LogPrefixes.AI_PROVIDER} ⏱️ Primer token en {metadata['ttft_ms']} ms, "
+            f"{metadata['output_tokens']} tokens a {metadata['tokens_per_second']} tokens/s"
+        )
+    
+    async def _attempt(
+        self,
+        model_config: Dict[str, Any],
+        system_prompt: str,
+        user_message: str,
+        limits: Optional[Any],
+        on_partial: Optional[Callable[[str], bool]],
+        attempt: int = 1,
+        timer: Optional[StageTimer] = None,
+        stage: Optional[str] = None,
+        priority: str = LLMPriority.INTERACTIVE,
+        use_case: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> Optional[Any]:
+        """Un intento con un modelo: ocupa un hueco de su prioridad, respeta los límites del lote y registra su latencia."""
+        provider_schema = model_config.get('schema', model_config.get('provider'))
+        slot = limits.provider(provider_schema) if limits else nullcontext()
+        async with self.scheduler.slot(priority), slot:
+            with timer.stage(stage) if timer else nullcontext():
+                started = time.perf_counter()
+                try:
+                    response = await self._try_model(
+                        model_config=model_config,
+                        system_prompt=system_prompt,
+                        user_message=user_message,
+                        attempt=attempt,
+                        on_partial=on_partial,
+                        use_case=use_case,
+                        schema=schema
+                    )
+                except asyncio.CancelledError:
+                    self.latency.observe_cancelled(model_config.get('id', ''), time.perf_counter() - started)
+                    raise
+        if response:
+            self.latency.observe(model_config.get('id', ''), time.perf_counter() - started)
+        return response
+    
+    async def _execute_hedged(
+        self,
+        models: List[Dict[str, Any]],
+        system_prompt: str,
+        user_message: str,
+        feedback_callback: Optional[callable],
+        timer: StageTimer,
+        stage: str,
+        limits: Optional[Any],
+        on_partial: Optional[Callable[[str], bool]],
+        use_case: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Carrera entre modelos en orden de prioridad, sin esperas entre intentos.
+        
+        - Si el modelo en curso supera su umbral (percentil de latencia), se
+          lanza el siguiente modelo sin cancelar el primero (cobertura).
+        - Si un modelo falla, se lanza el siguiente de inmediato.
+        - La primera respuesta válida gana y se cancelan las demás.
+        
+        Cada modelo se intenta una sola vez. Solo un intento en curso recibe
+        on_partial (p. ej. la ejecución anticipada de la SQL): las coberturas
+        generan sin él, y si ese intento falla lo recibe el siguiente lanzado.
+        
+        Returns:
+            Tupla (respuesta, model_id) o (None, None) si todos fallan
+        """
+        pending: Dict[asyncio.Task, Tuple[Dict[str, Any], float]] = {}
+        hedge_tasks = set()
+        next_index = 0
+        hedges = 0
+        primary_id = models[0].get('id', '')
+        race_started = time.perf_counter()
+        partial_owner: Optional[asyncio.Task] = None
+        
+        def launch(as_hedge: bool = False):
+            nonlocal next_index, partial_owner
+            model_config = models[next_index]
+            next_index += 1
+            if feedback_callback:
+                feedback_callback(UserFeedbackMessages.TRYING_MODEL.format(model_name=model_config.get('name', 'Unknown')))
+            owns_partial = on_partial is not None and partial_owner not in pending
+            task = asyncio.create_task(
+                self._attempt(
+                    model_config, system_prompt, user_message, limits, on_partial if owns_partial else None,
+                    use_case=use_case, schema=schema
+                )
+            )
+            if owns_partial:
+                partial_owner = task
+            pending[task] = (model_config, time.perf_counter())
+            if as_hedge:
+                hedge_tasks.add(task)
+        
+        with timer.stage(stage):
+            launch()
+            try:
+                while pending:
+                    newest_config, newest_started = max(pending.values(), key=lambda entry: entry[1])
+                    timeout = None
+                    if next_index < len(models) and len(pending) < HedgingConfig.MAX_IN_FLIGHT:
+                        threshold = self.latency.threshold(newest_config.get('id', ''))
+                        timeout = max(0.0, threshold - (time.perf_counter() - newest_started))
+                    
+                    done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        logger.info(
+                            f"{LogPrefixes.AI_PROVIDER} 🛡️ {newest_config.get('name')} supera su umbral "
+                            f"de {threshold:.1f}s: se lanza {models[next_index].get('name')} en paralelo"
+                        )
+                        hedges += 1
+                        launch(as_hedge=True)
+                        continue
+                    
+                    for task in done:
+                        model_config, _ = pending.pop(task)
+                        response = task.result()
+                        if not response:
+                            continue
+                        
+                        hedge_won = task in hedge_tasks
+                        saved_ms = 0.0
+                        if hedge_won and any(cfg.get('id') == primary_id for cfg, _ in pending.values()):
+                            # El principal seguía en curso: estimar cuánto le faltaba
+                            waited = time.perf_counter() - race_started
+                            tail = self.latency.tail_mean(primary_id, waited)
+                            saved_ms = max(0.0, (tail - waited) * 1000) if tail else 0.0
+                        self.hedge_stats.record(hedges, hedge_won, saved_ms)
+                        if feedback_callback:
+                            feedback_callback(UserFeedbackMessages.SUCCESS.format(model_name=model_config.get('name', 'Unknown')))
+                        return response, model_config.get('id', '')
+                    
+                    # Fallos: pasar al siguiente modelo sin esperar
+                    while next_index < len(models) and len(pending) < HedgingConfig.MAX_IN_FLIGHT:
+                        launch()
+            finally:
+                for task in pending:
+                    task.cancel()
+        
+        return None, None
+    
     async def execute_with_fallback(
         self,
         system_prompt: str,
         user_message: str,
-        feedback_callback: Optional[callable] = None
-    ) -> Tuple[Optional[str], Optional[str]]:
+        feedback_callback: Optional[callable] = None,
+        timer: Optional[StageTimer] = None,
+        stage: str = "llm_generation",
+        limits: Optional[Any] = None,
+        on_partial: Optional[Callable[[str], bool]] = None,
+        priority: str = LLMPriority.INTERACTIVE,
+        deadline_seconds: Optional[float] = None,
+        use_case: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[Any], Optional[str]]:
         """
         Ejecuta generación de respuesta con fallback entre modelos.
         
@@ -162,10 +495,52 @@ class ModelFallbackOrchestrator:
             system_prompt: Prompt del sistema
             user_message: Mensaje del usuario
             feedback_callback: Función opcional para enviar feedback al usuario
+            timer: Cronómetro de etapas de la petición (opcional)
+            stage: Etapa en la que se acumula el tiempo de las llamadas al modelo
+            limits: BatchLimits opcional para acotar la concurrencia por proveedor
+            on_partial: Callback de streaming (ver _try_model)
+            priority: Prioridad en el planificador (LLMPriority)
+            deadline_seconds: Plazo total (por defecto el de la prioridad)
+            use_case: Caso de uso para la caché de respuestas (None: sin caché)
+            schema: Si se indica, la respuesta es un dict JSON con este esquema
             
         Returns:
-            Tupla (respuesta, model_id) o (None, None) si todos fallan
+            Tupla (respuesta, model_id) o (None, None) si todos fallan o vence el plazo
         """
+        timer = timer or StageTimer()
+        deadline = deadline_seconds or LLMGatewayConfig.DEADLINE_SECONDS[priority]
+        try:
+            return await asyncio.wait_for(
+                self._run_fallback(
+                    system_prompt, user_message, feedback_callback, timer, stage,
+                    limits, on_partial, priority, use_case, schema
+                ),
+                timeout=deadline
+            )
+        except asyncio.TimeoutError:
+            self.scheduler.record_deadline_miss(priority)
+            logger.error(
+                f"{LogPrefixes.AI_PROVIDER} {LogEmojis.ERROR} Plazo de {deadline:.0f}s agotado "
+                f"(prioridad {priority}), se abandona la petición"
+            )
+            if feedback_callback:
+                feedback_callback(UserFeedbackMessages.ALL_MODELS_FAILED)
+            return None, None
+    
+    async def _run_fallback(
+        self,
+        system_prompt: str,
+        user_message: str,
+        feedback_callback: Optional[callable],
+        timer: StageTimer,
+        stage: str,
+        limits: Optional[Any],
+        on_partial: Optional[Callable[[str], bool]],
+        priority: str,
+        use_case: Optional[str],
+        schema: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[Any], Optional[str]]:
+        """Recorre los modelos en orden (carrera con cobertura solo para peticiones interactivas)."""
         prioritized_models = self._get_prioritized_models()
         
         if not prioritized_models:
@@ -174,6 +549,25 @@ class ModelFallbackOrchestrator:
                 feedback_callback(UserFeedbackMessages.ALL_MODELS_FAILED)
             return None, None
         
+        # Respuesta ya guardada para algún modelo candidato: sin cuota, circuito, hueco ni estadísticas
+        if cache_ttl(use_case) and not on_partial:
+            cached, model_id = self._cached_response(prioritized_models, system_prompt, user_message, use_case, schema)
+            if cached is not None:
+                return cached, model_id
+        
+        # En segundo plano no se lanzan llamadas de cobertura: ocuparían huecos y cuota del chat
+        if HedgingConfig.ENABLED and priority == LLMPriority.INTERACTIVE and len(prioritized_models) > 1:
+            response, model_id = await self._execute_hedged(
+                prioritized_models, system_prompt, user_message,
+                feedback_callback, timer, stage, limits, on_partial, use_case, schema
+            )
+            if response:
+                return response, model_id
+            logger.error(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.ERROR} Todos los modelos fallaron (hedging)")
+            if feedback_callback:
+                feedback_callback(UserFeedbackMessages.ALL_MODELS_FAILED)
+            return None, None
+        
         # Iterar por cada modelo
         for model_idx, model_config in enumerate(prioritized_models):
             model_name = model_config.get('name', 'Unknown')
@@ -203,11 +597,10 @@ class ModelFallbackOrchestrator:
                         )
                 
                 # Intentar generación
-                response = await self._try_model(
-                    model_config=model_config,
-                    system_prompt=system_prompt,
-                    user_message=user_message,
-                    attempt=attempt
+                response = await self._attempt(
+                    model_config, system_prompt, user_message, limits, on_partial,
+                    attempt=attempt, timer=timer, stage=stage,
+                    priority=priority, use_case=use_case, schema=schema
                 )
                 
                 if response:
@@ -218,8 +611,18 @@ class ModelFallbackOrchestrator:
                         )
                     return response, model_id
                 
+                # Circuito abierto tras el fallo: pasar al siguiente modelo sin esperar
+                if not self.breakers.get(model_id).is_available():
+                    break
+                
                 # Si falló y quedan reintentos, esperar
                 if attempt < self.max_retries_per_model + 1:
+                    # Límite de tasa: la espera la marca el proveedor (Retry-After), no un retraso fijo
+                    quota_wait = self.rate_limits.get(model_config).wait_time()
+                    if quota_wait > RateLimitConfig.MAX_WAIT_SECONDS:
+                        break
+                    if quota_wait > 0:
+                        continue
                     logger.info(
                         f"{LogPrefixes.AI_PROVIDER} ⏳ "
                         f"Esperando {self.retry_delay}s antes de reintentar..."
@@ -228,7 +631,8 @@ class ModelFallbackOrchestrator:
                         feedback_callback(
                             UserFeedbackMessages.WAITING.format(seconds=self.retry_delay)
                         )
-                    await asyncio.sleep(self.retry_delay)
+                    with timer.stage("fallback_wait"):
+                        await asyncio.sleep(self.retry_delay)
         
         # Todos los modelos fallaron
         logger.error(
@@ -239,3 +643,14 @@ class ModelFallbackOrchestrator:
             feedback_callback(UserFeedbackMessages.ALL_MODELS_FAILED)
         
         return None, None
+
+
+# Instancia global del orquestador: gateway único de las llamadas a modelos
+_llm_gateway = None
+
+def get_llm_gateway() -> ModelFallbackOrchestrator:
+    """Obtener instancia global del gateway de IA (orquestador compartido)"""
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = ModelFallbackOrchestrator()
+    return _llm_gateway
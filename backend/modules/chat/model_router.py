@@ -0,0 +1,201 @@
+"""
+Model Router - Orden adaptativo de modelos
+
+MODEL_PRIORITY es estático; aquí se mide lo que realmente ocurre por modelo
+con medias exponenciales (EWMA): latencia de las respuestas correctas, tasa
+de éxito y tasa de SQL válida a la primera (sin corrección). Los candidatos
+se ordenan según un objetivo configurable:
+
+- latency: tiempo esperado hasta una respuesta correcta (latencia / éxito)
+- cost: coste esperado por respuesta correcta (coste / éxito)
+- quality: SQL válida × éxito
+
+Los modelos con pocas muestras conservan su orden estático detrás de los
+medidos; con probabilidad EXPLORATION_RATE se adelanta uno al azar
+(preferentemente poco medido) para seguir aprendiendo. Las estadísticas se
+guardan en disco y sobreviven a los reinicios.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.core.utils.constants import ModelRouterConfig, LogPrefixes, LogEmojis
+from backend.core.utils.storage import get_data_path
+
+logger = logging.getLogger(__name__)
+
+
+def _ewma(previous: Optional[float], value: float) -> float:
+    if previous is None:
+        return value
+    return ModelRouterConfig.EWMA_ALPHA * value + (1 - ModelRouterConfig.EWMA_ALPHA) * previous
+
+
+class AdaptiveModelRouter:
+    """Estadísticas EWMA por modelo y orden de candidatos según el objetivo."""
+
+    def __init__(self, file_path: Optional[str] = None):
+        self.file_path = str(file_path or get_data_path(ModelRouterConfig.FILE))
+        self.objective = ModelRouterConfig.OBJECTIVE
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self.explorations = 0
+        self._load()
+
+    def _entry(self, model_id: str) -> Dict[str, Any]:
+        if model_id not in self._stats:
+            self._stats[model_id] = {
+                'latency_s': None, 'success_rate': None, 'sql_valid_rate': None,
+                'calls': 0, 'sql_checks': 0, 'updated_at': None
+            }
+        return self._stats[model_id]
+
+    def record_call(self, model_id: str, seconds: float, success: bool):
+        """Registra una llamada (la latencia solo cuenta si fue correcta)."""
+        with self._lock:
+            entry = self._entry(model_id)
+            entry['calls'] += 1
+            entry['success_rate'] = _ewma(entry['success_rate'], 1.0 if success else 0.0)
+            if success:
+                entry['latency_s'] = _ewma(entry['latency_s'], seconds)
+            entry['updated_at'] = time.time()
+            self._dirty = True
+        self._save_if_due()
+
+    def record_cancelled(self, model_id: str, seconds: float):
+        """
+        Registra una llamada cancelada (cobertura perdida o plazo agotado).
+
+        No es un fallo, pero la latencia real fue al menos `seconds`: si ya
+        supera la estimada, la media sube hacia ese mínimo. Sin esto, un
+        modelo que se ralentiza pierde siempre la carrera y conserva su
+        latencia rápida antigua.
+        """
+        with self._lock:
+            entry = self._entry(model_id)
+            entry['cancelled'] = entry.get('cancelled', 0) + 1
+            if entry['latency_s'] is None or seconds > entry['latency_s']:
+                entry['latency_s'] = _ewma(entry['latency_s'], seconds)
+            entry['updated_at'] = time.time()
+            self._dirty = True
+        self._save_if_due()
+
+    def record_sql(self, model_id: str, valid: bool):
+        """Registra si la SQL generada por el modelo se ejecutó sin corrección."""
+        if not model_id:
+            return
+        with self._lock:
+            entry = self._entry(model_id)
+            entry['sql_checks'] += 1
+            entry['sql_valid_rate'] = _ewma(entry['sql_valid_rate'], 1.0 if valid else 0.0)
+            self._dirty = True
+        self._save_if_due()
+
+    @staticmethod
+    def _cost(model: Dict[str, Any]) -> float:
+        return model.get('cost_per_mtok') or ModelRouterConfig.COST_PER_MTOK.get(
+            model.get('id', ''), ModelRouterConfig.DEFAULT_COST_PER_MTOK
+        )
+
+    def _score(self, model: Dict[str, Any], entry: Dict[str, Any]) -> tuple:
+        """Clave de orden (menor = mejor) según el objetivo."""
+        success = max(entry['success_rate'] if entry['success_rate'] is not None else 1.0, ModelRouterConfig.MIN_SUCCESS_RATE)
+        expected_latency = (entry['latency_s'] or 0.0) / success
+        if self.objective == "cost":
+            return (self._cost(model) / success, expected_latency)
+        if self.objective == "quality":
+            sql_valid = entry['sql_valid_rate'] if entry['sql_valid_rate'] is not None else 1.0
+            return (-(sql_valid * success), expected_latency)
+        return (expected_latency,)
+
+    def order(self, models: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Ordena los candidatos (ya en orden de prioridad estática).
+
+        Returns:
+            Medidos por el objetivo, después los poco medidos en su orden
+            estático; ocasionalmente uno adelantado para explorar
+        """
+        if not ModelRouterConfig.ENABLED or len(models) < 2:
+            return models
+        with self._lock:
+            entries = {m.get('id', ''): dict(self._entry(m.get('id', ''))) for m in models}
+
+        measured = [m for m in models if entries[m.get('id', '')]['calls'] >= ModelRouterConfig.MIN_SAMPLES]
+        cold = [m for m in models if m not in measured]
+        ordered = sorted(measured, key=lambda m: self._score(m, entries[m.get('id', '')])) + cold
+
+        if random.random() < ModelRouterConfig.EXPLORATION_RATE:
+            pool = cold or ordered[1:]
+            explored = random.choice(pool)
+            ordered = [explored] + [m for m in ordered if m is not explored]
+            with self._lock:
+                self.explorations += 1
+            logger.info(f"{LogPrefixes.AI_PROVIDER} 🎲 Exploración: se prueba primero {explored.get('name', explored.get('id'))}")
+        return ordered
+
+    def set_objective(self, objective: str):
+        if objective not in ModelRouterConfig.OBJECTIVES:
+            raise ValueError(f"Objetivo no válido: {objective} (opciones: {', '.join(ModelRouterConfig.OBJECTIVES)})")
+        self.objective = objective
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': ModelRouterConfig.ENABLED,
+                'objective': self.objective,
+                'explorations': self.explorations,
+                'models': {
+                    model_id: {k: (round(v, 4) if isinstance(v, float) else v) for k, v in entry.items()}
+                    for model_id, entry in self._stats.items()
+                }
+            }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} No se pudieron cargar las estadísticas de modelos: {e}")
+            return
+        self._stats = data.get('models', {})
+
+    def _save_if_due(self):
+        if time.time() - self._last_save >= ModelRouterConfig.SAVE_INTERVAL_SECONDS:
+            self.save()
+
+    def save(self):
+        """Guarda las estadísticas si han cambiado."""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                with open(self.file_path, 'w', encoding='utf-8') as f:
+                    json.dump({'models': self._stats}, f, ensure_ascii=False)
+                self._dirty = False
+            except Exception as e:
+                logger.warning(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} No se pudieron guardar las estadísticas de modelos: {e}")
+            self._last_save = time.time()
+
+
+# Instancia global del router de modelos
+_model_router = None
+
+def get_model_router() -> AdaptiveModelRouter:
+    """Obtener instancia global del router adaptativo de modelos"""
+    global _model_router
+    if _model_router is None:
+        _model_router = AdaptiveModelRouter()
+    return _model_router
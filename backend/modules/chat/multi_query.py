@@ -0,0 +1,170 @@
+"""
+Multi Query - Planes de varias consultas SQL independientes
+
+Las preguntas comparativas ("ventas de este mes vs el pasado por cliente")
+se descomponen en varias consultas independientes, cada una en su bloque
+```sql con una cabecera `-- etiqueta: <nombre> | clave: <COL1, COL2>`.
+Se ejecutan a la vez, cada una por su propia conexión, y los resultados se
+combinan aquí: unión externa por las columnas clave o, sin clave, filas
+apiladas con la etiqueta de su consulta.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.core.utils.constants import MultiQueryConfig, SQLDelimiters, LogPrefixes
+
+logger = logging.getLogger(__name__)
+
+_SQL_BLOCK = re.compile(re.escape(SQLDelimiters.START) + r'\s*(.*?)' + re.escape(SQLDelimiters.END), re.DOTALL)
+_HEADER = re.compile(r'^\s*--\s*etiqueta\s*:\s*(?P<label>[^|\n]+?)\s*(?:\|\s*clave\s*:\s*(?P<keys>[^\n]+?))?\s*$', re.IGNORECASE | re.MULTILINE)
+
+
+class SubQuery:
+    """Consulta de un plan, con su etiqueta y columnas clave para combinar."""
+
+    def __init__(self, label: str, sql: str, keys: List[str]):
+        self.label = label
+        self.sql = sql
+        self.keys = keys
+
+
+def complete_sql_blocks(text: str) -> List[str]:
+    """Cuerpos de los bloques ```sql ya cerrados (también sobre texto parcial)."""
+    return _SQL_BLOCK.findall(text)
+
+
+def is_plan_block(block: str) -> bool:
+    """True si el bloque lleva la cabecera `-- etiqueta:` de un plan."""
+    return _HEADER.search(block) is not None
+
+
+def clean_plan_block(block: str) -> str:
+    """SQL de un bloque de plan, sin cabecera ni punto y coma final."""
+    return _HEADER.sub('', block).strip().rstrip(';').strip()
+
+
+def parse_sql_plan(response_text: str) -> List[SubQuery]:
+    """
+    Extrae las consultas SQL de la respuesta del modelo.
+
+    Args:
+        response_text: Respuesta con uno o varios bloques ```sql
+
+    Returns:
+        Lista de SubQuery (una sola si no hay plan)
+    """
+    plan = []
+    for index, block in enumerate(complete_sql_blocks(response_text)):
+        header = _HEADER.search(block)
+        label = re.sub(r'\W+', '_', header.group('label')).strip('_').upper() if header else f"Q{index + 1}"
+        keys = [k.strip().upper() for k in (header.group('keys') or '').split(',') if k.strip()] if header else []
+        sql = clean_plan_block(block)
+        label = label or f"Q{index + 1}"
+        if any(sq.label == label for sq in plan):
+            label = f"{label}_{index + 1}"
+        if sql:
+            plan.append(SubQuery(label, sql, keys))
+    return plan[:MultiQueryConfig.MAX_SUBQUERIES]
+
+
+async def run_plan(
+    plan: List[SubQuery],
+    run_one: Callable[[SubQuery], Awaitable[List[Dict[str, Any]]]]
+) -> Tuple[List[Tuple[SubQuery, List[Dict[str, Any]]]], Dict[str, Any]]:
+    """
+    Ejecuta las consultas del plan concurrentemente.
+
+    Args:
+        plan: Consultas a ejecutar
+        run_one: Corrutina que ejecuta una consulta (con su propia conexión)
+
+    Returns:
+        Tupla (resultados por consulta, informe de tiempos)
+
+    Raises:
+        Exception: La primera consulta que falle (tras sus correcciones)
+    """
+    durations: Dict[str, float] = {}
+
+    async def timed(sub_query: SubQuery):
+        started = time.perf_counter()
+        try:
+            return await run_one(sub_query)
+        finally:
+            durations[sub_query.label] = round((time.perf_counter() - started) * 1000, 1)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(timed(sub_query) for sub_query in plan))
+    wall_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    report = {
+        'subqueries': [
+            {'label': sq.label, 'sql': sq.sql, 'keys': sq.keys, 'rows': len(rows), 'ms': durations.get(sq.label)}
+            for sq, rows in zip(plan, results)
+        ],
+        'wall_ms': wall_ms,
+        'sum_ms': round(sum(durations.values()), 1)
+    }
+    logger.info(
+        f"{LogPrefixes.SQL} 🔀 Plan de {len(plan)} consultas en {wall_ms} ms "
+        f"(secuencial habría sido ~{report['sum_ms']} ms)"
+    )
+    return list(zip(plan, results)), report
+
+
+def _find_column(row: Dict[str, Any], name: str) -> Optional[str]:
+    return next((column for column in row if column.upper() == name), None)
+
+
+def _unique_keys(rows: List[Dict[str, Any]], keys: List[str]) -> bool:
+    """True si ninguna fila repite la combinación de columnas clave."""
+    key_columns = [_find_column(rows[0], k) for k in keys]
+    return len({tuple(row.get(c) for c in key_columns) for row in rows}) == len(rows)
+
+
+def merge_results(results: List[Tuple[SubQuery, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Combina los resultados de un plan.
+
+    - Con columnas clave presentes en todos los resultados y sin claves
+      repetidas: unión externa por la clave; las demás columnas llevan el
+      sufijo de la etiqueta.
+    - Todas de una fila y sin clave (totales): una sola fila combinada.
+    - En otro caso: filas apiladas con la columna CONSULTA.
+    """
+    keys = next((sq.keys for sq, _ in results if sq.keys), [])
+    non_empty = [(sq, rows) for sq, rows in results if rows]
+    joinable = keys and all(all(_find_column(rows[0], k) for k in keys) for _, rows in non_empty)
+    if joinable and not all(_unique_keys(rows, keys) for _, rows in non_empty):
+        # Varias filas por clave: la unión perdería filas, se apilan
+        logger.info(f"{LogPrefixes.SQL} 🔀 Claves repetidas en el plan ({', '.join(keys)}): resultados apilados")
+        joinable = False
+
+    if joinable:
+        merged: Dict[Tuple, Dict[str, Any]] = {}
+        for sub_query, rows in non_empty:
+            key_columns = [_find_column(rows[0], k) for k in keys]
+            for row in rows:
+                key = tuple(row[c] for c in key_columns)
+                target = merged.setdefault(key, dict(zip(keys, key)))
+                for column, value in row.items():
+                    if column not in key_columns:
+                        target[f"{column}_{sub_query.label}"] = value
+        value_columns = [f"{c}_{sq.label}" for sq, rows in non_empty for c in rows[0] if c.upper() not in keys]
+        return [
+            {**{k: row[k] for k in keys}, **{c: row.get(c) for c in value_columns}}
+            for row in merged.values()
+        ]
+
+    if all(len(rows) == 1 for _, rows in results):
+        combined: Dict[str, Any] = {}
+        for sub_query, rows in results:
+            for column, value in rows[0].items():
+                combined[f"{column}_{sub_query.label}"] = value
+        return [combined]
+
+    return [{'CONSULTA': sub_query.label, **row} for sub_query, rows in results for row in rows]
@@ -0,0 +1,242 @@
+"""
+Query Plan Guard - Control de coste de SQL generado por IA
+
+Antes de ejecutar una consulta generada por el modelo se prepara la sentencia,
+se obtiene su PLAN de Firebird y se estima el coste combinándolo con la
+cardinalidad de cada tabla (record_count de los metadatos).
+
+- Coste bajo: se ejecuta tal cual
+- Coste alto: se prueban reescrituras indexables y se elige el plan más barato
+- Coste excesivo: se rechaza con un error que SQLCorrector puede corregir
+"""
+
+import logging
+import re
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.core.abstract.database import DatabaseDriver
+from backend.core.config.metadata_manager import get_metadata_manager
+from backend.core.utils.constants import QueryCostConfig, LogPrefixes, LogEmojis
+
+logger = logging.getLogger(__name__)
+
+# Acceso a una tabla dentro del PLAN: "D NATURAL", "C INDEX (PK_CLIENTE)", "A ORDER IDX_FECHA"
+_ACCESS_PATTERN = re.compile(
+    r'([A-Z0-9_$]+(?:\s+[A-Z0-9_$]+)?)\s+'
+    r'(NATURAL|INDEX\s*\([^)]*\)|ORDER\s+[A-Z0-9_$]+(?:\s+INDEX\s*\([^)]*\))?)',
+    re.IGNORECASE
+)
+_TABLE_REF_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN)\s+([A-Z0-9_$]+)(?:\s+(?:AS\s+)?([A-Z0-9_$]+))?',
+    re.IGNORECASE
+)
+_NOT_ALIASES = {
+    'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'OUTER', 'CROSS', 'ON',
+    'ORDER', 'GROUP', 'HAVING', 'UNION', 'PLAN', 'ROWS'
+}
+
+# EXTRACT(MONTH FROM col) = N AND EXTRACT(YEAR FROM col) = YYYY (en cualquier orden)
+_EXTRACT_MONTH_YEAR = re.compile(
+    r'EXTRACT\s*\(\s*MONTH\s+FROM\s+([A-Z0-9_.$]+)\s*\)\s*=\s*(\d{1,2})\s+AND\s+'
+    r'EXTRACT\s*\(\s*YEAR\s+FROM\s+\1\s*\)\s*=\s*(\d{4})',
+    re.IGNORECASE
+)
+_EXTRACT_YEAR_MONTH = re.compile(
+    r'EXTRACT\s*\(\s*YEAR\s+FROM\s+([A-Z0-9_.$]+)\s*\)\s*=\s*(\d{4})\s+AND\s+'
+    r'EXTRACT\s*\(\s*MONTH\s+FROM\s+\1\s*\)\s*=\s*(\d{1,2})',
+    re.IGNORECASE
+)
+_EXTRACT_YEAR = re.compile(
+    r'EXTRACT\s*\(\s*YEAR\s+FROM\s+([A-Z0-9_.$]+)\s*\)\s*=\s*(\d{4})',
+    re.IGNORECASE
+)
+
+Rewriter = Callable[[str], str]
+
+
+def resolve_table_aliases(sql: str) -> Dict[str, str]:
+    """
+    Mapea alias (y nombres) de tablas de FROM/JOIN a su tabla real.
+
+    Args:
+        sql: Consulta SQL
+
+    Returns:
+        Diccionario alias -> tabla (en mayúsculas)
+    """
+    aliases = {}
+    for match in _TABLE_REF_PATTERN.finditer(sql):
+        table = match.group(1).upper()
+        aliases[table] = table
+        alias = (match.group(2) or '').upper()
+        if alias and alias not in _NOT_ALIASES:
+            aliases[alias] = table
+    return aliases
+
+
+class QueryCostExceededError(Exception):
+    """La consulta supera el coste máximo permitido."""
+
+    def __init__(self, report: Dict[str, Any]):
+        self.report = report
+        super().__init__(
+            f"{QueryCostConfig.ERROR_MARKER}: coste estimado {report['estimated_rows']:,} filas "
+            f"(máximo {QueryCostConfig.MAX_ESTIMATED_ROWS:,}). PLAN: {report['plan']}. "
+            f"Evita funciones sobre columnas filtradas (EXTRACT, UPPER) y usa rangos "
+            f"FECHA >= ... AND FECHA < ... sobre columnas indexadas."
+        )
+
+
+def _date_range_predicate(column: str, start: date, end: date) -> str:
+    return f"({column} >= '{start.isoformat()}' AND {column} < '{end.isoformat()}')"
+
+
+def _month_range(column: str, year: int, month: int) -> str:
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return _date_range_predicate(column, start, end)
+
+
+def rewrite_literal_date_extracts(sql: str) -> str:
+    """
+    Reescribe filtros EXTRACT con valores literales a rangos semiabiertos indexables.
+
+    EXTRACT(MONTH FROM FECHA) = 10 AND EXTRACT(YEAR FROM FECHA) = 2025
+      -> (FECHA >= '2025-10-01' AND FECHA < '2025-11-01')
+    """
+    def month_year(match):
+        month, year = int(match.group(2)), int(match.group(3))
+        return _month_range(match.group(1), year, month) if 1 <= month <= 12 else match.group(0)
+
+    def year_month(match):
+        year, month = int(match.group(2)), int(match.group(3))
+        return _month_range(match.group(1), year, month) if 1 <= month <= 12 else match.group(0)
+
+    def year_only(match):
+        year = int(match.group(2))
+        return _date_range_predicate(match.group(1), date(year, 1, 1), date(year + 1, 1, 1))
+
+    sql = _EXTRACT_MONTH_YEAR.sub(month_year, sql)
+    sql = _EXTRACT_YEAR_MONTH.sub(year_month, sql)
+    return _EXTRACT_YEAR.sub(year_only, sql)
+
+
+class QueryPlanGuard:
+    """Estima el coste de una consulta a partir de su PLAN y decide si ejecutarla."""
+
+    def __init__(self, rewriters: Optional[List[Rewriter]] = None):
+        self.metadata_manager = get_metadata_manager()
+        self.rewriters: List[Rewriter] = rewriters if rewriters is not None else [rewrite_literal_date_extracts]
+
+    def _cardinality(self, table_name: str) -> int:
+        table_info = self.metadata_manager.get_table_info(table_name.upper()) or {}
+        return table_info.get('record_count') or QueryCostConfig.DEFAULT_TABLE_CARDINALITY
+
+    def estimate_cost(self, plan: str, sql: str) -> Dict[str, Any]:
+        """
+        Estima las filas leídas por un PLAN de Firebird.
+
+        Heurística: NATURAL lee toda la tabla, INDEX una fracción
+        (INDEX_SELECTIVITY) y un NATURAL interno de un JOIN (nested loop)
+        se repite por cada fila del flujo exterior.
+
+        Args:
+            plan: Texto del PLAN devuelto por el driver
+            sql: Consulta original (para resolver alias)
+
+        Returns:
+            Diccionario con accesos, filas estimadas y si hay SORT
+        """
+        aliases = resolve_table_aliases(sql)
+        accesses = []
+        total_rows = 0
+
+        for plan_line in re.findall(r'PLAN\b.*', plan, re.IGNORECASE):
+            line_upper = plan_line.upper()
+            nested_loop = 'JOIN' in line_upper and 'HASH' not in line_upper and 'MERGE' not in line_upper
+            outer_rows = 1
+
+            for position, match in enumerate(_ACCESS_PATTERN.finditer(plan_line)):
+                name = match.group(1).split()[-1].upper()
+                table = aliases.get(name, name)
+                method = match.group(2).split()[0].upper()
+                cardinality = self._cardinality(table)
+
+                rows = cardinality if method in ('NATURAL', 'ORDER') else max(1, int(cardinality * QueryCostConfig.INDEX_SELECTIVITY))
+                cost = rows * outer_rows if nested_loop and position > 0 and method == 'NATURAL' else rows
+                if position == 0:
+                    outer_rows = rows
+
+                accesses.append({'table': table, 'alias': name, 'method': method, 'cardinality': cardinality, 'estimated_rows': cost})
+                total_rows += cost
+
+        return {
+            'plan': plan,
+            'accesses': accesses,
+            'estimated_rows': total_rows,
+            'natural_scans': [a['table'] for a in accesses if a['method'] == 'NATURAL'],
+            'has_sort': 'SORT' in plan.upper()
+        }
+
+    def _plan_and_estimate(self, driver: DatabaseDriver, sql: str) -> Optional[Dict[str, Any]]:
+        plan = driver.get_query_plan(sql)
+        if not plan:
+            return None
+        return self.estimate_cost(plan, sql)
+
+    def review(self, driver: DatabaseDriver, sql: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Revisa el coste de una consulta antes de ejecutarla.
+
+        Args:
+            driver: Driver conectado
+            sql: Consulta a revisar
+
+        Returns:
+            Tupla (consulta a ejecutar, informe con plan y estimación)
+
+        Raises:
+            QueryCostExceededError: Si ninguna variante queda bajo el máximo
+        """
+        if not QueryCostConfig.ENABLED or not sql.lstrip().upper().startswith('SELECT'):
+            return sql, {'verdict': 'skipped', 'sql': sql}
+
+        report = self._plan_and_estimate(driver, sql)
+        if report is None:
+            return sql, {'verdict': 'unknown', 'sql': sql}
+
+        report['sql'] = sql
+        report['rewritten'] = False
+
+        if report['estimated_rows'] > QueryCostConfig.REWRITE_THRESHOLD_ROWS:
+            for rewriter in self.rewriters:
+                candidate = rewriter(report['sql'])
+                if candidate == report['sql']:
+                    continue
+                try:
+                    candidate_report = self._plan_and_estimate(driver, candidate)
+                except Exception as e:
+                    logger.warning(f"{LogPrefixes.SQL} {LogEmojis.WARNING} Reescritura descartada: {str(e)}")
+                    continue
+                if candidate_report and candidate_report['estimated_rows'] < report['estimated_rows']:
+                    logger.info(
+                        f"{LogPrefixes.SQL} 🛠️ Reescritura indexable: {report['estimated_rows']:,} -> "
+                        f"{candidate_report['estimated_rows']:,} filas estimadas"
+                    )
+                    candidate_report.update({'sql': candidate, 'rewritten': True, 'original_sql': sql})
+                    report = candidate_report
+
+        if report['estimated_rows'] > QueryCostConfig.MAX_ESTIMATED_ROWS:
+            report['verdict'] = 'rejected'
+            logger.warning(f"{LogPrefixes.SQL} {LogEmojis.ERROR} Consulta rechazada por coste: {report['plan']}")
+            raise QueryCostExceededError(report)
+
+        report['verdict'] = 'rewritten' if report['rewritten'] else (
+            'expensive' if report['estimated_rows'] > QueryCostConfig.REWRITE_THRESHOLD_ROWS else 'ok'
+        )
+        logger.info(
+            f"{LogPrefixes.SQL} 📐 PLAN: {report['plan']} | coste estimado: "
+            f"{report['estimated_rows']:,} filas ({report['verdict']})"
+        )
+        return report['sql'], report
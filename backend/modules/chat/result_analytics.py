@@ -0,0 +1,352 @@
+"""
+Result Analytics - Preguntas de seguimiento sobre el último resultado
+
+Seguimientos como "ordénalos por precio", "agrúpalos por familia" o "solo los
+de 2025" se resuelven sobre el último resultado de la conversación, guardado
+en forma columnar (arrays NumPy), sin generar SQL nuevo ni consultar Firebird.
+El modelo solo elige la operación (JSON); ordenar, filtrar, agrupar, top-N y
+agrupar por periodo se ejecutan vectorizados aquí.
+"""
+
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from numbers import Number
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from backend.core.utils.constants import FollowUpConfig, LogPrefixes
+from backend.core.utils.structured_output import StructuredOutputError, parse_structured
+
+logger = logging.getLogger(__name__)
+
+# Indicios (sin tildes) de que el mensaje opera sobre el resultado anterior: referencias
+# a él (de estos, ordénalos, del resultado anterior) o frases elípticas (los de 2025,
+# por mes). Superlativos y ordinales sueltos ("el cliente con mayor facturación",
+# "los 10 primeros artículos") son preguntas nuevas y no cuentan.
+FOLLOW_UP_CUES = re.compile(
+    r'\b(?:'
+    r'(?:ordena|agrupa|filtra|quita|deja|separa|suma|cuenta)(?:los|las)|'
+    r'(?:ordena|agrupa|filtra)(?:r)? (?:por|solo)|'
+    r'(?:de|entre|con) (?:ellos|ellas|esos|esas|estos|estas)|'
+    r'(?:esos|esas|estos|estas|los mismos|las mismas)(?: resultados| datos| filas)?$|'
+    r'(?:del|el|los|la|las) (?:resultados?|lista|tabla|listado) anterior(?:es)?|'
+    r'(?:solo|unicamente) (?:los|las) (?:de|del|que|con|sin)'
+    r')\b'
+    r'|^(?:y |ahora )?(?:solo |unicamente )?(?:(?:los|las) (?:de|del|que|con|sin)|por (?:mes|semana|ano|dia))\b'
+)
+
+AGGREGATES = ('count', 'sum', 'avg', 'min', 'max')
+BUCKET_UNITS = ('day', 'week', 'month', 'year')
+
+
+class ColumnarResult:
+    """Filas de un resultado con una copia columnar tipada (numérica, fecha o texto)."""
+
+    def __init__(self, rows: List[Dict[str, Any]], columns: Dict[str, "np.ndarray"], kinds: Dict[str, str]):
+        self.rows = rows
+        self.columns = columns
+        self.kinds = kinds
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "ColumnarResult":
+        names = list(rows[0].keys()) if rows else []
+        columns, kinds = {}, {}
+        for name in names:
+            values = [row.get(name) for row in rows]
+            present = [v for v in values if v is not None]
+            if present and all(isinstance(v, Number) and not isinstance(v, bool) for v in present):
+                kinds[name] = 'number'
+                columns[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+            elif present and all(isinstance(v, (date, datetime)) for v in present):
+                kinds[name] = 'date'
+                columns[name] = np.array(
+                    [np.datetime64('NaT') if v is None else np.datetime64(v.date() if isinstance(v, datetime) else v, 'D') for v in values],
+                    dtype='datetime64[D]'
+                )
+            else:
+                kinds[name] = 'text'
+                columns[name] = np.array(['' if v is None else str(v).strip() for v in values], dtype=object)
+        return cls(rows, columns, kinds)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def take(self, indices: "np.ndarray") -> "ColumnarResult":
+        return ColumnarResult(
+            [self.rows[i] for i in indices],
+            {name: column[indices] for name, column in self.columns.items()},
+            self.kinds
+        )
+
+    def describe(self) -> str:
+        labels = {'number': 'número', 'date': 'fecha', 'text': 'texto'}
+        return ", ".join(f"{name} ({labels[kind]})" for name, kind in self.kinds.items())
+
+
+def _column(result: ColumnarResult, name: Optional[str]) -> str:
+    if not name:
+        raise ValueError("Falta la columna")
+    for column in result.columns:
+        if column.upper() == str(name).upper():
+            return column
+    raise ValueError(f"Columna desconocida: {name}")
+
+
+def _sort_indices(result: ColumnarResult, column: str, descending: bool) -> "np.ndarray":
+    values = result.columns[column]
+    kind = result.kinds[column]
+    valid = ~np.isnan(values) if kind == 'number' else (~np.isnat(values) if kind == 'date' else np.ones(len(values), bool))
+    valid_idx = np.flatnonzero(valid)
+    key = values[valid_idx]
+    if kind == 'text':
+        key = np.array([v.upper() for v in key], dtype=object)
+    order = np.argsort(key, kind='stable')
+    if descending:
+        order = order[::-1]
+    return np.concatenate([valid_idx[order], np.flatnonzero(~valid)]).astype(np.int64)
+
+
+def _filter_mask(result: ColumnarResult, column: str, operator: str, value: Any) -> "np.ndarray":
+    values = result.columns[column]
+    kind = result.kinds[column]
+
+    if kind == 'date' and operator in ('year', 'month'):
+        unit = 'Y' if operator == 'year' else 'M'
+        parts = values.astype(f'datetime64[{unit}]').astype(np.int64)
+        parts = parts + 1970 if unit == 'Y' else parts % 12 + 1
+        return ~np.isnat(values) & (parts == int(value))
+
+    if kind == 'text':
+        target = str(value).upper()
+        upper = np.array([v.upper() for v in values], dtype=object)
+        if operator == 'contains':
+            return np.array([target in v for v in upper], dtype=bool)
+        if operator in ('=', '!='):
+            mask = upper == target
+            return mask if operator == '=' else ~mask
+        raise ValueError(f"Operador '{operator}' no válido para texto")
+
+    target = np.datetime64(str(value)[:10], 'D') if kind == 'date' else float(value)
+    comparisons = {
+        '=': np.equal, '!=': np.not_equal, '>': np.greater, '>=': np.greater_equal,
+        '<': np.less, '<=': np.less_equal
+    }
+    if operator not in comparisons:
+        raise ValueError(f"Operador desconocido: {operator}")
+    return comparisons[operator](values, target)
+
+
+def _aggregate(inverse: "np.ndarray", groups: int, values: Optional["np.ndarray"], aggregate: str) -> "np.ndarray":
+    if aggregate == 'count' or values is None:
+        return np.bincount(inverse, minlength=groups).astype(np.float64)
+    valid = ~np.isnan(values)
+    if aggregate == 'sum':
+        return np.bincount(inverse[valid], weights=values[valid], minlength=groups)
+    if aggregate == 'avg':
+        sums = np.bincount(inverse[valid], weights=values[valid], minlength=groups)
+        counts = np.bincount(inverse[valid], minlength=groups)
+        return np.divide(sums, counts, out=np.full(groups, np.nan), where=counts > 0)
+    out = np.full(groups, np.inf if aggregate == 'min' else -np.inf)
+    (np.minimum if aggregate == 'min' else np.maximum).at(out, inverse[valid], values[valid])
+    out[np.isinf(out)] = np.nan
+    return out
+
+
+def _bucket_keys(values: "np.ndarray", unit: str) -> "np.ndarray":
+    if unit == 'week':
+        days = values.astype('datetime64[D]').astype(np.int64)
+        values = (days - (days + 3) % 7).astype('datetime64[D]')  # Lunes de la semana (1970-01-01 fue jueves)
+    else:
+        values = values.astype({'day': 'datetime64[D]', 'month': 'datetime64[M]', 'year': 'datetime64[Y]'}[unit])
+    return np.datetime_as_string(values).astype(object)  # AAAA-MM-DD, AAAA-MM o AAAA
+
+
+def _group(result: ColumnarResult, keys: "np.ndarray", key_name: str, operation: Dict[str, Any]) -> ColumnarResult:
+    aggregate = operation.get('aggregate', 'count')
+    if aggregate not in AGGREGATES:
+        raise ValueError(f"Agregado desconocido: {aggregate}")
+    value_column = _column(result, operation['value_column']) if aggregate != 'count' else None
+    if value_column and result.kinds[value_column] != 'number':
+        raise ValueError(f"{value_column} no es numérica")
+
+    unique, inverse = np.unique(keys, return_inverse=True)
+    totals = _aggregate(inverse.ravel(), len(unique), result.columns[value_column] if value_column else None, aggregate)
+    label = f"{aggregate.upper()}_{value_column}" if value_column else "TOTAL"
+    rows = []
+    for key, total in zip(unique.tolist(), totals.tolist()):
+        value = None if total != total else (int(total) if aggregate == 'count' else round(total, 2))
+        rows.append({key_name: key.isoformat() if isinstance(key, (date, datetime)) else key, label: value})
+    return ColumnarResult.from_rows(rows)
+
+
+def apply_operations(result: ColumnarResult, operations: List[Dict[str, Any]]) -> ColumnarResult:
+    """
+    Aplica una cadena de operaciones sobre el resultado.
+
+    Operaciones admitidas:
+        {"op": "sort", "column": C, "descending": bool}
+        {"op": "filter", "column": C, "operator": "=|!=|>|>=|<|<=|contains|year|month", "value": V}
+        {"op": "top", "n": N, "column": C, "descending": bool}
+        {"op": "group", "by": C, "aggregate": "count|sum|avg|min|max", "value_column": C}
+        {"op": "bucket", "column": C, "unit": "day|week|month|year", "aggregate": ..., "value_column": C}
+
+    Raises:
+        ValueError: Si una operación o columna no es válida
+    """
+    for operation in operations:
+        op = operation.get('op')
+        if op == 'sort':
+            column = _column(result, operation.get('column'))
+            result = result.take(_sort_indices(result, column, bool(operation.get('descending'))))
+        elif op == 'filter':
+            column = _column(result, operation.get('column'))
+            mask = _filter_mask(result, column, operation.get('operator', '='), operation.get('value'))
+            result = result.take(np.flatnonzero(mask))
+        elif op == 'top':
+            n = max(1, int(operation.get('n', FollowUpConfig.DEFAULT_TOP_N)))
+            if operation.get('column'):
+                column = _column(result, operation['column'])
+                result = result.take(_sort_indices(result, column, operation.get('descending', True)))
+            result = result.take(np.arange(min(n, len(result))))
+        elif op == 'group':
+            column = _column(result, operation.get('by'))
+            result = _group(result, result.columns[column], column, operation)
+        elif op == 'bucket':
+            column = _column(result, operation.get('column'))
+            unit = operation.get('unit', 'month')
+            if result.kinds[column] != 'date' or unit not in BUCKET_UNITS:
+                raise ValueError(f"No se puede agrupar {column} por {unit}")
+            valid = result.take(np.flatnonzero(~np.isnat(result.columns[column])))
+            result = _group(valid, _bucket_keys(valid.columns[column], unit), f"{column}_{unit.upper()}", operation)
+        else:
+            raise ValueError(f"Operación desconocida: {op}")
+    return result
+
+
+def build_operation_prompt(result: ColumnarResult, question: str) -> str:
+    """Prompt para que el modelo elija las operaciones (sin enviarle datos)."""
+    return (
+        f"El usuario tiene en pantalla un resultado de {len(result)} filas con columnas: {result.describe()}.\n"
+        f"Petición de seguimiento: \"{question}\"\n\n"
+        "Si la petición se puede resolver SOLO con esas filas, responde únicamente con JSON:\n"
+        '{"operations": [ ... ]}\n'
+        "Operaciones disponibles (en orden de aplicación):\n"
+        '- {"op": "sort", "column": "COL", "descending": true}\n'
+        '- {"op": "filter", "column": "COL", "operator": "=|!=|>|>=|<|<=|contains|year|month", "value": V}\n'
+        '- {"op": "top", "n": 5, "column": "COL", "descending": true}\n'
+        '- {"op": "group", "by": "COL", "aggregate": "count|sum|avg|min|max", "value_column": "COL"}\n'
+        '- {"op": "bucket", "column": "COL_FECHA", "unit": "day|week|month|year", "aggregate": "sum", "value_column": "COL"}\n'
+        'Si necesita datos que no están en esas columnas o filas, responde {"operations": null}.'
+    )
+
+
+def parse_operations(response: str) -> Optional[List[Dict[str, Any]]]:
+    """Extrae la lista de operaciones del JSON devuelto por el modelo."""
+    try:
+        operations = parse_structured(response).get('operations')
+    except (StructuredOutputError, AttributeError):
+        return None
+    if not isinstance(operations, list) or not operations or not all(isinstance(o, dict) for o in operations):
+        return None
+    return operations
+
+
+def rows_to_markdown(rows: List[Dict[str, Any]], title: str, max_rows: Optional[int] = None) -> str:
+    """Tabla markdown de las filas (hasta max_rows)."""
+    shown = rows[:max_rows] if max_rows else rows
+    headers = list(rows[0].keys())
+    lines = [title, "", "| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    for row in shown:
+        cells = []
+        for header in headers:
+            value = row.get(header)
+            if isinstance(value, Decimal):
+                value = f"{value:.2f}"
+            cells.append("" if value is None else str(value))
+        lines.append("| " + " | ".join(cells) + " |")
+    if len(shown) < len(rows):
+        lines.append(f"\n(mostrando {len(shown)} de {len(rows)} filas)")
+    return "\n".join(lines)
+
+
+class LastResultCache:
+    """Último resultado completo de cada conversación, en forma columnar."""
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.local_answers = 0
+
+    @property
+    def available(self) -> bool:
+        return FollowUpConfig.ENABLED and np is not None
+
+    def store(self, conversation_id: Optional[str], rows: List[Dict[str, Any]], sql: str):
+        """Guarda el resultado (solo si es completo y cabe en MAX_ROWS)."""
+        if not conversation_id or not self.available:
+            return
+        if not rows or len(rows) > FollowUpConfig.MAX_ROWS:
+            self.discard(conversation_id)
+            return
+        entry = {'result': ColumnarResult.from_rows(rows), 'sql': sql, 'stored_at': time.time()}
+        with self._lock:
+            self._entries[conversation_id] = entry
+            self._entries.move_to_end(conversation_id)
+            while len(self._entries) > FollowUpConfig.MAX_CONVERSATIONS:
+                self._entries.popitem(last=False)
+
+    def get(self, conversation_id: Optional[str]) -> Optional[ColumnarResult]:
+        if not conversation_id or not self.available:
+            return None
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry and time.time() - entry['stored_at'] > FollowUpConfig.TTL_SECONDS:
+                del self._entries[conversation_id]
+                entry = None
+        return entry['result'] if entry else None
+
+    def replace(self, conversation_id: str, result: ColumnarResult):
+        """El resultado derivado pasa a ser el último de la conversación."""
+        with self._lock:
+            previous = self._entries.get(conversation_id, {})
+            self._entries[conversation_id] = {'result': result, 'sql': previous.get('sql'), 'stored_at': time.time()}
+            self.local_answers += 1
+        logger.info(f"{LogPrefixes.CHAT_SERVICE} 🧮 Seguimiento resuelto en memoria ({len(result)} filas)")
+
+    def discard(self, conversation_id: Optional[str]):
+        with self._lock:
+            self._entries.pop(conversation_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'available': self.available,
+                'conversations': len(self._entries),
+                'local_answers': self.local_answers
+            }
+
+
+def is_follow_up(message: str) -> bool:
+    text = unicodedata.normalize('NFKD', message.lower())
+    return bool(FOLLOW_UP_CUES.search(''.join(c for c in text if not unicodedata.combining(c))))
+
+
+# Instancia global de resultados por conversación
+_last_result_cache = None
+
+def get_last_result_cache() -> LastResultCache:
+    """Obtener instancia global de últimos resultados por conversación"""
+    global _last_result_cache
+    if _last_result_cache is None:
+        _last_result_cache = LastResultCache()
+    return _last_result_cache
@@ -0,0 +1,205 @@
+"""
+Result Sessions - Resultados de consultas paginados en el servidor
+
+En lugar de truncar con FIRST 100, la consulta del chat se ejecuta con un
+cursor que queda abierto: la respuesta lleva la primera página y las
+siguientes se piden a /api/chat/result/{id}?page=N. Las filas ya leídas se
+conservan para volver a páginas anteriores; el cursor (y su conexión) se
+cierra al agotarse, al llegar a MAX_ROWS o tras IDLE_TIMEOUT_SECONDS sin uso.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core.abstract.database import DatabaseDriver, QueryCursor
+from backend.core.utils.constants import ResultSessionConfig, LogPrefixes, LogEmojis
+
+logger = logging.getLogger(__name__)
+
+
+class ResultSession:
+    """Cursor retenido y filas leídas de una consulta."""
+
+    def __init__(
+        self,
+        driver: DatabaseDriver,
+        cursor: QueryCursor,
+        sql: str,
+        page_size: int,
+        on_release: Optional[Callable[[DatabaseDriver], None]] = None
+    ):
+        self.result_id = uuid.uuid4().hex
+        self.driver = driver
+        self.on_release = on_release
+        self.cursor = cursor
+        self.sql = sql
+        self.page_size = page_size
+        self.rows: List[Dict[str, Any]] = []
+        self.exhausted = False
+        self.truncated = False
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self._lock = threading.Lock()
+
+    def _fill(self, needed: int):
+        """Lee del cursor hasta tener `needed` filas o agotarlo."""
+        while not self.exhausted and len(self.rows) < needed:
+            if len(self.rows) >= ResultSessionConfig.MAX_ROWS:
+                self.truncated = True
+                self.release()
+                break
+            batch = self.cursor.fetch(min(self.page_size, ResultSessionConfig.MAX_ROWS - len(self.rows)))
+            if not batch:
+                self.release()
+                break
+            self.rows.extend(batch)
+
+    def page(self, number: int) -> Dict[str, Any]:
+        """
+        Devuelve una página (0 = primera).
+
+        Se lee una fila más de la página pedida para saber si hay más.
+        """
+        with self._lock:
+            self.last_access = time.time()
+            start = number * self.page_size
+            self._fill(start + self.page_size + 1)
+            return {
+                'result_id': self.result_id,
+                'page': number,
+                'page_size': self.page_size,
+                'rows': self.rows[start:start + self.page_size],
+                'has_more': len(self.rows) > start + self.page_size,
+                'rows_fetched': len(self.rows),
+                'complete': self.exhausted and not self.truncated,
+                'truncated': self.truncated
+            }
+
+    def release(self):
+        """Cierra el cursor y entrega la conexión (on_release o desconexión); las filas leídas se conservan."""
+        if self.exhausted:
+            return
+        self.exhausted = True
+        try:
+            self.cursor.close()
+        except Exception:
+            pass
+        try:
+            if self.on_release:
+                self.on_release(self.driver)
+            else:
+                self.driver.disconnect()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            self.release()
+
+
+class ResultSessionStore:
+    """Sesiones de resultados abiertas con expiración por inactividad."""
+
+    def __init__(self):
+        self._sessions: "OrderedDict[str, ResultSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.expired = 0
+
+    def open(
+        self,
+        driver: DatabaseDriver,
+        cursor: QueryCursor,
+        sql: str,
+        page_size: int = ResultSessionConfig.PAGE_SIZE,
+        on_release: Optional[Callable[[DatabaseDriver], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Registra un cursor abierto y devuelve su primera página.
+
+        La sesión pasa a ser dueña del driver: al agotarse o expirar lo entrega
+        a on_release (p. ej. de vuelta al pool) o, sin él, lo desconecta.
+
+        Returns:
+            Primera página (ver ResultSession.page)
+        """
+        self.expire_idle()
+        session = ResultSession(driver, cursor, sql, page_size, on_release)
+        try:
+            first_page = session.page(0)
+        except Exception:
+            session.close()
+            raise
+        if session.exhausted:
+            return first_page  # Cabe en una página: no se retiene nada
+
+        with self._lock:
+            self._sessions[session.result_id] = session
+            self.opened += 1
+            while len(self._sessions) > ResultSessionConfig.MAX_SESSIONS:
+                _, oldest = self._sessions.popitem(last=False)
+                oldest.close()
+                self.expired += 1
+        logger.info(f"{LogPrefixes.SQL} 📄 Sesión de resultados {session.result_id} abierta ({len(session.rows)} filas leídas)")
+        return first_page
+
+    def get_page(self, result_id: str, page: int) -> Optional[Dict[str, Any]]:
+        """Página de una sesión, o None si no existe o ha expirado."""
+        self.expire_idle()
+        with self._lock:
+            session = self._sessions.get(result_id)
+            if session:
+                self._sessions.move_to_end(result_id)
+        return session.page(page) if session else None
+
+    def close(self, result_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(result_id, None)
+        if session:
+            session.close()
+        return session is not None
+
+    def expire_idle(self):
+        """Cierra y elimina las sesiones sin uso durante IDLE_TIMEOUT_SECONDS."""
+        cutoff = time.time() - ResultSessionConfig.IDLE_TIMEOUT_SECONDS
+        with self._lock:
+            idle = [rid for rid, s in self._sessions.items() if s.last_access < cutoff]
+            sessions = [self._sessions.pop(rid) for rid in idle]
+            self.expired += len(sessions)
+        for session in sessions:
+            session.close()
+        if sessions:
+            logger.info(f"{LogPrefixes.SQL} {LogEmojis.WARNING} {len(sessions)} sesiones de resultados expiradas")
+
+    def get_stats(self) -> Dict[str, Any]:
+        self.expire_idle()
+        with self._lock:
+            return {
+                'open_sessions': len(self._sessions),
+                'opened': self.opened,
+                'expired': self.expired,
+                'sessions': [
+                    {
+                        'result_id': s.result_id,
+                        'rows_fetched': len(s.rows),
+                        'cursor_open': not s.exhausted,
+                        'idle_seconds': round(time.time() - s.last_access)
+                    }
+                    for s in self._sessions.values()
+                ]
+            }
+
+
+# Instancia global de sesiones de resultados
+_result_session_store = None
+
+def get_result_session_store() -> ResultSessionStore:
+    """Obtener instancia global de sesiones de resultados"""
+    global _result_session_store
+    if _result_session_store is None:
+        _result_session_store = ResultSessionStore()
+    return _result_session_store
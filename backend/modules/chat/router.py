@@ -1,25 +1,172 @@
+import asyncio
+import uuid
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, Any, Optional, List
 from backend.modules.chat.service import ChatService
+from backend.modules.chat.batch import BatchProcessor
+from backend.core.utils.constants import BatchConfig, ChatSessionConfig
+from backend.core.utils.stage_timer import latency_histograms
 
 router = APIRouter()
 service = ChatService()
+batch_processor = BatchProcessor(service)
 
 class ChatRequest(BaseModel):
     message: str
     db_params: Optional[Dict[str, Any]] = None
     model_id: Optional[str] = "groq-llama-70b"
-    conversation_history: Optional[List[Dict[str, str]]] = []  # Lista de mensajes anteriores
+    conversation_history: Optional[List[Dict[str, str]]] = []  # Solo clientes sin sesión en servidor (ver conversation_id)
     confirm_data_sending: Optional[bool] = False
+    conversation_id: Optional[str] = None  # Sesión de la conversación en el servidor (historial, última SQL, seguimientos)
+
+class RoutingObjectiveRequest(BaseModel):
+    objective: str  # latency | cost | quality
+
+class BatchChatRequest(BaseModel):
+    questions: List[str]
+    db_params: Optional[Dict[str, Any]] = None
+    model_id: Optional[str] = "groq-llama-70b"
+    confirm_data_sending: Optional[bool] = False
+    provider_concurrency: Optional[int] = Field(None, gt=0)  # Por defecto BatchConfig.PROVIDER_CONCURRENCY
+    db_concurrency: Optional[int] = Field(None, gt=0)  # Por defecto BatchConfig.DB_CONCURRENCY
 
 @router.post("/send")
 async def send_message(request: ChatRequest):
+    context = request.dict()
+    if ChatSessionConfig.ENABLED and not context.get('conversation_id'):
+        context['conversation_id'] = uuid.uuid4().hex
     try:
         # Pass the full request dict which includes confirm_data_sending
-        response = await service.process_message(request.message, request.dict())
-        return {"success": True, "response": response}
+        response = await service.process_message(request.message, context)
+        return {
+            "success": True,
+            "response": response,
+            "query_plans": context.get('query_plans', []),
+            "timings": context.get('timings'),
+            "template": context.get('template'),
+            "result_session": context.get('result_session'),
+            "follow_up": context.get('follow_up'),
+            "multi_query": context.get('multi_query'),
+            "sql_pipeline": context.get('sql_pipeline'),
+            "conversation_id": context.get('conversation_id')
+        }
     except Exception as e:
-        return {"success": False, "response": f"Error: {str(e)}"}
+        return {"success": False, "response": f"Error: {str(e)}", "timings": context.get('timings')}
+
+@router.post("/batch")
+async def send_batch(request: BatchChatRequest):
+    """Procesa un lote de preguntas concurrentemente (resultados por pregunta y tiempos agregados)."""
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="La lista de preguntas está vacía")
+    if len(request.questions) > BatchConfig.MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {BatchConfig.MAX_QUESTIONS} preguntas por lote"
+        )
+
+    context = request.dict(exclude={'questions', 'provider_concurrency', 'db_concurrency'})
+    result = await batch_processor.process(
+        request.questions,
+        context,
+        provider_concurrency=request.provider_concurrency,
+        db_concurrency=request.db_concurrency
+    )
+    return {"success": True, **result}
+
+@router.get("/result/{result_id}")
+async def get_result_page(result_id: str, page: int = 0):
+    """Página de una sesión de resultados (0 = primera)."""
+    if page < 0:
+        raise HTTPException(status_code=400, detail="La página debe ser >= 0")
+    # La lectura del cursor es bloqueante: fuera del event loop
+    result = await asyncio.to_thread(service.result_sessions.get_page, result_id, page)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Sesión de resultados no encontrada o expirada")
+    return result
+
+@router.delete("/result/{result_id}")
+async def close_result_session(result_id: str):
+    """Cierra una sesión de resultados y libera su conexión."""
+    return {"success": service.result_sessions.close(result_id)}
+
+@router.get("/results")
+async def get_result_sessions_stats():
+    """Sesiones de resultados abiertas."""
+    return service.result_sessions.get_stats()
+
+@router.get("/correction-memo")
+async def get_correction_memo_stats():
+    """Estadísticas de la memoria de correcciones SQL."""
+    return service.sql_corrector.correction_memo.get_stats()
+
+@router.delete("/correction-memo")
+async def clear_correction_memo():
+    """Vacía la memoria de correcciones SQL."""
+    service.sql_corrector.correction_memo.clear()
+    return {"success": True}
+
+@router.get("/text-search")
+async def get_text_search_stats():
+    """Estado de los índices locales de búsqueda de texto."""
+    return service.text_search.get_stats()
+
+@router.get("/templates")
+async def get_template_stats():
+    """Ratio de aciertos del atajo de plantillas SQL."""
+    return service.intent_matcher.get_stats()
+
+@router.get("/follow-ups")
+async def get_follow_up_stats():
+    """Seguimientos resueltos en memoria sobre el último resultado."""
+    return service.last_results.get_stats()
+
+@router.get("/sessions")
+async def get_chat_sessions_stats():
+    """Sesiones de conversación guardadas en el servidor."""
+    return service.chat_sessions.get_stats()
+
+@router.get("/session/{conversation_id}")
+async def get_chat_session(conversation_id: str):
+    """Historial retenido de una conversación."""
+    session = service.chat_sessions.get(conversation_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Sesión no encontrada o caducada")
+    return session.to_dict()
+
+@router.delete("/session/{conversation_id}")
+async def delete_chat_session(conversation_id: str):
+    """Olvida una conversación (historial y último resultado)."""
+    service.last_results.discard(conversation_id)
+    return {"success": service.chat_sessions.delete(conversation_id)}
+
+@router.get("/hedging")
+async def get_hedging_stats():
+    """Coberturas entre modelos: tasa, victorias, tiempo ahorrado y umbrales por modelo."""
+    orchestrator = service.model_orchestrator
+    return {**orchestrator.hedge_stats.get_stats(), 'thresholds': orchestrator.latency.get_stats()}
+
+@router.get("/routing")
+async def get_routing_stats():
+    """Router adaptativo: objetivo actual y EWMA de latencia, éxito y SQL válida por modelo."""
+    return service.model_orchestrator.router.get_stats()
+
+@router.put("/routing")
+async def set_routing_objective(request: RoutingObjectiveRequest):
+    """Cambia el objetivo con el que se ordenan los modelos."""
+    try:
+        service.model_orchestrator.router.set_objective(request.objective)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return service.model_orchestrator.router.get_stats()
 
+@router.get("/latency")
+async def get_latency_stats():
+    """Histogramas de latencia por etapa (schema, LLM, corrección, SQL, interpretación)."""
+    return latency_histograms.get_stats()
 
+@router.delete("/latency")
+async def reset_latency_stats():
+    """Reinicia los histogramas de latencia."""
+    latency_histograms.reset()
+    return {"success": True}
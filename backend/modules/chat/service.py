@@ -1,18 +1,35 @@
-from typing import Dict, Any, List
-from backend.core.factory.ai_factory import AIFactory
-from backend.core.abstract.ai import AIConfig
+from typing import Callable, Dict, Any, List, Optional
+from backend.core.factory.provider_registry import get_provider_registry
 from backend.core.config.settings import settings
 from backend.core.factory.db_factory import DBFactory
 from backend.core.abstract.database import DBConfig
 from backend.core.utils.constants import (
     DBConstants, DBDefaults, LogPrefixes, LogEmojis,
-    SQLDelimiters, SQLLimits, SQLKeywords
+    SQLDelimiters, SQLLimits, SQLKeywords, ResultSessionConfig, FollowUpConfig,
+    MultiQueryConfig, ChatSessionConfig, UILimits, SQLPipelineConfig, LLMPriority
 )
 from backend.drivers.db.firebird_queries import QUERY_TABLES, QUERY_TABLE_COLUMNS
 from backend.core.config.database_metadata import get_semantic_schema, get_table_for_concept
 from backend.modules.chat.sql_corrector import SQLCorrector
-from backend.modules.chat.model_fallback_orchestrator import ModelFallbackOrchestrator
+from backend.modules.chat.model_fallback_orchestrator import get_llm_gateway
+from backend.modules.chat.plan_guard import QueryPlanGuard, QueryCostExceededError
+from backend.modules.chat.date_range_resolver import resolve_date_range, enforce_date_range
+from backend.modules.chat.text_search_index import get_text_search_accelerator
+from backend.core.utils.stage_timer import StageTimer
+from backend.modules.chat.intent_matcher import get_intent_matcher, format_template_results
+from backend.modules.chat.result_sessions import get_result_session_store
+from backend.drivers.db.connection_pool import get_connection_pool
+from backend.modules.chat.chat_sessions import get_chat_session_store, format_history
+from backend.modules.chat.multi_query import SubQuery, parse_sql_plan, run_plan, merge_results, clean_plan_block
+from backend.modules.chat.sql_pipeline import SQLStreamPipeline
+from backend.modules.chat.result_analytics import (
+    get_last_result_cache, is_follow_up, build_operation_prompt, parse_operations,
+    apply_operations, rows_to_markdown
+)
+from datetime import date
+import asyncio
 import logging
+import time
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -22,9 +39,30 @@ class ChatService:
     
     def __init__(self):
         self.sql_corrector = SQLCorrector()
-        self.model_orchestrator = ModelFallbackOrchestrator()
+        self.model_orchestrator = get_llm_gateway()
+        self.plan_guard = QueryPlanGuard()
+        self.text_search = get_text_search_accelerator()
+        self.intent_matcher = get_intent_matcher()
+        self.result_sessions = get_result_session_store()
+        self.last_results = get_last_result_cache()
+        self.pool = get_connection_pool()
+        self.chat_sessions = get_chat_session_store()
 
     async def process_message(self, message: str, context: Dict[str, Any]) -> str:
+        """Procesa un mensaje midiendo la latencia de cada etapa (context['timings'])."""
+        timer = StageTimer()
+        try:
+            if ChatSessionConfig.ENABLED:
+                with timer.stage("session_load"):
+                    context['chat_session'] = self.chat_sessions.get(context.get('conversation_id'))
+            response = await self._process_message(message, context, timer)
+            self._record_turn(message, response, context)
+            return response
+        finally:
+            context['timings'] = timer.finish()
+            logger.info(f"{LogPrefixes.CHAT_SERVICE} ⏱️ Latencia por etapa: {context['timings']}")
+
+    async def _process_message(self, message: str, context: Dict[str, Any], timer: StageTimer) -> str:
         logger.info("="*80)
         logger.info(f"{LogPrefixes.CHAT_SERVICE} {LogEmojis.NEW_MESSAGE} NUEVO MENSAJE RECIBIDO")
         logger.info(f"{LogPrefixes.EMISOR} Usuario")
@@ -105,111 +143,110 @@ class ChatService:
             except Exception as e:
                 return f"Error debug columns: {str(e)}"
         
+        # 0. Follow-ups resolved in memory over the conversation's last result set
+        follow_up_response = await self._answer_follow_up(message, context, timer)
+        if follow_up_response:
+            return follow_up_response
+        
+        # 0b. Template fast-path: frequent intents resolved without the LLM
+        with timer.stage("template_match"):
+            intent = self.intent_matcher.match(message)
+        if intent:
+            try:
+                results = await self._run_sql(self._execute_func(context, paginate=True), intent.sql, timer)
+                self._remember_result(context, results, intent.sql)
+                context['template'] = intent.to_dict()
+                response_text = format_template_results(intent, results)
+                if context.get('result_session'):
+                    response_text += "\n\n(Hay más resultados: consulta las páginas siguientes.)"
+                logger.info(f"[RESPUESTA FINAL] (plantilla {intent.template.template_id}) {response_text}")
+                logger.info("="*80)
+                return response_text
+            except Exception as e:
+                logger.warning(f"[SQL] ⚠️ Plantilla '{intent.template.template_id}' falló, se usa el LLM: {str(e)}")
+                self.intent_matcher.record_fallback(intent.template.template_id)
+        
         # 1. Get DB Schema Context - Use semantic schema
         logger.info(f"[DATABASE] Generando esquema semántico optimizado...")
-        db_context = get_semantic_schema()
+        session = context.get('chat_session')
+        with timer.stage("schema_build"):
+            db_context = context.get('db_context') or (session and session.schema_context) or get_semantic_schema()
+        context['schema_context'] = db_context
         logger.info(f"[DATABASE] Esquema semántico: {len(db_context)} caracteres (optimizado para tokens)")
         
         # 2. Build conversation history context
-        from backend.core.utils.constants import UILimits
-        conversation_history = context.get('conversation_history', [])
-        
-        # Limit to last N messages
-        max_history = UILimits.CONVERSATION_MEMORY_MESSAGES
-        recent_history = conversation_history[-max_history:] if len(conversation_history) > max_history else conversation_history
-        
-        # Format conversation history for prompt
-        history_context = ""
-        if recent_history:
-            history_context = "\n\n=== CONTEXTO DE CONVERSACIÓN ANTERIOR ===\n"
-            for msg in recent_history:
-                role = msg.get('role', 'user')
-                content = msg.get('content', '')
-                if role == 'user':
-                    history_context += f"Usuario: {content}\n"
-                elif role == 'assistant':
-                    history_context += f"Asistente: {content}\n"
-            history_context += "=== FIN DEL CONTEXTO ===\n"
-            logger.info(f"[CHAT] Incluyendo {len(recent_history)} mensajes de historial en el contexto")
+        prompt_started = time.perf_counter()
+        if session and session.messages:
+            # Server-side session: history already formatted when the last turn was stored
+            history_context = session.history_context
+            if session.last_sql:
+                history_context += f"\nÚLTIMA CONSULTA SQL EJECUTADA (para preguntas de seguimiento):\n{session.last_sql}\n"
+            logger.info(f"[CHAT] Sesión {session.session_id}: {len(session.messages)} mensajes de historial en el contexto")
+        else:
+            conversation_history = context.get('conversation_history') or []
+            
+            # Limit to last N messages
+            max_history = UILimits.CONVERSATION_MEMORY_MESSAGES
+            recent_history = conversation_history[-max_history:] if len(conversation_history) > max_history else conversation_history
+            
+            # Format conversation history for prompt
+            history_context = format_history(recent_history)
+            if recent_history:
+                logger.info(f"[CHAT] Incluyendo {len(recent_history)} mensajes de historial en el contexto")
         
-        # 3. Prompt Engineering for Text-to-SQL
-        system_prompt = f"""
-Eres un asistente experto en bases de datos Firebird SQL.
-Convierte preguntas en lenguaje natural a consultas SQL válidas.
-{history_context}
-{db_context}
-
-INSTRUCCIONES CRÍTICAS:
-1. Usa SOLO las tablas y columnas del esquema arriba
-2. Para "productos" → tabla ARTICULO
-3. Para "clientes" → tabla CLIENTE  
-4. Para "facturas/ventas" → tabla DOCCAB
-5. Genera SQL válido para Firebird 2.5
-6. Delimita SQL con ```sql y ```
-7. Si no requiere SQL, responde directamente
-8. IMPORTANTE: Para limitar resultados usa FIRST N (ej: SELECT FIRST 10...)
-9. NUNCA uses LIMIT, ROWS, o TOP - solo FIRST es válido en Firebird
-
-TIPOS DE DOCUMENTOS (TABLA DOCCAB, COLUMNA TIPO):
-- Para "facturas" -> WHERE TIPO = 13
-- Para "albaranes" -> WHERE TIPO = 11
-- Para "presupuestos" -> WHERE TIPO = 0
-- Para "pedidos" -> WHERE TIPO = 12
-- Para "abonos" -> WHERE TIPO = 3
-- Para "recibos" -> WHERE TIPO = 61
-- Para "contratos" -> WHERE TIPO = 10
-- Para "certificaciones" -> WHERE TIPO = 51
-- Para "ordenes de trabajo" o "SAT" -> WHERE TIPO = 2
-
-TERMINOLOGÍA ESPECÍFICA (CONTEXTO AIRE ACONDICIONADO):
-- "Split" se refiere a equipos de aire acondicionado.
-- "Gas" se refiere a refrigerantes (R-32, R-410A, etc.).
-
-BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
-- SIEMPRE usa `UPPER(columna) LIKE UPPER('%texto%')` para CUALQUIER búsqueda de texto.
-- NUNCA uses `LIKE '%TEXTO%'` directo, ya que Firebird es case-sensitive.
-- Ejemplo CORRECTO: `WHERE UPPER(NOMBRE) LIKE UPPER('%SPLIT%')`
-- Ejemplo INCORRECTO: `WHERE NOMBRE LIKE '%SPLIT%'`
-
-11. Ejemplos CORRECTOS para consultas de fechas:
-    - "facturas de este mes":
-      WHERE EXTRACT(MONTH FROM FECHA) = EXTRACT(MONTH FROM CURRENT_DATE)
-      AND EXTRACT(YEAR FROM FECHA) = EXTRACT(YEAR FROM CURRENT_DATE)
-    
-    - "facturas del mes pasado" (USAR ESTA SINTAXIS):
-      WHERE FECHA >= CAST(EXTRACT(YEAR FROM CURRENT_DATE) || '-' || 
-                          CASE WHEN EXTRACT(MONTH FROM CURRENT_DATE) = 1 THEN 12 
-                               ELSE EXTRACT(MONTH FROM CURRENT_DATE) - 1 END || '-01' AS DATE)
-      AND FECHA < CAST(EXTRACT(YEAR FROM CURRENT_DATE) || '-' || 
-                       EXTRACT(MONTH FROM CURRENT_DATE) || '-01' AS DATE)
-    
-    - ALTERNATIVA MÁS SIMPLE para "mes pasado" (RECOMENDADA):
-      WHERE (EXTRACT(YEAR FROM FECHA) * 12 + EXTRACT(MONTH FROM FECHA)) = 
-            (EXTRACT(YEAR FROM CURRENT_DATE) * 12 + EXTRACT(MONTH FROM CURRENT_DATE) - 1)
-    
-    - "hace 2 meses":
-      WHERE (EXTRACT(YEAR FROM FECHA) * 12 + EXTRACT(MONTH FROM FECHA)) = 
-            (EXTRACT(YEAR FROM CURRENT_DATE) * 12 + EXTRACT(MONTH FROM CURRENT_DATE) - 2)
-
-12. NUNCA uses DATEADD dentro de EXTRACT - NO FUNCIONA en Firebird 2.5
-
-13. REGLA DE AÑO ACTUAL (CRÍTICA):
-    - Si el usuario menciona un mes (ej: "octubre", "noviembre") SIN especificar año, ASUME SIEMPRE EL AÑO ACTUAL.
-    - EJEMPLO: "facturas de octubre" -> 
-      WHERE EXTRACT(MONTH FROM FECHA) = 10 
-      AND EXTRACT(YEAR FROM FECHA) = EXTRACT(YEAR FROM CURRENT_DATE)
-    - SOLO si el usuario dice explícitamente "de todos los años" o "histórico", omite el filtro de año.
-
-"""
+        # 3. Resolve temporal expressions to concrete, index-friendly ranges
+        date_range = resolve_date_range(message)
+        date_range_context = ""
+        if date_range:
+            date_range_context = (
+                f"\nRANGO TEMPORAL RESUELTO para \"{date_range.expression}\" (USAR EXACTAMENTE):\n"
+                f"  WHERE FECHA >= '{date_range.start.isoformat()}' AND FECHA < '{date_range.end.isoformat()}'\n"
+            )
+            context['date_range'] = date_range.to_dict()
+        
+        # 4. Prompt Engineering for Text-to-SQL (recortado al presupuesto de tokens de los modelos)
+        system_prompt = self._sql_system_prompt(history_context, db_context, date_range_context)
+        budget = self.model_orchestrator.prompt_budget()
+        fitted = budget.fit({'history': history_context, 'schema': db_context}, budget.count(system_prompt, message))
+        if budget.trimmed:
+            system_prompt = self._sql_system_prompt(fitted['history'], fitted['schema'], date_range_context)
+            context['prompt_trimmed'] = budget.trimmed
+        timer.record("prompt_build", time.perf_counter() - prompt_started)
         logger.info(f"[AI PROVIDER] 📤 Usando sistema de fallback multi-modelo...")
         logger.info(f"[AI PROVIDER] System Prompt:\n{system_prompt}")
         logger.info(f"[AI PROVIDER] User Message: {message}")
         
         # Use ModelFallbackOrchestrator for robust multi-model generation
+        # (streamed: SQL blocks start executing as soon as they are complete)
+        pipeline = self._sql_pipeline(context, date_range) if SQLPipelineConfig.ENABLED else None
+        try:
+            return await self._generate_and_execute(message, system_prompt, db_context, date_range, context, timer, pipeline)
+        finally:
+            if pipeline:
+                pipeline.discard_unused()
+                if pipeline.launched:
+                    context['sql_pipeline'] = pipeline.to_dict()
+
+    async def _generate_and_execute(
+        self,
+        message: str,
+        system_prompt: str,
+        db_context: str,
+        date_range: Any,
+        context: Dict[str, Any],
+        timer: StageTimer,
+        pipeline: Optional[SQLStreamPipeline]
+    ) -> Any:
+        """Genera la respuesta del modelo y ejecuta e interpreta la SQL que contenga."""
         response_text, used_model_id = await self.model_orchestrator.execute_with_fallback(
             system_prompt=system_prompt,
             user_message=message,
-            feedback_callback=None  # TODO: Implement real-time feedback to user
+            feedback_callback=None,  # TODO: Implement real-time feedback to user
+            timer=timer,
+            stage="sql_generation",
+            limits=context.get('batch_limits'),
+            on_partial=pipeline.on_partial if pipeline else None,
+            priority=context.get('llm_priority', LLMPriority.INTERACTIVE)
         )
         
         if not response_text:
@@ -224,20 +261,8 @@ BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
         model_config = model_manager.get_model(used_model_id)
         
         if model_config:
-            provider_schema = model_config.get('schema', model_config.get('provider'))
-            provider = AIFactory.get_provider(provider_schema)
-            
-            ai_config_params = {
-                'api_key': model_config.get('api_key'),
-                'model': model_config['model_id']
-            }
-            if model_config.get('base_url'):
-                ai_config_params['base_url'] = model_config['base_url']
-            if model_config.get('headers'):
-                ai_config_params['headers'] = model_config['headers']
-            
-            ai_config = AIConfig(**ai_config_params)
-            provider.configure(ai_config)
+            # Same failing SQL + error -> same correction: served from the response cache
+            provider = get_provider_registry().for_model(model_config, use_case="sql_correction")
         else:
             logger.warning(f"[AI PROVIDER] ⚠️ No se pudo configurar provider para interpretación")
             provider = None
@@ -245,85 +270,42 @@ BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
         # 5. Execute SQL if present
         if "```sql" in response_text:
             logger.info(f"[SQL] 🔍 Detectada consulta SQL en la respuesta")
+            sql_query = None
             try:
-                sql_query = response_text.split(SQLDelimiters.START)[1].split(SQLDelimiters.END)[0].strip()
-                
-                # Limpiar query: remover punto y coma al final
-                sql_query = sql_query.rstrip(';').strip()
+                plan = parse_sql_plan(response_text) if MultiQueryConfig.ENABLED else []
+                if len(plan) > 1:
+                    results, sql_query = await self._execute_plan(
+                        plan, message, db_context, provider, context, timer, pipeline, model_id=used_model_id
+                    )
+                    return await self._interpret_results(message, sql_query, results, context, timer)
                 
-                # Añadir FIRST si es SELECT y no tiene FIRST, y NO es una consulta de agregación simple
-                sql_upper = sql_query.upper()
-                is_aggregate = any(agg in sql_upper for agg in ['COUNT(', 'SUM(', 'AVG(', 'MAX(', 'MIN('])
-                
-                if sql_upper.startswith(SQLKeywords.SELECT) and SQLKeywords.FIRST not in sql_upper and not is_aggregate:
-                    # Insertar FIRST después de SELECT
-                    sql_query = sql_query[:6] + f' {SQLKeywords.FIRST} {SQLLimits.DEFAULT_FIRST}' + sql_query[6:]
-                    logger.info(f"{LogPrefixes.SQL} {LogEmojis.WARNING} Añadido FIRST {SQLLimits.DEFAULT_FIRST} automáticamente para limitar resultados")
+                sql_query = response_text.split(SQLDelimiters.START)[1].split(SQLDelimiters.END)[0].strip()
+                sql_query = self._prepare_sql(sql_query, date_range)
                 
                 logger.info(f"[SQL] Consulta extraída: {sql_query}")
                 logger.info(f"[DATABASE] 🔄 Ejecutando consulta SQL...")
                 
-                # Execute with auto-correction
+                # Execute with auto-correction (reusing the execution started while streaming)
+                execute_func = self._execute_func(context, paginate=True)
+                if pipeline:
+                    execute_func = pipeline.wrap(execute_func, plan=False)
+                execute_func = self._track_sql_validity(execute_func, used_model_id)
                 results = await self.sql_corrector.execute_with_correction(
                     sql_query=sql_query,
                     original_question=message,
                     db_context=db_context,
                     ai_provider=provider,
-                    execute_func=lambda q: self._execute_sql(q, context.get('db_params')),
-                    max_retries=DBDefaults.MAX_SQL_CORRECTION_RETRIES
+                    execute_func=execute_func,
+                    max_retries=DBDefaults.MAX_SQL_CORRECTION_RETRIES,
+                    timer=timer
                 )
                 
                 logger.info(f"[DATABASE] ✓ Consulta ejecutada exitosamente")
+                self._remember_result(context, results, sql_query)
                 logger.info(f"[DATABASE] Resultados: {len(results)} filas")
                 logger.info(f"[DATABASE] Datos: {results[:3] if len(results) > 3 else results}")  # First 3 rows
                 
-                # --- DATA PRIVACY CHECK ---
-                # Check if we need user confirmation before sending data to AI
-                require_confirmation = getattr(settings, 'REQUIRE_DB_DATA_CONFIRMATION', True)
-                confirm_sending = context.get('confirm_data_sending', False) if context else False
-                
-                if require_confirmation and results and not confirm_sending:
-                    logger.info(f"[PRIVACY] 🛑 Deteniendo para confirmación de usuario")
-                    return {
-                        "status": "confirmation_required",
-                        "message": "Por favor confirma el envío de estos datos a la IA.",
-                        "sql": sql_query,
-                        "data_preview": results[:5], # Send a preview
-                        "total_rows": len(results),
-                        "full_data": results # Send full data to frontend to hold
-                    }
-                # --------------------------
-                
-                # 6. Interpret Results
-                interpretation_prompt = (
-                    f"Pregunta original: {message}\n"
-                    f"Consulta SQL ejecutada: {sql_query}\n"
-                    f"Resultados obtenidos: {results}\n\n"
-                    "Responde al usuario siguiendo estas REGLAS ESTRICTAS:\n"
-                    "1. NO inventes datos. Usa SOLO los resultados proporcionados.\n"
-                    "2. Sé objetivo y directo. Evita frases subjetivas como 'Es importante destacar', 'Los precios pueden variar', etc.\n"
-                    "3. Los precios están en EUROS (EUR). Nunca uses el símbolo $.\n"
-                    "4. Presenta los datos de forma clara y concisa (lista o tabla si es apropiado).\n"
-                    "5. Si no hay resultados, dilo claramente."
-                )
-                
-                logger.info(f"[AI PROVIDER] 📤 Solicitando interpretación de resultados...")
-                
-                # Use ModelFallbackOrchestrator for interpretation to handle rate limits
-                final_response, _ = await self.model_orchestrator.execute_with_fallback(
-                    system_prompt="Eres un asistente experto en análisis de datos.",
-                    user_message=interpretation_prompt,
-                    feedback_callback=None
-                )
-                
-                if not final_response:
-                    final_response = f"He obtenido {len(results)} resultados, pero no he podido generar una explicación detallada en este momento debido a una alta carga en los servidores de IA. Aquí tienes los datos crudos: {results[:5]}"
-                
-                logger.info(f"[AI PROVIDER] 📥 Interpretación recibida")
-                logger.info(f"[RESPUESTA FINAL] {final_response}")
-                logger.info("="*80)
-                
-                return final_response
+                return await self._interpret_results(message, sql_query, results, context, timer)
             except Exception as e:
                 logger.error(f"[ERROR SQL] ❌ Error ejecutando consulta: {str(e)}")
                 logger.error(f"[ERROR SQL] Consulta fallida: {sql_query}")
@@ -344,24 +326,12 @@ BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
         if not model_config.get('enabled', False):
             return f"Error: Modelo '{model_config['name']}' está deshabilitado."
         
-        # 2. Configure AI Provider
-        provider_name = model_config['provider']
-        provider = AIFactory.get_provider(provider_name)
-        
+        # 2. Configure AI Provider (cached client, reused across requests)
         api_key = model_config.get('api_key')
         if not api_key:
             return f"Error: No se ha configurado la API Key para el modelo '{model_config['name']}'."
 
-        # Build config with base_url if needed
-        config_dict = {
-            'api_key': api_key,
-            'model': model_config['model_id']
-        }
-        if model_config.get('base_url'):
-            config_dict['base_url'] = model_config['base_url']
-        
-        config = AIConfig(**config_dict)
-        provider.configure(config)
+        provider = get_provider_registry().for_model(model_config)
 
         # 2. Get DB Schema Context (Simplified)
         # In a real app, we would cache this or retrieve only relevant parts
@@ -487,8 +457,396 @@ BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
             logger.error(f"[DATABASE ERROR] ❌ {str(e)}")
             return f"Error obteniendo esquema: {str(e)}"
 
-    def _execute_sql(self, query: str, db_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _execute_plan(
+        self,
+        plan: List[SubQuery],
+        message: str,
+        db_context: str,
+        provider: Any,
+        context: Dict[str, Any],
+        timer: StageTimer,
+        pipeline: Optional[SQLStreamPipeline] = None,
+        model_id: Optional[str] = None
+    ) -> Any:
+        """
+        Ejecuta un plan de varias consultas independientes en paralelo.
+
+        Cada consulta usa su propia conexión (en un hilo) y su propia cadena de
+        corrección; los resultados se combinan localmente.
+
+        Returns:
+            Tupla (filas combinadas, SQL del plan para la interpretación)
+        """
+        db_params = context.get('db_params')
+        limits = context.get('batch_limits')
+        db_key = f"{db_params.get('host')}:{db_params.get('port')}/{db_params.get('database')}" if db_params else ''
+
+        # Una fila más que el tope para saber si la consulta se ha quedado corta
+        max_rows = SQLLimits.MAX_RESULTS + 1
+        truncated = set()
+
+        async def execute(query: str) -> List[Dict[str, Any]]:
+            if limits:
+                async with limits.database(db_key):
+                    return await asyncio.to_thread(self._execute_sql, query, db_params, context, False, max_rows)
+            return await asyncio.to_thread(self._execute_sql, query, db_params, context, False, max_rows)
+
+        execute_func = pipeline.wrap(execute, plan=True) if pipeline else execute
+
+        async def run_one(sub_query: SubQuery) -> List[Dict[str, Any]]:
+            rows = await self.sql_corrector.execute_with_correction(
+                sql_query=sub_query.sql,
+                original_question=message,
+                db_context=db_context,
+                ai_provider=provider,
+                execute_func=self._track_sql_validity(execute_func, model_id),
+                max_retries=DBDefaults.MAX_SQL_CORRECTION_RETRIES,
+                timer=timer
+            )
+            if len(rows) > SQLLimits.MAX_RESULTS:
+                truncated.add(sub_query.label)
+                rows = rows[:SQLLimits.MAX_RESULTS]
+            return rows
+
+        logger.info(f"[SQL] 🔀 Plan de {len(plan)} consultas: {[sq.label for sq in plan]}")
+        results, report = await run_plan(plan, run_one)
+        for entry in report['subqueries']:
+            entry['truncated'] = entry['label'] in truncated
+        report['max_rows_per_query'] = SQLLimits.MAX_RESULTS
+        context['multi_query'] = report
+        if truncated:
+            logger.info(f"[SQL] {LogEmojis.WARNING} Consultas limitadas a {SQLLimits.MAX_RESULTS} filas: {sorted(truncated)}")
+
+        merged = merge_results(results)
+        plan_sql = "\n".join(f"-- {sq.label}\n{sq.sql}" for sq in plan)
+        self._remember_result(context, merged, plan_sql)
+        logger.info(f"[DATABASE] ✓ Plan ejecutado: {len(merged)} filas combinadas")
+        return merged, plan_sql
+
+    async def _interpret_results(
+        self,
+        message: str,
+        sql_query: str,
+        results: List[Dict[str, Any]],
+        context: Dict[str, Any],
+        timer: StageTimer
+    ) -> Any:
+        """Confirmación de privacidad e interpretación de los resultados por el modelo."""
+        # --- DATA PRIVACY CHECK ---
+        # Check if we need user confirmation before sending data to AI
+        require_confirmation = getattr(settings, 'REQUIRE_DB_DATA_CONFIRMATION', True)
+        confirm_sending = context.get('confirm_data_sending', False) if context else False
+        
+        if require_confirmation and results and not confirm_sending:
+            logger.info(f"[PRIVACY] 🛑 Deteniendo para confirmación de usuario")
+            return {
+                "status": "confirmation_required",
+                "message": "Por favor confirma el envío de estos datos a la IA.",
+                "sql": sql_query,
+                "data_preview": results[:5], # Send a preview
+                "total_rows": len(results),
+                "full_data": results # Send full data to frontend to hold
+            }
+        # --------------------------
+        
+        # 6. Interpret Results (filas recortadas si el prompt excede el presupuesto de tokens)
+        system_prompt = "Eres un asistente experto en análisis de datos."
+        interpretation_prompt = self._interpretation_prompt(message, sql_query, results, context)
+        budget = self.model_orchestrator.prompt_budget()
+        fitted = budget.fit({'rows': results}, budget.count(system_prompt, interpretation_prompt))
+        if budget.trimmed:
+            interpretation_prompt = self._interpretation_prompt(
+                message, sql_query, fitted['rows'], context,
+                f"(Se muestran {len(fitted['rows'])} de {len(results)} filas por el límite de contexto del modelo.)\n"
+            )
+            context['prompt_trimmed'] = budget.trimmed
+        
+        logger.info(f"[AI PROVIDER] 📤 Solicitando interpretación de resultados...")
+        
+        # Use ModelFallbackOrchestrator for interpretation to handle rate limits
+        final_response, _ = await self.model_orchestrator.execute_with_fallback(
+            system_prompt=system_prompt,
+            user_message=interpretation_prompt,
+            feedback_callback=None,
+            timer=timer,
+            stage="interpretation",
+            limits=context.get('batch_limits'),
+            priority=context.get('llm_priority', LLMPriority.INTERACTIVE)
+        )
+        
+        if not final_response:
+            final_response = f"He obtenido {len(results)} resultados, pero no he podido generar una explicación detallada en este momento debido a una alta carga en los servidores de IA. Aquí tienes los datos crudos: {results[:5]}"
+        
+        logger.info(f"[AI PROVIDER] 📥 Interpretación recibida")
+        logger.info(f"[RESPUESTA FINAL] {final_response}")
+        logger.info("="*80)
+        
+        return final_response
+
+    async def _answer_follow_up(self, message: str, context: Dict[str, Any], timer: StageTimer) -> Optional[str]:
+        """
+        Resuelve un seguimiento sobre el último resultado de la conversación.
+
+        El modelo solo elige las operaciones (no recibe filas); la ejecución es local.
+
+        Returns:
+            Respuesta en texto o None si el mensaje debe seguir el flujo normal
+        """
+        conversation_id = context.get('conversation_id')
+        cached = self.last_results.get(conversation_id)
+        if cached is None or not is_follow_up(message):
+            return None
+
+        response, _ = await self.model_orchestrator.execute_with_fallback(
+            system_prompt="Eres un planificador de operaciones sobre tablas. Responde solo con JSON.",
+            user_message=build_operation_prompt(cached, message),
+            feedback_callback=None,
+            timer=timer,
+            stage="followup_planning",
+            limits=context.get('batch_limits'),
+            priority=context.get('llm_priority', LLMPriority.INTERACTIVE)
+        )
+        operations = parse_operations(response)
+        if not operations:
+            logger.info(f"[CHAT] El seguimiento requiere una consulta nueva")
+            return None
+
+        try:
+            with timer.stage("followup_compute"):
+                derived = apply_operations(cached, operations)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"[CHAT] ⚠️ Operaciones de seguimiento no válidas {operations}: {str(e)}")
+            return None
+
+        self.last_results.replace(conversation_id, derived)
+        context['follow_up'] = {'operations': operations, 'rows': len(derived)}
+        if not len(derived):
+            return "No hay filas que cumplan la condición en el resultado anterior."
+        return rows_to_markdown(derived.rows, f"{len(derived)} filas:", max_rows=FollowUpConfig.RENDER_ROWS)
+
+    def _record_turn(self, message: str, response: Any, context: Dict[str, Any]):
+        """Guarda el turno en la sesión de la conversación (no las peticiones de confirmación)."""
+        conversation_id = context.get('conversation_id')
+        if not ChatSessionConfig.ENABLED or not conversation_id or not isinstance(response, str):
+            return
+        try:
+            self.chat_sessions.append_turn(
+                conversation_id, message, response,
+                last_sql=context.get('last_sql'),
+                schema_context=context.get('schema_context')
+            )
+        except Exception as e:
+            logger.warning(f"[CHAT] ⚠️ No se pudo guardar la sesión {conversation_id}: {str(e)}")
+
+    def _remember_result(self, context: Dict[str, Any], results: List[Dict[str, Any]], sql: str):
+        """Guarda el resultado completo para seguimientos (los paginados no están completos)."""
+        context['last_sql'] = sql
+        if context.get('result_session'):
+            self.last_results.discard(context.get('conversation_id'))
+        else:
+            self.last_results.store(context.get('conversation_id'), results, sql)
+
+    async def _run_sql(self, execute_func, query: str, timer: StageTimer) -> List[Dict[str, Any]]:
+        """Ejecuta una consulta ya revisada (plantillas) con la función de ejecución del contexto."""
+        with timer.stage("sql_execution"):
+            results = execute_func(query)
+            if asyncio.iscoroutine(results):
+                results = await results
+        return results
+
+    def _sql_system_prompt(self, history_context: str, db_context: str, date_range_context: str) -> str:
+        """Prompt del sistema para Text-to-SQL con historial, esquema y rango temporal resuelto."""
+        return f"""
+Eres un asistente experto en bases de datos Firebird SQL.
+Convierte preguntas en lenguaje natural a consultas SQL válidas.
+{history_context}
+{db_context}
+
+INSTRUCCIONES CRÍTICAS:
+1. Usa SOLO las tablas y columnas del esquema arriba
+2. Para "productos" → tabla ARTICULO
+3. Para "clientes" → tabla CLIENTE  
+4. Para "facturas/ventas" → tabla DOCCAB
+5. Genera SQL válido para Firebird 2.5
+6. Delimita SQL con ```sql y ```
+7. Si no requiere SQL, responde directamente
+8. IMPORTANTE: Para limitar resultados usa FIRST N (ej: SELECT FIRST 10...)
+9. NUNCA uses LIMIT, ROWS, o TOP - solo FIRST es válido en Firebird
+
+TIPOS DE DOCUMENTOS (TABLA DOCCAB, COLUMNA TIPO):
+- Para "facturas" -> WHERE TIPO = 13
+- Para "albaranes" -> WHERE TIPO = 11
+- Para "presupuestos" -> WHERE TIPO = 0
+- Para "pedidos" -> WHERE TIPO = 12
+- Para "abonos" -> WHERE TIPO = 3
+- Para "recibos" -> WHERE TIPO = 61
+- Para "contratos" -> WHERE TIPO = 10
+- Para "certificaciones" -> WHERE TIPO = 51
+- Para "ordenes de trabajo" o "SAT" -> WHERE TIPO = 2
+
+TERMINOLOGÍA ESPECÍFICA (CONTEXTO AIRE ACONDICIONADO):
+- "Split" se refiere a equipos de aire acondicionado.
+- "Gas" se refiere a refrigerantes (R-32, R-410A, etc.).
+
+BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
+- SIEMPRE usa `UPPER(columna) LIKE UPPER('%texto%')` para CUALQUIER búsqueda de texto.
+- NUNCA uses `LIKE '%TEXTO%'` directo, ya que Firebird es case-sensitive.
+- Ejemplo CORRECTO: `WHERE UPPER(NOMBRE) LIKE UPPER('%SPLIT%')`
+- Ejemplo INCORRECTO: `WHERE NOMBRE LIKE '%SPLIT%'`
+
+11. FECHAS (OBLIGATORIO RANGOS SEMIABIERTOS, para que se usen los índices):
+    - Filtra SIEMPRE con: WHERE FECHA >= 'AAAA-MM-DD' AND FECHA < 'AAAA-MM-DD'
+    - NUNCA apliques EXTRACT ni otras funciones sobre FECHA en el WHERE.
+    - "facturas de este mes" (hoy es {date.today().isoformat()}):
+      WHERE TIPO = 13 AND FECHA >= '{date.today().replace(day=1).isoformat()}' AND FECHA < '<primer día del mes siguiente>'
+    - Para agrupar por mes SÍ puedes usar EXTRACT en el SELECT/GROUP BY, nunca en el filtro.
+{date_range_context}
+12. NUNCA uses DATEADD dentro de EXTRACT - NO FUNCIONA en Firebird 2.5
+
+13. REGLA DE AÑO ACTUAL (CRÍTICA):
+    - Si el usuario menciona un mes (ej: "octubre", "noviembre") SIN especificar año, ASUME SIEMPRE EL AÑO ACTUAL.
+    - EJEMPLO: "facturas de octubre" (año actual {date.today().year}) -> 
+      WHERE FECHA >= '{date.today().year}-10-01' AND FECHA < '{date.today().year}-11-01'
+    - SOLO si el usuario dice explícitamente "de todos los años" o "histórico", omite el filtro de año.
+
+14. PREGUNTAS COMPARATIVAS (ej: "ventas de este mes vs el mes pasado por cliente"):
+    - NO escribas una única consulta enorme. Devuelve VARIAS consultas independientes,
+      cada una en su propio bloque ```sql (máximo {MultiQueryConfig.MAX_SUBQUERIES}), con esta primera línea:
+      -- etiqueta: <nombre corto> | clave: <columnas comunes para combinar>
+    - Usa los mismos nombres de columna clave en todas. Se ejecutan en paralelo y se combinan localmente.
+
+"""
+
+    def _interpretation_prompt(
+        self,
+        message: str,
+        sql_query: str,
+        rows: List[Dict[str, Any]],
+        context: Dict[str, Any],
+        rows_note: str = ""
+    ) -> str:
+        return (
+            f"Pregunta original: {message}\n"
+            f"Consulta SQL ejecutada: {sql_query}\n"
+            f"Resultados obtenidos: {rows}\n"
+            f"{rows_note}"
+            f"{self._pagination_note(context)}\n"
+            "Responde al usuario siguiendo estas REGLAS ESTRICTAS:\n"
+            "1. NO inventes datos. Usa SOLO los resultados proporcionados.\n"
+            "2. Sé objetivo y directo. Evita frases subjetivas como 'Es importante destacar', 'Los precios pueden variar', etc.\n"
+            "3. Los precios están en EUROS (EUR). Nunca uses el símbolo $.\n"
+            "4. Presenta los datos de forma clara y concisa (lista o tabla si es apropiado).\n"
+            "5. Si no hay resultados, dilo claramente."
+        )
+
+    def _pagination_note(self, context: Dict[str, Any]) -> str:
+        """Aviso para la interpretación cuando solo se envía la primera página (o un plan limitado)."""
+        truncated = [sq['label'] for sq in (context.get('multi_query') or {}).get('subqueries', []) if sq.get('truncated')]
+        if truncated:
+            return (
+                f"(Las consultas {', '.join(truncated)} se han limitado a {SQLLimits.MAX_RESULTS} filas; "
+                f"hay más resultados. No afirmes que son todos.)"
+            )
+        result_session = context.get('result_session')
+        if not result_session:
+            return ""
+        return (
+            f"(Es la primera página de {result_session['page_size']} filas; hay más resultados "
+            f"disponibles en páginas siguientes. No afirmes que son todos.)"
+        )
+
+    def _prepare_sql(self, sql_query: str, date_range: Any) -> str:
+        """Normaliza la SQL extraída de la respuesta del modelo antes de ejecutarla."""
+        # Limpiar query: remover punto y coma al final
+        sql_query = sql_query.rstrip(';').strip()
+        
+        # Forzar el rango temporal resuelto en lugar de filtros EXTRACT no indexables
+        sql_query = enforce_date_range(sql_query, date_range)
+        
+        # Añadir FIRST si es SELECT y no tiene FIRST, y NO es una consulta de agregación simple
+        # (con sesiones de resultados la consulta se pagina en el servidor y no se trunca)
+        sql_upper = sql_query.upper()
+        is_aggregate = any(agg in sql_upper for agg in ['COUNT(', 'SUM(', 'AVG(', 'MAX(', 'MIN('])
+        
+        if not ResultSessionConfig.ENABLED and sql_upper.startswith(SQLKeywords.SELECT) and SQLKeywords.FIRST not in sql_upper and not is_aggregate:
+            # Insertar FIRST después de SELECT
+            sql_query = sql_query[:6] + f' {SQLKeywords.FIRST} {SQLLimits.DEFAULT_FIRST}' + sql_query[6:]
+            logger.info(f"{LogPrefixes.SQL} {LogEmojis.WARNING} Añadido FIRST {SQLLimits.DEFAULT_FIRST} automáticamente para limitar resultados")
+        return sql_query
+
+    def _sql_pipeline(self, context: Dict[str, Any], date_range: Any) -> SQLStreamPipeline:
+        """Ejecución anticipada de la SQL durante el streaming, preparada como en el camino normal."""
+        def prepare(block: str, plan: bool) -> str:
+            sql_query = clean_plan_block(block) if plan else self._prepare_sql(block.strip(), date_range)
+            return self.sql_corrector.enforce_case_insensitive(sql_query)
+
+        async def launch(sql_query: str, plan: bool, launch_context: Dict[str, Any]) -> List[Dict[str, Any]]:
+            execute = self._execute_func(launch_context, paginate=not plan, max_rows=SQLLimits.MAX_RESULTS + 1 if plan else None)
+            if asyncio.iscoroutinefunction(execute):
+                return await execute(sql_query)
+            return await asyncio.to_thread(execute, sql_query)
+
+        return SQLStreamPipeline(prepare, launch, context)
+
+    def _execute_func(self, context: Dict[str, Any], paginate: bool = False, max_rows: Optional[int] = None):
+        """
+        Función de ejecución SQL para el corrector.
+
+        En un lote (context['batch_limits']) la consulta se ejecuta en un hilo
+        para no bloquear el resto de preguntas, acotada por base de datos.
+        Con `paginate` se devuelve la primera página y el resto queda en una
+        sesión de resultados (context['result_session']); con `max_rows` solo
+        se leen esas filas.
+        """
+        db_params = context.get('db_params')
+        limits = context.get('batch_limits')
+        if not limits:
+            return lambda q: self._execute_sql(q, db_params, context, paginate, max_rows)
+
+        db_key = f"{db_params.get('host')}:{db_params.get('port')}/{db_params.get('database')}" if db_params else ''
+
+        async def execute(query: str) -> List[Dict[str, Any]]:
+            async with limits.database(db_key):
+                return await asyncio.to_thread(self._execute_sql, query, db_params, context, paginate, max_rows)
+
+        return execute
+
+    def _track_sql_validity(self, execute_func: Callable, model_id: Optional[str]) -> Callable:
+        """
+        Envuelve execute_func para que el router de modelos sepa si la SQL
+        generada funcionó a la primera.
+
+        Solo cuenta la primera ejecución de cada cadena de corrección; los
+        errores que el corrector no reconoce como de SQL (conexión, etc.) no
+        penalizan al modelo.
+        """
+        first = True
+
+        async def execute(query: str) -> List[Dict[str, Any]]:
+            nonlocal first
+            is_first, first = first, False
+            try:
+                results = await self.sql_corrector._run(execute_func, query)
+            except Exception as e:
+                if is_first and self.sql_corrector.detect_error_type(str(e))['type'] != 'unknown':
+                    self.model_orchestrator.router.record_sql(model_id, valid=False)
+                raise
+            if is_first:
+                self.model_orchestrator.router.record_sql(model_id, valid=True)
+            return results
+
+        return execute
+
+    def _execute_sql(
+        self,
+        query: str,
+        db_params: Dict[str, Any],
+        context: Dict[str, Any] = None,
+        paginate: bool = False,
+        max_rows: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         logger.info(f"[DATABASE] Preparando ejecución de consulta...")
+        paginate = paginate and ResultSessionConfig.ENABLED and query.lstrip().upper().startswith(SQLKeywords.SELECT)
         
         max_retries = 3
         retry_count = 0
@@ -499,8 +857,6 @@ BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
             try:
                 logger.info(f"[DATABASE] Intento {retry_count + 1}/{max_retries}")
                 
-                driver = DBFactory.get_driver(DBConstants.TYPE_FIREBIRD)
-                
                 # Map username to user for DBConfig
                 config_params = db_params.copy()
                 if 'username' in config_params:
@@ -512,20 +868,59 @@ BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
                 
                 config = DBConfig(**config_params)
                 
-                logger.info(f"[DATABASE] Conectando para ejecutar consulta...")
-                driver.connect(config)
+                logger.info(f"[DATABASE] Obteniendo conexión del pool...")
+                driver = self.pool.acquire(config)
                 
-                logger.info(f"[DATABASE] Ejecutando: {query}")
-                results = driver.execute_query(query)
+                # Narrow LIKE searches on indexed text columns to primary keys
+                # (per attempt: a retry starts again from the original query)
+                db_key = f"{config.host}:{config.port}/{config.database}"
+                sql = self.text_search.accelerate(driver, query, db_key)
+                
+                # Plan-based cost guard (may rewrite or reject the query)
+                try:
+                    sql, plan_report = self.plan_guard.review(driver, sql)
+                except QueryCostExceededError as cost_error:
+                    if context is not None:
+                        context.setdefault('query_plans', []).append(cost_error.report)
+                    raise
+                if context is not None:
+                    context.setdefault('query_plans', []).append(plan_report)
+                
+                logger.info(f"[DATABASE] Ejecutando: {sql}")
+                if paginate:
+                    # La sesión pasa a ser dueña del driver (lo devuelve al pool al agotarse o expirar)
+                    cursor = driver.open_cursor(sql)
+                    session_driver, driver = driver, None
+                    first_page = self.result_sessions.open(session_driver, cursor, sql, on_release=self.pool.release)
+                    results = first_page['rows']
+                    if context is not None:
+                        context.pop('result_session', None)
+                        if first_page['has_more']:
+                            context['result_session'] = {k: v for k, v in first_page.items() if k != 'rows'}
+                elif max_rows:
+                    # Lectura acotada: no se traen más filas de las que se van a usar
+                    cursor = driver.open_cursor(sql)
+                    try:
+                        results = cursor.fetch(max_rows)
+                    finally:
+                        cursor.close()
+                else:
+                    results = driver.execute_query(sql)
                 
                 logger.info(f"[DATABASE] ✓ Consulta ejecutada: {len(results)} filas retornadas")
                 
                 return results
                 
+            except QueryCostExceededError:
+                raise
             except Exception as e:
                 last_error = e
                 retry_count += 1
                 logger.error(f"[DATABASE] ❌ Error en intento {retry_count}: {str(e)}")
+                if driver:
+                    # La conexión puede haber quedado inservible: no vuelve al pool
+                    self.pool.discard(driver)
+                    driver = None
                 
                 if retry_count < max_retries:
                     import time
@@ -534,11 +929,8 @@ BÚSQUEDAS DE TEXTO (OBLIGATORIO CASE INSENSITIVE):
                     time.sleep(wait_time)
             finally:
                 if driver:
-                    try:
-                        driver.disconnect()
-                        logger.info(f"[DATABASE] ✓ Desconectado")
-                    except:
-                        pass
+                    self.pool.release(driver)
+                    logger.info(f"[DATABASE] ✓ Conexión devuelta al pool")
         
         # Si llegamos aquí, todos los intentos fallaron
         error_msg = f"Error después de {max_retries} intentos: {str(last_error)}"
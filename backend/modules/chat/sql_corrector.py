@@ -3,9 +3,14 @@ SQL Auto-Correction System
 Detects SQL errors and requests corrected queries from AI models.
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+import inspect
 import logging
 
+from backend.core.utils.constants import QueryCostConfig
+from backend.core.utils.stage_timer import StageTimer
+from backend.modules.chat.correction_memo import get_correction_memo
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,7 +18,15 @@ class SQLCorrector:
     """Handles SQL error detection and automatic correction via AI."""
     
     def __init__(self):
-        pass
+        self.correction_memo = get_correction_memo()
+
+    @staticmethod
+    async def _run(execute_func: callable, sql_query: str) -> List[Dict[str, Any]]:
+        """Run execute_func, awaiting it when it is asynchronous."""
+        results = execute_func(sql_query)
+        if inspect.isawaitable(results):
+            results = await results
+        return results
     
     def detect_error_type(self, error_message: str) -> Dict[str, Any]:
         """
@@ -66,6 +79,13 @@ class SQLCorrector:
                 'message': 'Error de sintaxis SQL'
             }
         
+        # Rejected by the plan cost guard
+        if QueryCostConfig.ERROR_MARKER in error_upper:
+            return {
+                'type': 'expensive_plan',
+                'message': 'La consulta recorre tablas grandes sin usar índices'
+            }
+        
         # Unknown error
         return {
             'type': 'unknown',
@@ -188,7 +208,9 @@ CONSULTA SQL CORREGIDA:"""
         ai_provider: Any,
         execute_func: callable,
         max_retries: int = 2,
-        attempt: int = 0
+        attempt: int = 0,
+        pending_corrections: Optional[List[Tuple[str, str]]] = None,
+        timer: Optional[StageTimer] = None
     ) -> List[Dict[str, Any]]:
         """
         Execute SQL with automatic correction on errors.
@@ -198,9 +220,13 @@ CONSULTA SQL CORREGIDA:"""
             original_question: User's original question
             db_context: Database schema context
             ai_provider: AI provider for corrections
-            execute_func: Function to execute SQL (should raise on error)
+            execute_func: Function to execute SQL (should raise on error);
+                may be a coroutine function
             max_retries: Maximum correction attempts
             attempt: Current attempt number
+            pending_corrections: (failed query, error type) pairs fixed by this
+                chain, memoized once a query in the chain succeeds
+            timer: Request stage timer (sql_execution / sql_correction)
             
         Returns:
             Query results
@@ -212,9 +238,15 @@ CONSULTA SQL CORREGIDA:"""
         if attempt == 0:
             sql_query = self.enforce_case_insensitive(sql_query)
 
+        pending_corrections = pending_corrections or []
+        timer = timer or StageTimer()
+
         try:
             # Try to execute the query
-            results = execute_func(sql_query)
+            with timer.stage("sql_execution"):
+                results = await self._run(execute_func, sql_query)
+            for failed_query, error_type in pending_corrections:
+                self.correction_memo.store(failed_query, error_type, sql_query)
             return results
             
         except Exception as e:
@@ -234,16 +266,31 @@ CONSULTA SQL CORREGIDA:"""
                 logger.warning(f"[SQL AUTO-CORRECTION] ⚠️ Tipo de error desconocido, no se puede corregir automáticamente")
                 raise
             
+            # Reuse a known correction before asking the model
+            memo_query = self.correction_memo.lookup(sql_query, error_info['type'])
+            if memo_query and memo_query.strip() != sql_query.strip():
+                try:
+                    with timer.stage("sql_execution"):
+                        results = await self._run(execute_func, memo_query)
+                    logger.info(f"[SQL AUTO-CORRECTION] ✓ Corrección memorizada aplicada sin llamar al modelo")
+                    for failed_query, error_type in pending_corrections:
+                        self.correction_memo.store(failed_query, error_type, memo_query)
+                    return results
+                except Exception as memo_error:
+                    logger.warning(f"[SQL AUTO-CORRECTION] ⚠️ La corrección memorizada falló: {str(memo_error)}")
+                    self.correction_memo.invalidate(sql_query, error_info['type'])
+            
             # Request correction from AI
             logger.info(f"[SQL AUTO-CORRECTION] 🤖 Solicitando corrección al modelo IA...")
-            corrected_query = await self.request_correction(
-                sql_query,
-                original_question,
-                error_str,
-                error_info,
-                db_context,
-                ai_provider
-            )
+            with timer.stage("sql_correction"):
+                corrected_query = await self.request_correction(
+                    sql_query,
+                    original_question,
+                    error_str,
+                    error_info,
+                    db_context,
+                    ai_provider
+                )
             
             if not corrected_query or corrected_query.strip() == sql_query.strip():
                 logger.warning(f"[SQL AUTO-CORRECTION] ⚠️ El modelo no pudo generar una corrección diferente")
@@ -260,5 +307,7 @@ CONSULTA SQL CORREGIDA:"""
                 ai_provider,
                 execute_func,
                 max_retries,
-                attempt + 1
+                attempt + 1,
+                pending_corrections + [(sql_query, error_info['type'])],
+                timer
             )
@@ -0,0 +1,160 @@
+"""
+SQL Pipeline - Ejecución de la SQL mientras el modelo sigue generando
+
+Con la respuesta en streaming, el bloque ```sql suele cerrarse mucho antes de
+que el modelo termine la explicación que lo acompaña. En cuanto un bloque se
+completa se prepara igual que en el camino normal y se lanza su ejecución:
+
+- Consulta única (sin cabecera de plan): se ejecuta y se corta la generación,
+  el resto del texto no se usa.
+- Plan de varias consultas: en cuanto se cierra el segundo bloque con
+  cabecera se lanzan los completos, y cada bloque siguiente al cerrarse; se
+  sigue recibiendo hasta el final (o hasta MAX_SUBQUERIES bloques). Un único
+  bloque con cabecera no se lanza como plan: si no llega otro, el camino
+  normal lo ejecuta como consulta única (igual que parse_sql_plan).
+
+El corrector recibe después una función de ejecución que, para la misma
+consulta, espera la ejecución ya lanzada en lugar de repetirla; los errores
+se propagan igual, así que la cadena de corrección no cambia.
+
+Cada ejecución anticipada escribe en su propia copia del contexto (planes de
+ejecución, sesión de resultados); solo se incorpora al contexto de la
+petición la que se llega a usar. Una consulta ya en curso en la base de datos
+no se puede interrumpir: las descartadas terminan y se cierra su sesión de
+resultados.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.core.utils.constants import MultiQueryConfig, LogPrefixes
+from backend.modules.chat.multi_query import complete_sql_blocks, is_plan_block
+from backend.modules.chat.result_sessions import get_result_session_store
+
+logger = logging.getLogger(__name__)
+
+_EXECUTION_KEYS = ('query_plans', 'result_session')
+
+
+def _consume_exception(task: asyncio.Task):
+    """Evita avisos de excepción no recuperada en ejecuciones que nadie espera."""
+    if not task.cancelled():
+        task.exception()
+
+
+def _isolated_context(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia del contexto sin lo que escribe la ejecución (se incorpora solo si se usa)."""
+    return {k: v for k, v in context.items() if k not in _EXECUTION_KEYS}
+
+
+def _close_result_session(launch_context: Dict[str, Any]):
+    session = launch_context.get('result_session')
+    if session:
+        get_result_session_store().close(session['result_id'])
+
+
+class SQLStreamPipeline:
+    """Detecta bloques SQL completos en el texto parcial y anticipa su ejecución."""
+
+    def __init__(
+        self,
+        prepare: Callable[[str, bool], str],
+        launch: Callable[[str, bool, Dict[str, Any]], Awaitable[List[Dict[str, Any]]]],
+        context: Dict[str, Any]
+    ):
+        """
+        Args:
+            prepare: (bloque, es_plan) -> SQL exactamente como la recibirá la ejecución
+            launch: (sql, es_plan, contexto) -> corrutina que ejecuta la consulta
+                escribiendo en el contexto dado
+            context: Contexto de la petición
+        """
+        self.prepare = prepare
+        self.launch = launch
+        self.context = context
+        self._tasks: Dict[Tuple[str, bool], Tuple[asyncio.Task, Dict[str, Any]]] = {}
+        self._started = time.perf_counter()
+        self.launched = 0
+        self.reused = 0
+        self.first_launch_ms: Optional[float] = None
+        self.cut_generation = False
+
+    def on_partial(self, text: str) -> bool:
+        """
+        Callback de streaming con el texto acumulado.
+
+        Returns:
+            True para cortar la generación
+        """
+        blocks = complete_sql_blocks(text)
+        if not blocks:
+            return False
+        if not is_plan_block(blocks[0]):
+            self._launch(blocks[0], False)
+            self.cut_generation = True
+            return True
+        if len(blocks) < 2:
+            return False  # Aún no se sabe si es un plan o una consulta única con cabecera
+        for block in blocks[:MultiQueryConfig.MAX_SUBQUERIES]:
+            self._launch(block, True)
+        self.cut_generation = len(blocks) >= MultiQueryConfig.MAX_SUBQUERIES
+        return self.cut_generation
+
+    def _launch(self, block: str, plan: bool):
+        sql = self.prepare(block, plan)
+        key = (sql, plan)
+        if not sql or key in self._tasks:
+            return
+        launch_context = _isolated_context(self.context)
+        task = asyncio.create_task(self.launch(sql, plan, launch_context))
+        task.add_done_callback(_consume_exception)
+        self._tasks[key] = (task, launch_context)
+        self.launched += 1
+        if self.first_launch_ms is None:
+            self.first_launch_ms = round((time.perf_counter() - self._started) * 1000, 1)
+        logger.info(f"{LogPrefixes.SQL} ⚡ Ejecución anticipada durante el streaming: {sql}")
+
+    def wrap(self, execute_func: Callable, plan: bool) -> Callable:
+        """
+        Función de ejecución que reutiliza la ejecución anticipada de la misma consulta.
+
+        Args:
+            execute_func: Función de ejecución normal (síncrona o asíncrona)
+            plan: Si la consulta forma parte de un plan
+        """
+        def execute(query: str):
+            launched = self._tasks.pop((query, plan), None)
+            if launched is None:
+                return execute_func(query)
+            self.reused += 1
+            return self._adopt(*launched, plan)
+        return execute
+
+    async def _adopt(self, task: asyncio.Task, launch_context: Dict[str, Any], plan: bool) -> List[Dict[str, Any]]:
+        """Resultado de una ejecución anticipada, incorporando lo que escribió en su contexto."""
+        try:
+            return await task
+        finally:
+            self.context.setdefault('query_plans', []).extend(launch_context.get('query_plans', []))
+            if not plan:
+                # Igual que la ejecución paginada normal: sustituye la sesión anterior
+                self.context.pop('result_session', None)
+                if launch_context.get('result_session'):
+                    self.context['result_session'] = launch_context['result_session']
+
+    def discard_unused(self):
+        """Descarta las ejecuciones anticipadas que no se llegaron a usar."""
+        for task, launch_context in self._tasks.values():
+            # Sigue en la base de datos hasta terminar: su sesión se cierra entonces
+            task.add_done_callback(lambda _, launch_context=launch_context: _close_result_session(launch_context))
+        self._tasks = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'launched_early': self.launched,
+            'reused': self.reused,
+            'first_launch_ms': self.first_launch_ms,
+            'cut_generation': self.cut_generation
+        }
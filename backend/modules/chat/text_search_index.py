@@ -0,0 +1,252 @@
+"""
+Text Search Index - Aceleración de búsquedas de texto sin distinguir mayúsculas
+
+`UPPER(col) LIKE UPPER('%x%')` obliga a Firebird a recorrer toda la tabla.
+Para las columnas de texto más buscadas (TextSearchConfig.INDEXED_COLUMNS) se
+mantiene en memoria un índice invertido de trigramas que resuelve primero las
+claves primarias que cumplen el patrón y la condición LIKE se acota a ellas:
+
+    ((PK IN (...) OR PK > máxima_indexada) AND UPPER(col) LIKE ...)
+
+Firebird la resuelve por el índice de la clave primaria. La condición
+original se sigue aplicando, así que un índice desactualizado no añade filas
+(bajas o cambios de nombre) y las altas posteriores a la construcción (claves
+por encima de la máxima indexada) siguen apareciendo. Sin coincidencias en el
+índice se deja el LIKE original. Solo un cambio de nombre de una fila ya
+indexada hacia el patrón espera a la siguiente reconstrucción
+(TextSearchConfig.REFRESH_SECONDS).
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.abstract.database import DatabaseDriver
+from backend.core.config.metadata_manager import get_metadata_manager
+from backend.core.utils.constants import TextSearchConfig, LogPrefixes, LogEmojis
+from backend.modules.chat.plan_guard import resolve_table_aliases
+
+logger = logging.getLogger(__name__)
+
+# UPPER(col) LIKE UPPER('patrón') o UPPER(col) LIKE 'PATRÓN'
+_UPPER_LIKE_PATTERN = re.compile(
+    r"(?P<negation>\bNOT\s+)?UPPER\s*\(\s*(?P<col>[A-Z0-9_.$]+)\s*\)\s+LIKE\s+"
+    r"(?:UPPER\s*\(\s*'(?P<value>(?:[^']|'')*)'\s*\)|'(?P<raw>(?:[^']|'')*)')",
+    re.IGNORECASE
+)
+
+
+def _sql_literal(value: Any) -> str:
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class TextColumnIndex:
+    """Índice invertido de trigramas de una columna de texto."""
+
+    def __init__(self, table: str, column: str, pk_column: str, rows: List[Tuple[Any, Optional[str]]]):
+        self.table = table
+        self.column = column
+        self.pk_column = pk_column
+        self.built_at = time.time()
+        self.keys: List[Any] = []
+        self.texts: List[str] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.max_key = max((key for key, _ in rows), default=None)
+
+        n = TextSearchConfig.NGRAM_SIZE
+        for key, text in rows:
+            row_id = len(self.keys)
+            normalized = (text or '').upper()
+            self.keys.append(key)
+            self.texts.append(normalized)
+            for gram in {normalized[i:i + n] for i in range(len(normalized) - n + 1)}:
+                self.postings.setdefault(gram, []).append(row_id)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _candidates(self, needle: str) -> range:
+        n = TextSearchConfig.NGRAM_SIZE
+        grams = {needle[i:i + n] for i in range(len(needle) - n + 1)}
+        if not grams:
+            return range(len(self.keys))  # Patrón corto: verificación lineal
+
+        lists = sorted((self.postings.get(g, []) for g in grams), key=len)
+        if not lists[0]:
+            return []
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def search(self, like_pattern: str) -> Optional[List[Any]]:
+        """
+        Claves cuyo texto cumple el patrón LIKE (sin distinguir mayúsculas).
+
+        Args:
+            like_pattern: Patrón LIKE ('%x%', 'x%', '%x' o 'x')
+
+        Returns:
+            Lista de claves, o None si el patrón no es soportado (comodines internos)
+        """
+        pattern = like_pattern.upper()
+        starts = pattern.startswith('%')
+        ends = pattern.endswith('%') and len(pattern) > 1
+        needle = pattern[1 if starts else 0:len(pattern) - (1 if ends else 0)]
+        if '%' in needle or '_' in needle or not needle:
+            return None
+
+        if starts and ends:
+            matches = lambda text: needle in text
+        elif starts:
+            matches = lambda text: text.endswith(needle)
+        elif ends:
+            matches = lambda text: text.startswith(needle)
+        else:
+            matches = lambda text: text == needle
+
+        return [self.keys[i] for i in self._candidates(needle) if matches(self.texts[i])]
+
+
+class TextSearchAccelerator:
+    """Gestiona los índices de texto y reescribe los LIKE acelerables."""
+
+    def __init__(self):
+        self.metadata_manager = get_metadata_manager()
+        self._indexes: Dict[Tuple[str, str, str], TextColumnIndex] = {}
+        self._build_locks: Dict[Tuple[str, str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.rewrites = 0
+        self.skipped = 0
+
+    def _pk_column(self, table: str) -> Optional[str]:
+        table_info = self.metadata_manager.get_table_info(table) or {}
+        pks = table_info.get('primary_keys', [])
+        return pks[0] if len(pks) == 1 else None
+
+    def get_index(self, driver: DatabaseDriver, db_key: str, table: str, column: str) -> Optional[TextColumnIndex]:
+        """
+        Obtiene (o construye) el índice de una columna.
+
+        Args:
+            driver: Driver conectado
+            db_key: Identificador de la base de datos (host/puerto/fichero)
+            table: Tabla
+            column: Columna de texto
+
+        Returns:
+            Índice o None si la columna no está configurada o se está
+            construyendo en otra petición (esa búsqueda usa el LIKE original)
+        """
+        if column not in TextSearchConfig.INDEXED_COLUMNS.get(table, []):
+            return None
+        pk_column = self._pk_column(table)
+        if not pk_column:
+            return None
+
+        cache_key = (db_key, table, column)
+        with self._lock:
+            index = self._indexes.get(cache_key)
+            if index and time.time() - index.built_at < TextSearchConfig.REFRESH_SECONDS:
+                return index
+            build_lock = self._build_locks.setdefault(cache_key, threading.Lock())
+
+        # La lectura de la tabla no bloquea las búsquedas sobre otros índices
+        if not build_lock.acquire(blocking=False):
+            return None
+        try:
+            started = time.perf_counter()
+            rows = driver.execute_query(f"SELECT {pk_column} AS PK, {column} AS TXT FROM {table}")
+            index = TextColumnIndex(table, column, pk_column, [(r['PK'], r['TXT']) for r in rows])
+            with self._lock:
+                self._indexes[cache_key] = index
+            logger.info(
+                f"{LogPrefixes.SQL} 🔤 Índice de texto {table}.{column}: {len(index):,} filas, "
+                f"{len(index.postings):,} trigramas en {(time.perf_counter() - started) * 1000:.1f} ms"
+            )
+            return index
+        finally:
+            build_lock.release()
+
+    def accelerate(self, driver: DatabaseDriver, sql: str, db_key: str) -> str:
+        """
+        Acota `UPPER(col) LIKE ...` sobre columnas indexadas a las claves del índice.
+
+        Args:
+            driver: Driver conectado
+            sql: Consulta a ejecutar
+            db_key: Identificador de la base de datos
+
+        Returns:
+            Consulta reescrita (o la original si no hay nada acelerable)
+        """
+        if not TextSearchConfig.ENABLED or 'LIKE' not in sql.upper():
+            return sql
+
+        aliases = resolve_table_aliases(sql)
+        tables = set(aliases.values())
+
+        def replace(match):
+            if match.group('negation'):
+                return match.group(0)
+            qualifier, _, column = match.group('col').upper().rpartition('.')
+            table = aliases.get(qualifier) if qualifier else (next(iter(tables)) if len(tables) == 1 else None)
+            if not table:
+                return match.group(0)
+
+            try:
+                index = self.get_index(driver, db_key, table, column)
+            except Exception as e:
+                logger.warning(f"{LogPrefixes.SQL} {LogEmojis.WARNING} No se pudo construir el índice de texto: {e}")
+                return match.group(0)
+            if not index:
+                return match.group(0)
+
+            pattern = (match.group('value') if match.group('value') is not None else match.group('raw')).replace("''", "'")
+            started = time.perf_counter()
+            keys = index.search(pattern)
+            if not keys or len(keys) > TextSearchConfig.MAX_IN_LIST:
+                # Sin coincidencias: el índice puede no tener aún las filas nuevas
+                self.skipped += 1
+                return match.group(0)
+
+            self.rewrites += 1
+            pk = f"{qualifier}.{index.pk_column}" if qualifier else index.pk_column
+            logger.info(
+                f"{LogPrefixes.SQL} 🔤 LIKE '{pattern}' resuelto localmente: {len(keys)} claves "
+                f"en {(time.perf_counter() - started) * 1000:.2f} ms"
+            )
+            recent = f" OR {pk} > {_sql_literal(index.max_key)}" if index.max_key is not None else ""
+            return f"(({pk} IN ({', '.join(_sql_literal(k) for k in keys)}){recent}) AND {match.group(0)})"
+
+        return _UPPER_LIKE_PATTERN.sub(replace, sql)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado de los índices y contadores de reescritura."""
+        with self._lock:
+            indexes = dict(self._indexes)
+        return {
+            'indexes': [
+                {'table': table, 'column': column, 'rows': len(index), 'age_seconds': round(time.time() - index.built_at)}
+                for (_, table, column), index in indexes.items()
+            ],
+            'rewrites': self.rewrites,
+            'skipped': self.skipped
+        }
+
+
+# Instancia global del acelerador
+_text_search_accelerator = None
+
+def get_text_search_accelerator() -> TextSearchAccelerator:
+    """Obtener instancia global del acelerador de búsquedas de texto"""
+    global _text_search_accelerator
+    if _text_search_accelerator is None:
+        _text_search_accelerator = TextSearchAccelerator()
+    return _text_search_accelerator
@@ -3,12 +3,11 @@ import os
 from typing import Dict, List, Any
 import logging
 from backend.core.factory.db_factory import DBFactory
-from backend.core.utils.constants import DBConstants
+from backend.core.utils.constants import DBConstants, LLMPriority
 from backend.core.abstract.database import DBConfig
 from backend.core.config.settings import settings
-from backend.core.factory.ai_factory import AIFactory
-from backend.core.abstract.ai import AIConfig
-from backend.core.config.model_manager import model_manager
+from backend.modules.chat.model_fallback_orchestrator import get_llm_gateway
+from backend.core.utils.structured_output import StructuredOutputError, parse_structured
 
 logger = logging.getLogger(__name__)
 
@@ -156,82 +155,29 @@ class DatabaseService:
                                          .replace("{col_names}", ', '.join(col_names))\
                                          .replace("{samples}", str(samples))
 
-            # Select Model (Robust)
-            # 1. Try preferred models
-            preferred_models = ["gemini-1.5-flash", "gemini-1.5-pro", "grok-2-1212", "groq-llama-70b"]
-            model_config = None
-            
-            # Check enabled models
-            enabled_models = [m for m in model_manager.list_models() if m.get('enabled')]
-            if not enabled_models:
-                raise Exception("No AI models enabled for analysis")
-                
-            # Try to find a preferred model that is enabled
-            for pref in preferred_models:
-                for m in enabled_models:
-                    if m['id'] == pref or m['model_id'] == pref:
-                        model_config = m
-                        break
-                if model_config:
-                    break
-            
-            # If no preferred model found, use the first enabled one
-            if not model_config:
-                model_config = enabled_models[0]
-
+            # Bulk priority through the shared LLM gateway (fallback, quotas and breakers)
             print(f"\n{'='*50}")
             print(f"🤖 ANALIZANDO TABLA: {table_name}")
-            print(f"🧠 MODELO SELECCIONADO: {model_config['name']} ({model_config['model_id']})")
             print(f"{'='*50}\n")
+            print(f"📤 PROMPT ENVIADO:\n{'-'*20}\n{prompt}\n{'-'*20}\n")
 
-            provider = AIFactory.get_provider(model_config['provider'])
-            ai_config = AIConfig(
-                api_key=model_config['api_key'],
-                model=model_config['model_id'],
-                base_url=model_config.get('base_url')
+            response, model_id = await get_llm_gateway().execute_with_fallback(
+                system_prompt="",  # The prompt already carries the instructions
+                user_message=prompt,
+                stage="table_analysis",
+                priority=LLMPriority.BULK,
+                use_case="table_analysis"
             )
-            provider.configure(ai_config)
+            if not response:
+                raise Exception("No AI model could analyze the table (failed, rate limited or deadline exceeded)")
+            print(f"🧠 MODELO: {model_id}")
+            print(f"📥 RESPUESTA RECIBIDA:\n{'-'*20}\n{response}\n{'-'*20}\n")
 
-            print(f"📤 PROMPT ENVIADO:\n{'-'*20}\n{prompt}\n{'-'*20}\n")
-            
+            # Extract JSON (fences, surrounding text and truncation are repaired locally)
             try:
-                response = await provider.generate_text(prompt)
-                print(f"📥 RESPUESTA RECIBIDA:\n{'-'*20}\n{response}\n{'-'*20}\n")
-            except Exception as ai_error:
-                print(f"❌ ERROR IA: {ai_error}")
-                # Try fallback to another model if available
-                if len(enabled_models) > 1:
-                    print("🔄 Intentando con otro modelo...")
-                    for fallback_model in enabled_models:
-                        if fallback_model['id'] != model_config['id']:
-                            print(f"🧠 CAMBIANDO A: {fallback_model['name']}")
-                            try:
-                                provider = AIFactory.get_provider(fallback_model['provider'])
-                                ai_config = AIConfig(
-                                    api_key=fallback_model['api_key'],
-                                    model=fallback_model['model_id'],
-                                    base_url=fallback_model.get('base_url')
-                                )
-                                provider.configure(ai_config)
-                                response = await provider.generate_text(prompt)
-                                print(f"📥 RESPUESTA RECIBIDA (FALLBACK):\n{'-'*20}\n{response}\n{'-'*20}\n")
-                                break
-                            except Exception as fallback_error:
-                                print(f"❌ ERROR FALLBACK: {fallback_error}")
-                                continue
-                    else:
-                        raise ai_error # All failed
-                else:
-                    raise ai_error
-
-            
-            # Extract JSON
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
-            else:
-                raise Exception("AI did not return valid JSON")
+                return parse_structured(response, model=model_id)
+            except StructuredOutputError as e:
+                raise Exception(f"AI did not return valid JSON: {e}")
 
         except Exception as e:
             logger.error(f"Error analyzing table {table_name}: {e}")
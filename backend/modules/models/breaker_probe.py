@@ -0,0 +1,54 @@
+"""
+Pruebas en segundo plano de los circuitos abiertos
+
+Cuando termina el enfriamiento de un circuito abierto, en lugar de esperar a
+que una petición real pague la prueba, se envía un prompt mínimo al modelo:
+si responde, el circuito se cierra; si no, se reabre con más enfriamiento.
+"""
+
+import asyncio
+import logging
+
+from backend.core.config.model_manager import model_manager
+from backend.core.factory.provider_registry import get_provider_registry
+from backend.core.utils.circuit_breaker import get_circuit_breakers
+from backend.core.utils.constants import CircuitBreakerConfig, LogPrefixes, LogEmojis
+
+logger = logging.getLogger(__name__)
+
+
+async def probe_model(model_id: str) -> bool:
+    """Prueba semiabierta de un modelo. Devuelve True si respondió."""
+    model_config = model_manager.get_model(model_id)
+    if not model_config or not model_config.get('api_key'):
+        return False
+    breaker = get_circuit_breakers().get(model_id)
+    if not breaker.allow_request():
+        return False
+
+    try:
+        provider = get_provider_registry().for_model(model_config)
+        response = await asyncio.wait_for(
+            provider.generate_text(CircuitBreakerConfig.PROBE_PROMPT),
+            timeout=CircuitBreakerConfig.CALL_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        kind = breaker.record_failure(e)
+        logger.info(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.WARNING} Prueba de {model_id} fallida ({kind}), circuito reabierto")
+        return False
+
+    if not response:
+        breaker.record_failure("empty response")
+        return False
+    breaker.record_success()
+    logger.info(f"{LogPrefixes.AI_PROVIDER} {LogEmojis.SUCCESS} Prueba de {model_id} correcta, circuito cerrado")
+    return True
+
+
+async def run_breaker_probes():
+    """Bucle de pruebas (tarea del lifespan): cada PROBE_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(CircuitBreakerConfig.PROBE_INTERVAL_SECONDS)
+        candidates = get_circuit_breakers().probe_candidates()
+        if candidates:
+            await asyncio.gather(*(probe_model(model_id) for model_id in candidates), return_exceptions=True)
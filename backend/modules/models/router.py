@@ -2,6 +2,14 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 from backend.core.config.model_manager import model_manager
+from backend.core.utils.circuit_breaker import get_circuit_breakers
+from backend.core.utils.rate_limiter import get_rate_limiters
+from backend.core.factory.provider_registry import get_provider_registry
+from backend.core.utils.llm_cache import get_llm_cache
+from backend.core.utils.token_budget import get_token_usage
+from backend.core.utils.llm_scheduler import get_llm_scheduler
+from backend.core.utils.structured_output import get_structured_output
+from backend.modules.models.breaker_probe import probe_model
 
 router = APIRouter()
 
@@ -104,3 +112,55 @@ async def reload_models():
         return {"success": True, "message": "Models reloaded"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/health/breakers")
+async def get_circuit_breakers_state():
+    """Circuit breaker state and health score per model (shared by chat and email analysis)."""
+    return get_circuit_breakers().get_stats()
+
+@router.post("/health/breakers/{model_id}/reset")
+async def reset_circuit_breaker(model_id: str):
+    """Close a model's circuit manually."""
+    if not get_circuit_breakers().reset(model_id):
+        raise HTTPException(status_code=404, detail=f"No circuit breaker for model '{model_id}'")
+    return {"success": True}
+
+@router.post("/health/breakers/{model_id}/probe")
+async def probe_circuit_breaker(model_id: str):
+    """Run a half-open probe against a model now."""
+    return {"success": await probe_model(model_id), **get_circuit_breakers().get(model_id).to_dict()}
+
+@router.get("/health/rate-limits")
+async def get_rate_limits_state():
+    """Rate limiter state per provider API key (available quota, Retry-After block, queued and rerouted calls)."""
+    return get_rate_limiters().get_stats()
+
+@router.get("/health/clients")
+async def get_provider_clients_state():
+    """Cached provider clients (reuse hits/misses, invalidations on reload) and shared HTTP pool limits."""
+    return get_provider_registry().get_stats()
+
+@router.get("/health/llm-cache")
+async def get_llm_cache_state():
+    """Persistent LLM response cache: size, hit rate, LRU evictions and entries per use case."""
+    return get_llm_cache().get_stats()
+
+@router.delete("/health/llm-cache")
+async def clear_llm_cache(use_case: Optional[str] = None):
+    """Drop cached LLM responses (all, or only one use case)."""
+    return {"success": True, "deleted": get_llm_cache().clear(use_case)}
+
+@router.get("/health/tokens")
+async def get_token_usage_state():
+    """Estimated vs provider-reported tokens per model, calibrated chars/token per family and prompt trims."""
+    return get_token_usage().get_stats()
+
+@router.get("/health/gateway")
+async def get_llm_gateway_state():
+    """LLM scheduler: active and queued calls per priority, waits, caps and deadline misses."""
+    return get_llm_scheduler().get_stats()
+
+@router.get("/health/structured-output")
+async def get_structured_output_state():
+    """JSON responses per model: valid, repaired locally, type-adjusted or invalid; rejected native modes."""
+    return get_structured_output().get_stats()
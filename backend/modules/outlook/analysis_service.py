@@ -3,9 +3,8 @@ from collections import Counter
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from backend.core.factory.ai_factory import AIFactory
-from backend.core.abstract.ai import AIConfig
-from backend.core.config.settings import settings
+from backend.core.utils.constants import LLMPriority
+from backend.modules.chat.model_fallback_orchestrator import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -94,61 +93,19 @@ class EmailAnalyzer:
         }
 
     async def _try_generate(self, context: str, schema: dict) -> Dict[str, Any]:
-        """Tries to generate response using available enabled models."""
-        from backend.core.config.model_manager import model_manager
-        
-        # Get all enabled models
-        enabled_models = model_manager.list_models(enabled_only=True)
-        if not enabled_models:
-            raise Exception("No AI models enabled in configuration.")
-
-        # Sort preference: 'flash' > 'gemini' > others (heuristic for speed/cost)
-        def sort_key(m):
-            mid = m['id'].lower()
-            if 'flash' in mid: return 0
-            if 'gemini' in mid: return 1
-            if 'gpt' in mid: return 2
-            return 3
-            
-        models_to_try = sorted(enabled_models, key=sort_key)
-        
-        last_error = None
-
-        for model_config in models_to_try:
-            model_id = model_config['id']
-            try:
-                # 1. Get Provider
-                provider_name = model_config['provider']
-                provider = AIFactory.get_provider(provider_name)
-                
-                # 2. Configure
-                api_key = model_config.get('api_key')
-                if not api_key:
-                    continue # Skip if no key (e.g. env var missing)
-
-                config_dict = {
-                    'api_key': api_key,
-                    'model': model_config['model_id']
-                }
-                if model_config.get('base_url'):
-                    config_dict['base_url'] = model_config['base_url']
-                if model_config.get('headers'):
-                    config_dict['headers'] = model_config['headers']
-                
-                provider.configure(AIConfig(**config_dict))
-
-                logger.info(f"Analyzing with model: {model_id} ({provider_name})")
-                return await provider.generate_json(
-                    prompt=f"Analiza este correo y extrae información estructurada:\n{context}",
-                    schema=schema,
-                    system_instruction="Eres un asistente ejecutivo de IA. Tu misión es leer correos y extraer resúmenes ricos en datos. No digas 'ofertas de empleo', di 'ofertas de Ingeniero y Arquitecto'. No digas 'una factura', di 'factura de 50€'. Sé específico."
-                )
-            except Exception as e:
-                logger.warning(f"Model {model_id} failed: {e}")
-                last_error = e
-                continue
-        
-        raise last_error
+        """Generates the structured analysis through the shared LLM gateway (email priority)."""
+        result, model_id = await get_llm_gateway().execute_with_fallback(
+            system_prompt="Eres un asistente ejecutivo de IA. Tu misión es leer correos y extraer resúmenes ricos en datos. No digas 'ofertas de empleo', di 'ofertas de Ingeniero y Arquitecto'. No digas 'una factura', di 'factura de 50€'. Sé específico.",
+            user_message=f"Analiza este correo y extrae información estructurada:\n{context}",
+            stage="email_analysis",
+            priority=LLMPriority.EMAIL,
+            use_case="email_analysis",
+            schema=schema
+        )
+        if not result:
+            raise Exception("All AI models are unavailable (failed, rate limited or circuits open).")
+        logger.info(f"Email analyzed with model: {model_id}")
+        return result
 
     async def generate_reply_suggestion(self, email_context: str, sender: str) -> str:
         """Generates a draft reply based on the email context."""
@@ -180,29 +137,18 @@ Saludos cordiales,
         """
         
         try:
-            # Try to get an AI model using the same logic as analyze_content
-            model = None
-            for model_config in settings.AI_MODELS:
-                try:
-                    ai_config = AIConfig(
-                        provider=model_config.get("provider"),
-                        model=model_config.get("model"),
-                        api_key=model_config.get("api_key"),
-                        temperature=0.3
-                    )
-                    model = AIFactory.create(ai_config)
-                    logger.info(f"Using model for reply: {model_config.get('model')} ({model_config.get('provider')})")
-                    break
-                except Exception as e:
-                    logger.warning(f"Model {model_config.get('model')} failed for reply: {e}")
-                    continue
-            
-            if not model:
+            # The user is waiting for the draft: interactive priority
+            response, model_id = await get_llm_gateway().execute_with_fallback(
+                system_prompt="",  # The prompt already carries the instructions
+                user_message=prompt,
+                stage="reply_suggestion",
+                priority=LLMPriority.INTERACTIVE
+            )
+            if not response:
                 logger.warning("No AI model available for reply generation, using fallback template")
                 return fallback_template
-            
-            response = await model.generate_content_async(prompt)
-            return response.text.strip()
+            logger.info(f"Reply suggestion generated with model: {model_id}")
+            return response.strip()
             
         except Exception as e:
             logger.error(f"Error generating reply suggestion: {e}")
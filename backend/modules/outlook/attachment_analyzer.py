@@ -1,9 +1,8 @@
 import logging
 import base64
 from typing import Dict, Any, Optional, List
-from backend.core.factory.ai_factory import AIFactory
-from backend.core.abstract.ai import AIConfig
-from backend.core.config.settings import settings
+from backend.core.utils.constants import LLMPriority
+from backend.modules.chat.model_fallback_orchestrator import get_llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -188,36 +187,17 @@ Proporciona un resumen final conciso y coherente en español."""
             return f"Error al analizar '{filename}': {str(e)}"
     
     async def _generate_with_fallback(self, prompt: str) -> str:
-        """Generate text using available AI models with fallback."""
-        from backend.core.config.model_manager import model_manager
-        
-        models = model_manager.list_models(enabled_only=True)
-        
-        for model_config in models:
-            try:
-                # Get provider name from model config
-                provider_name = model_config.get("provider")
-                
-                # Create AIConfig without provider parameter
-                ai_config = AIConfig(
-                    api_key=model_config.get("api_key", ""),
-                    model=model_config.get("model_id"),
-                    base_url=model_config.get("base_url"),
-                    temperature=0.3
-                )
-                
-                # Get provider instance using provider name
-                provider = AIFactory.get_provider(provider_name)
-                provider.configure(ai_config)
-                
-                response = await provider.generate_text(prompt)
-                return response.strip()
-                
-            except Exception as e:
-                logger.warning(f"Model {model_config.get('model_id')} failed: {e}")
-                continue
-        
-        return "No se pudo generar análisis: todos los modelos AI fallaron"
+        """Generate text through the shared LLM gateway (email priority, cached per attachment)."""
+        response, _ = await get_llm_gateway().execute_with_fallback(
+            system_prompt="",  # The prompt already carries the instructions
+            user_message=prompt,
+            stage="attachment_analysis",
+            priority=LLMPriority.EMAIL,
+            use_case="attachment_analysis"
+        )
+        if not response:
+            return "No se pudo generar análisis: todos los modelos AI fallaron"
+        return response.strip()
 
 # Global instance
 attachment_analyzer = AttachmentAnalyzer()
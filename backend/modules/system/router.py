@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from backend.core.utils.constants import HTTPStatus
+from backend.drivers.db.connection_pool import get_connection_pool
+from backend.modules.system.warmup import get_warmup_state
+
+router = APIRouter()
+
+@router.get("/ready")
+async def readiness():
+    """Disponibilidad: 503 hasta que termina el precalentamiento de arranque."""
+    state = get_warmup_state().to_dict()
+    status_code = HTTPStatus.OK if state['ready'] else HTTPStatus.SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=status_code, content={'ready': state['ready'], 'status': state['status'], 'degraded': state['degraded']})
+
+@router.get("/warmup")
+async def get_warmup_status():
+    """Detalle por paso del precalentamiento (duración, resultado o error)."""
+    return get_warmup_state().to_dict()
+
+@router.get("/pool")
+async def get_pool_stats():
+    """Estadísticas del pool de conexiones de base de datos."""
+    return get_connection_pool().get_stats()
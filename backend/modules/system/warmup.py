@@ -0,0 +1,194 @@
+"""
+Warm-up - Precalentamiento al arrancar y estado de disponibilidad
+
+Lo que la primera petición pagaría en frío se hace al arrancar (lifespan de
+FastAPI), antes de declarar el servicio disponible en /api/system/ready:
+conexiones del pool, fragmentos de esquema, clientes de IA (configurados en
+el registro de providers, que las peticiones reutilizan) y cachés globales
+(plantillas, memoria de correcciones, índices de texto). Cada paso registra su duración y su error, si lo hay; un
+paso fallido no impide la disponibilidad, la marca como degradada.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from backend.core.abstract.database import DBConfig
+from backend.core.config.settings import settings
+from backend.core.config.model_manager import model_manager
+from backend.core.config.metadata_manager import get_metadata_manager
+from backend.core.config.database_metadata import get_semantic_schema
+from backend.core.factory.provider_registry import get_provider_registry
+from backend.core.utils.constants import WarmupConfig, TextSearchConfig, LogPrefixes, LogEmojis
+from backend.drivers.db.connection_pool import get_connection_pool
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """Progreso del precalentamiento, consultado por el endpoint de disponibilidad."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    READY = "ready"
+
+    def __init__(self):
+        self.status = self.PENDING
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == self.READY
+
+    def to_dict(self) -> Dict[str, Any]:
+        total_ms = None
+        if self.started_at and self.finished_at:
+            total_ms = round((self.finished_at - self.started_at) * 1000, 1)
+        return {
+            'ready': self.ready,
+            'status': self.status,
+            'degraded': any(step['status'] == 'error' for step in self.steps.values()),
+            'total_ms': total_ms,
+            'steps': self.steps
+        }
+
+
+def _db_config() -> Optional[DBConfig]:
+    """Base de datos configurada en settings (None si no hay ninguna)."""
+    if not settings.DB_NAME:
+        return None
+    return DBConfig(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        database=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD
+    )
+
+
+def _warm_schema() -> Dict[str, Any]:
+    metadata = get_metadata_manager()
+    schema = get_semantic_schema()
+    metadata.get_focused_schema("")  # Fragmento enfocado por defecto
+    return {'tables': len(metadata.metadata.get('tables', {})), 'schema_chars': len(schema)}
+
+
+def _warm_db_pool() -> Dict[str, Any]:
+    config = _db_config()
+    if config is None:
+        return {'skipped': 'DB_NAME no configurado'}
+    opened = get_connection_pool().warm(config, WarmupConfig.DB_CONNECTIONS)
+    return {'opened': opened, 'database': get_connection_pool().key(config)}
+
+
+def _warm_ai_clients() -> Dict[str, Any]:
+    configured, failed = [], {}
+    for model in model_manager.list_models(enabled_only=True):
+        if not model.get('api_key'):
+            continue
+        try:
+            get_provider_registry().for_model(model)  # Queda en caché para las peticiones
+            configured.append(model.get('id'))
+        except Exception as e:
+            failed[model.get('id')] = str(e)
+    if failed and not configured:
+        raise Exception(f"Ningún cliente de IA configurado: {failed}")
+    return {'configured': configured, 'failed': failed}
+
+
+def _warm_caches() -> Dict[str, Any]:
+    from backend.modules.chat.intent_matcher import get_intent_matcher
+    from backend.modules.chat.correction_memo import get_correction_memo
+    from backend.modules.chat.result_sessions import get_result_session_store
+    from backend.modules.chat.result_analytics import get_last_result_cache
+
+    get_result_session_store()
+    get_last_result_cache()
+    return {
+        'intent_templates': len(get_intent_matcher().get_stats()['templates']),
+        'correction_memo': get_correction_memo().get_stats()['entries']
+    }
+
+
+def _warm_text_indexes() -> Dict[str, Any]:
+    config = _db_config()
+    if config is None or not (TextSearchConfig.ENABLED and WarmupConfig.PRIME_TEXT_INDEXES):
+        return {'skipped': 'sin base de datos o desactivado'}
+
+    from backend.modules.chat.text_search_index import get_text_search_accelerator
+
+    accelerator = get_text_search_accelerator()
+    pool = get_connection_pool()
+    db_key = f"{config.host}:{config.port}/{config.database}"
+    built = {}
+    driver = pool.acquire(config)
+    try:
+        for table, columns in TextSearchConfig.INDEXED_COLUMNS.items():
+            for column in columns:
+                index = accelerator.get_index(driver, db_key, table, column)
+                if index is not None:
+                    built[f"{table}.{column}"] = len(index)
+    except Exception:
+        pool.discard(driver)
+        raise
+    pool.release(driver)
+    return {'indexes': built}
+
+
+# Pasos en orden: el esquema y las cachés no dependen de la base de datos
+WARMUP_STEPS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    'schema': _warm_schema,
+    'caches': _warm_caches,
+    'ai_clients': _warm_ai_clients,
+    'db_pool': _warm_db_pool,
+    'text_indexes': _warm_text_indexes
+}
+
+
+async def run_warmup(state: WarmupState) -> WarmupState:
+    """
+    Ejecuta los pasos de precalentamiento (en hilos, sin bloquear el bucle).
+
+    Args:
+        state: Estado a actualizar paso a paso
+
+    Returns:
+        El mismo estado, ya disponible
+    """
+    state.status = WarmupState.RUNNING
+    state.started_at = time.time()
+    logger.info(f"{LogPrefixes.SYSTEM} 🔥 Precalentamiento iniciado")
+
+    for name, step in WARMUP_STEPS.items():
+        state.steps[name] = {'status': WarmupState.RUNNING}
+        started = time.perf_counter()
+        try:
+            detail = await asyncio.to_thread(step)
+            state.steps[name] = {'status': 'ok', **detail}
+        except Exception as e:
+            logger.error(f"{LogPrefixes.SYSTEM} {LogEmojis.ERROR} Precalentamiento '{name}': {str(e)}")
+            state.steps[name] = {'status': 'error', 'error': str(e)}
+        state.steps[name]['ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    state.finished_at = time.time()
+    state.status = WarmupState.READY
+    summary = state.to_dict()
+    logger.info(
+        f"{LogPrefixes.SYSTEM} {LogEmojis.SUCCESS} Precalentamiento completado en {summary['total_ms']} ms"
+        f"{' (degradado)' if summary['degraded'] else ''}"
+    )
+    return state
+
+
+# Instancia global del estado de precalentamiento
+_warmup_state = None
+
+def get_warmup_state() -> WarmupState:
+    """Obtener instancia global del estado de precalentamiento"""
+    global _warmup_state
+    if _warmup_state is None:
+        _warmup_state = WarmupState()
+    return _warmup_state
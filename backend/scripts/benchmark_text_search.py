@@ -0,0 +1,78 @@
+import sys
+import time
+import statistics
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from backend.core.config.settings import settings
+from backend.core.abstract.database import DBConfig
+from backend.core.factory.db_factory import DBFactory
+from backend.core.utils.constants import DBConstants
+from backend.modules.chat.text_search_index import TextSearchAccelerator
+
+SEARCH_TERMS = ["SPLIT", "R-32", "TUBO", "CODO", "MANGUERA", "INVERTER", "AB"]
+REPETITIONS = 5
+
+
+def _timed(func, repetitions=REPETITIONS):
+    samples = []
+    result = None
+    for _ in range(repetitions):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def benchmark_text_search(table: str = "ARTICULO", column: str = "NOMBRE"):
+    print(f"Benchmark de búsqueda de texto sobre {table}.{column}")
+
+    if not settings.DB_NAME:
+        print("❌ ERROR: DB_NAME is empty!")
+        return
+
+    driver = DBFactory.get_driver(DBConstants.TYPE_FIREBIRD)
+    config = DBConfig(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        database=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD
+    )
+    driver.connect(config)
+
+    try:
+        total = driver.execute_query(f"SELECT COUNT(*) AS TOTAL FROM {table}")[0]['TOTAL']
+        print(f"Filas en {table}: {total:,}")
+
+        accelerator = TextSearchAccelerator()
+        db_key = f"{config.host}:{config.port}/{config.database}"
+
+        started = time.perf_counter()
+        index = accelerator.get_index(driver, db_key, table, column)
+        if not index:
+            print(f"❌ {table}.{column} no está en TextSearchConfig.INDEXED_COLUMNS o no tiene PK única")
+            return
+        print(f"Construcción del índice: {(time.perf_counter() - started) * 1000:.1f} ms ({len(index.postings):,} trigramas)\n")
+
+        print(f"{'Término':<12} {'Filas':>7} {'LIKE SQL (ms)':>14} {'Índice (ms)':>12} {'IN por PK (ms)':>15}")
+        for term in SEARCH_TERMS:
+            like_sql = f"SELECT {index.pk_column} FROM {table} WHERE UPPER({column}) LIKE UPPER('%{term}%')"
+            sql_rows, sql_ms = _timed(lambda: driver.execute_query(like_sql))
+
+            keys, index_ms = _timed(lambda: index.search(f"%{term}%"))
+
+            rewritten = accelerator.accelerate(driver, like_sql, db_key)
+            _, in_ms = _timed(lambda: driver.execute_query(rewritten))
+
+            print(f"{term:<12} {len(sql_rows):>7} {sql_ms:>14.2f} {index_ms:>12.3f} {index_ms + in_ms:>15.2f}")
+            if len(sql_rows) != len(keys):
+                print(f"   ⚠️ Resultados distintos: SQL={len(sql_rows)} índice={len(keys)}")
+    finally:
+        driver.disconnect()
+
+
+if __name__ == "__main__":
+    benchmark_text_search()
@@ -0,0 +1,76 @@
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from backend.modules.chat.date_range_resolver import enforce_date_range, resolve_date_range
+
+TODAY = date(2026, 10, 19)
+
+# Pregunta -> rango esperado [inicio, fin) o None si no debe resolverse
+RANGE_CASES = [
+    ("ventas de este mes", ("2026-10-01", "2026-11-01")),
+    ("ventas de octubre", ("2026-10-01", "2026-11-01")),
+    ("ventas en 2024", ("2024-01-01", "2025-01-01")),
+    ("ventas del año pasado", ("2025-01-01", "2026-01-01")),
+    # Mes con año explícito o relativo: una sola expresión
+    ("facturas de marzo de 2024", ("2024-03-01", "2024-04-01")),
+    ("facturas de octubre del año pasado", ("2025-10-01", "2025-11-01")),
+    ("facturas de marzo de hace 2 años", ("2024-03-01", "2024-04-01")),
+    ("ventas de octubre de este año", ("2026-10-01", "2026-11-01")),
+    # Cantidades con aspecto de año
+    ("pedidos con más de 2024 unidades", None),
+    ("clientes con menos de 2000 euros", None),
+    # Comparaciones: varios periodos, sin rango único
+    ("ventas de octubre de 2024 y octubre de 2025", None),
+    ("ventas de 2024 y 2025", None),
+    ("ventas de hoy comparadas con ayer", None),
+]
+
+PREVIOUS_YEAR_OCTOBER_SQL = (
+    "SELECT SUM(TOTAL) FROM FACTURA WHERE EXTRACT(YEAR FROM FECHA) = EXTRACT(YEAR FROM CURRENT_DATE) - 1 "
+    "AND EXTRACT(MONTH FROM FECHA) = 10"
+)
+COMPARISON_SQL = (
+    "SELECT 2024, SUM(TOTAL) FROM FACTURA WHERE EXTRACT(YEAR FROM FECHA) = 2024 "
+    "UNION ALL SELECT 2025, SUM(TOTAL) FROM FACTURA WHERE EXTRACT(YEAR FROM FECHA) = 2025"
+)
+
+# (pregunta, SQL del modelo, SQL esperada tras enforce_date_range)
+ENFORCE_CASES = [
+    (
+        "facturas de octubre del año pasado",
+        PREVIOUS_YEAR_OCTOBER_SQL,
+        "SELECT SUM(TOTAL) FROM FACTURA WHERE (FECHA >= '2025-10-01' AND FECHA < '2025-11-01')",
+    ),
+    ("ventas de 2024", COMPARISON_SQL, COMPARISON_SQL),
+]
+
+
+def check_date_ranges() -> bool:
+    print(f"Resolución de expresiones temporales (hoy = {TODAY})")
+    failures = 0
+
+    for question, expected in RANGE_CASES:
+        date_range = resolve_date_range(question, TODAY)
+        got = (date_range.start.isoformat(), date_range.end.isoformat()) if date_range else None
+        ok = got == expected
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} {question!r}: {got} (esperado {expected})")
+
+    for question, sql, expected in ENFORCE_CASES:
+        got = enforce_date_range(sql, resolve_date_range(question, TODAY))
+        ok = got == expected
+        failures += not ok
+        print(f"  {'✅' if ok else '❌'} reescritura para {question!r}")
+        if not ok:
+            print(f"     obtenido: {got}\n     esperado: {expected}")
+
+    print(f"\n{len(RANGE_CASES) + len(ENFORCE_CASES) - failures} correctos, {failures} fallos")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if check_date_ranges() else 1)
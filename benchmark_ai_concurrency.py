@@ -0,0 +1,150 @@
+import sys
+import os
+import asyncio
+import argparse
+import json
+import time
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+import httpx
+from openai import OpenAI, AsyncOpenAI
+
+from backend.drivers.ai.openai_compatible_provider import OpenAICompatibleProvider
+from backend.core.abstract.ai import AIConfig
+
+# Simulated OpenAI-compatible endpoint: every completion takes LATENCY seconds
+COMPLETION = {
+    "id": "bench", "object": "chat.completion", "created": 0, "model": "bench",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "OK"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}
+
+
+def make_blocking_provider(latency: float) -> OpenAICompatibleProvider:
+    """Old behaviour: synchronous client called directly inside `async def`."""
+    def handler(request):
+        time.sleep(latency)
+        return httpx.Response(200, json=COMPLETION)
+
+    client = OpenAI(api_key="bench", base_url="http://bench/v1", http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+
+    class BlockingProvider(OpenAICompatibleProvider):
+        async def generate_text(self, prompt, system_instruction=None):
+            response = client.chat.completions.create(model="bench", messages=[{"role": "user", "content": prompt}])
+            return response.choices[0].message.content
+
+    return BlockingProvider()
+
+
+def make_async_provider(latency: float) -> OpenAICompatibleProvider:
+    """Current provider (AsyncOpenAI) against the same simulated endpoint."""
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json=COMPLETION)
+
+    provider = OpenAICompatibleProvider()
+    provider.configure(AIConfig(api_key="bench", model="bench", base_url="http://bench/v1"))
+    provider.client = AsyncOpenAI(
+        api_key="bench", base_url="http://bench/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    return provider
+
+
+def make_live_provider(model_id: str):
+    """A configured model from ai_models_config.json (real API calls)."""
+    from backend.core.config.model_manager import model_manager
+    from backend.core.factory.provider_registry import get_provider_registry
+
+    model_config = model_manager.get_model(model_id)
+    if not model_config or not model_config.get('api_key'):
+        raise SystemExit(f"Model '{model_id}' not found or without API key")
+    return get_provider_registry().for_model(model_config)
+
+
+def make_pipeline(latency: float):
+    """Chat orchestrator (router, rate limiter, circuit breaker, registry) over the mock LLM only."""
+    from backend.core.config.model_manager import model_manager
+    from backend.core.utils.constants import MockLLMConfig
+    from backend.modules.chat.model_fallback_orchestrator import ModelFallbackOrchestrator
+
+    MockLLMConfig.LATENCY_DISTRIBUTION = "fixed"
+    MockLLMConfig.LATENCY_MEDIAN_SECONDS = latency
+    MockLLMConfig.TOKENS_PER_SECOND = float("inf")  # All the simulated time goes to the first token
+    mock = dict(model_manager.get_model("mock-llm"), enabled=True, api_key="bench")
+
+    orchestrator = ModelFallbackOrchestrator()
+    orchestrator.model_manager.list_models = lambda: [mock]
+
+    class PipelineProvider:
+        async def generate_text(self, prompt, system_instruction=None):
+            response, _ = await orchestrator.execute_with_fallback(system_instruction or "", prompt)
+            if response is None:
+                raise RuntimeError("mock-llm failed")
+            return response
+
+    return PipelineProvider()
+
+
+async def run(provider, concurrency: int, prompt: str) -> dict:
+    """Fires `concurrency` requests at once and measures wall time and event loop lag."""
+    lag = {"max": 0.0}
+    stop = asyncio.Event()
+
+    async def ticker(interval: float = 0.01):
+        # A blocked loop shows up as a late tick
+        while not stop.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lag["max"] = max(lag["max"], time.perf_counter() - expected)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    results = await asyncio.gather(*(provider.generate_text(prompt) for _ in range(concurrency)), return_exceptions=True)
+    wall = time.perf_counter() - started
+    stop.set()
+    await tick
+    errors = [r for r in results if isinstance(r, Exception)]
+    return {
+        "requests": concurrency,
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(concurrency / wall, 2) if wall else None,
+        "max_loop_lag_ms": round(lag["max"] * 1000, 1),
+        "errors": len(errors)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for AI providers")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated model latency (seconds)")
+    parser.add_argument("--model", help="Benchmark a configured model instead of the simulated endpoint")
+    parser.add_argument("--prompt", default="Responde solo: OK")
+    parser.add_argument("--pipeline", action="store_true", help="Measure our own overhead: orchestrator over the mock LLM")
+    args = parser.parse_args()
+
+    if args.pipeline:
+        print(f"Orchestrator over mock LLM ({args.latency}s per call), {args.concurrency} concurrent requests")
+        report = await run(make_pipeline(args.latency), args.concurrency, args.prompt)
+        # Time not spent in the (simulated) model: fallback, routing, limiter, breaker and logging
+        report["pipeline_overhead_s"] = round(report["wall_s"] - args.latency, 3)
+        print(json.dumps(report, indent=2))
+        return
+
+    if args.model:
+        print(f"Live model {args.model}, {args.concurrency} concurrent requests...")
+        print(json.dumps(await run(make_live_provider(args.model), args.concurrency, args.prompt), indent=2))
+        return
+
+    print(f"Simulated endpoint ({args.latency}s per call), {args.concurrency} concurrent requests")
+    report = {
+        "blocking_sync_client": await run(make_blocking_provider(args.latency), args.concurrency, args.prompt),
+        "async_client": await run(make_async_provider(args.latency), args.concurrency, args.prompt)
+    }
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,7 +3,7 @@ import { API, DB_CONFIG, UI_MESSAGES, CHAT_ROLES, UI_STYLES, EVENTS, DOM_SELECTO
 export class ChatModule {
     constructor() {
         this.apiBase = API.ENDPOINTS.CHAT;
-        this.conversationHistory = [];
+        this.conversationId = `conv-${Date.now()}-${Math.random().toString(36).slice(2, 10)}`;
     }
 
     init() {
@@ -60,7 +60,6 @@ export class ChatModule {
         }
 
         this.appendMessage(CHAT_ROLES.USER, message);
-        this.conversationHistory.push({ role: 'user', content: message });
         input.value = '';
 
         const thinkingId = 'thinking-' + Date.now();
@@ -82,7 +81,7 @@ export class ChatModule {
                     message: message,
                     db_params: dbParams,
                     model_id: selectedModel,
-                    conversation_history: this.conversationHistory
+                    conversation_id: this.conversationId
                 })
             });
 
@@ -97,7 +96,6 @@ export class ChatModule {
                     this.showConfirmationModal(data.response, message, selectedModel);
                 } else {
                     this.appendMessage(CHAT_ROLES.AI, data.response);
-                    this.conversationHistory.push({ role: 'assistant', content: data.response });
                 }
             } else {
                 this.appendMessage(CHAT_ROLES.AI, UI_MESSAGES.ERROR_GENERIC + (data.response || UI_MESSAGES.ERROR_UNKNOWN));
@@ -223,7 +221,7 @@ export class ChatModule {
                     message: message,
                     db_params: dbParams,
                     model_id: modelId,
-                    conversation_history: this.conversationHistory,
+                    conversation_id: this.conversationId,
                     confirm_data_sending: true
                 })
             });
@@ -235,7 +233,6 @@ export class ChatModule {
 
             if (data.success) {
                 this.appendMessage(CHAT_ROLES.AI, data.response);
-                this.conversationHistory.push({ role: 'assistant', content: data.response });
             } else {
                 this.appendMessage(CHAT_ROLES.AI, UI_MESSAGES.ERROR_GENERIC + (data.response || UI_MESSAGES.ERROR_UNKNOWN));
             }